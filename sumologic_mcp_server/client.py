@@ -2,15 +2,38 @@
 
 import asyncio
 import base64
+import contextlib
 import json
-import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Union
 from urllib.parse import urljoin
 
 import httpx
 from pydantic import BaseModel
 
+from .deadline import DeadlineExceeded, current_deadline
+from .job_monitor import JobMonitor
+from .job_registry import JobRegistry, is_relative_window
+from .json_stream import ResultPageStream
+from .memory_budget import current_call_memory
+from .metadata_cache import MetadataCache
+from .query_cost import QueryPlan, analyze_query
+from .query_parser import (
+    is_aggregate_query,
+    is_per_message_query,
+    normalize_query,
+    query_limit,
+    validate_query_syntax,
+)
+from .recorder import RecordingTransport, TraceRecorder
+from .scheduler import JobScheduler, current_priority
+from .shared_state import RateLimitedTransport, SharedState
+from .timeslice_cache import TimesliceCache, parse_timeslice_query, record_slice_ms
+
+# The collectors API pages with offset/limit and caps limit at 1000
+COLLECTOR_PAGE_SIZE = 1000
+SOURCE_FETCH_CONCURRENCY = 8
 
 class SearchJob(BaseModel):
     """Represents a Sumo Logic search job."""
@@ -21,6 +44,8 @@ class SearchJob(BaseModel):
     to_time: str
     message_count: Optional[int] = None
     record_count: Optional[int] = None
+    # Polling stopped at the call's deadline before the job finished
+    truncated_by_deadline: bool = False
 
 
 class SearchResult(BaseModel):
@@ -29,6 +54,75 @@ class SearchResult(BaseModel):
     fields: List[Dict[str, str]]
     total_count: int
     job_id: str
+    # Bytes charged to the tool call's memory budget for these records
+    size_bytes: int = 0
+    # The call's deadline cut the search or the fetch short
+    truncated_by_deadline: bool = False
+    # Age of a relative-window job reattached from an earlier server process
+    reused_job_seconds: Optional[float] = None
+
+
+def record_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the field map of a record or message, unwrapping the ``map`` envelope."""
+    fields = record.get("map")
+    return fields if isinstance(fields, dict) else record
+
+
+def project_records(
+    records: List[Dict[str, Any]], fields: List[str]
+) -> List[Dict[str, Any]]:
+    """Keep only ``fields`` (matched case-insensitively) in each record's field map."""
+    project = record_projector(fields)
+    return [project(record) for record in records]
+
+
+def record_projector(fields: List[str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """A function keeping only ``fields`` of one record, for rows parsed one at a time."""
+    wanted = {name.lower() for name in fields}
+
+    def project(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {"map": {k: v for k, v in record_fields(record).items() if k.lower() in wanted}}
+
+    return project
+
+
+def _text_size(records: List[Dict[str, Any]]) -> int:
+    """Characters of field names and values, to scale memory estimates."""
+    return sum(
+        len(str(k)) + len(str(v)) for record in records for k, v in record_fields(record).items()
+    )
+
+
+def project_columns(
+    columns: List[Dict[str, str]], fields: List[str]
+) -> List[Dict[str, str]]:
+    """Keep only the field descriptions of ``fields``."""
+    wanted = {name.lower() for name in fields}
+    return [column for column in columns if str(column.get("name", "")).lower() in wanted]
+
+
+def format_epoch_ms(time_ms: int) -> str:
+    """Format epoch millis as an absolute timestamp accepted by the Search API."""
+    dt = datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def parse_epoch_ms(timestamp: str) -> Optional[int]:
+    """Convert an absolute timestamp (UTC unless zoned) to epoch millis."""
+    if timestamp.isdigit():
+        return int(timestamp)
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _slice_sort_key(record: Dict[str, Any], alias: str) -> int:
+    """Sort key for timeslice rows; rows without a slice sort first."""
+    return record_slice_ms(record_fields(record), alias) or 0
 
 
 class SumoLogicClient:
@@ -39,12 +133,41 @@ class SumoLogicClient:
         access_id: str, 
         access_key: str, 
         endpoint: str = "https://api.sumologic.com/api",
-        timeout: int = 300
+        timeout: int = 300,
+        timeslice_cache: Optional[TimesliceCache] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        shared_state: Optional[SharedState] = None,
+        result_cache_ttl: int = 0,
+        cost_warn_threshold: float = 24.0,
+        cost_refuse_threshold: float = 1000.0,
+        scheduler: Optional[JobScheduler] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        job_registry: Optional[JobRegistry] = None,
+        recorder: Optional[TraceRecorder] = None,
+        status_polls_per_second: float = 0.0
     ):
         self.access_id = access_id
         self.access_key = access_key
         self.endpoint = endpoint.rstrip("/")
         self.timeout = timeout
+        self.timeslice_cache = timeslice_cache
+        # Overridable for tests and local fakes of the Sumo API
+        self.transport = transport
+        # Result cache, request rate and job budget shared with other workers
+        self.shared_state = shared_state
+        self.result_cache_ttl = result_cache_ttl
+        self._validation_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.cost_warn_threshold = cost_warn_threshold
+        self.cost_refuse_threshold = cost_refuse_threshold
+        self.scheduler = scheduler
+        self.metadata_cache = metadata_cache
+        # Lets a restarted process reattach to jobs it started before
+        self.job_registry = job_registry
+        # Traces API traffic for offline replay
+        self.recorder = recorder
+        # Polls the status of every job being waited on from one loop,
+        # at most status_polls_per_second at a time (0 for no limit)
+        self.job_monitor = JobMonitor(self._poll_job_status, status_polls_per_second)
         
         # Create auth header
         credentials = f"{access_id}:{access_key}"
@@ -55,6 +178,51 @@ class SumoLogicClient:
             "Accept": "application/json"
         }
     
+    def _http_client(self, timeout: float) -> httpx.AsyncClient:
+        """Create an HTTP client for a single API interaction."""
+        deadline = current_deadline.get()
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        transport = self.transport
+        if self.recorder is not None:
+            # Innermost, so recorded timings exclude client-side rate limiting
+            transport = RecordingTransport(
+                transport or httpx.AsyncHTTPTransport(), self.recorder
+            )
+        if self.shared_state is not None:
+            transport = RateLimitedTransport(
+                transport or httpx.AsyncHTTPTransport(), self.shared_state
+            )
+        return httpx.AsyncClient(timeout=timeout, transport=transport)
+
+    @contextlib.asynccontextmanager
+    async def job_slot(self) -> AsyncIterator[None]:
+        """Reserve a search-job slot from the scheduler and shared budget, if configured.
+
+        The local scheduler decides priority and fairness first, so a call
+        only competes for the cross-worker budget once it is next in line.
+        Waiting for a slot counts against the call's deadline.
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            async def acquire() -> None:
+                if self.scheduler is not None:
+                    await stack.enter_async_context(self.scheduler.slot())
+                if self.shared_state is not None:
+                    await stack.enter_async_context(self.shared_state.job_slot())
+
+            deadline = current_deadline.get()
+            if deadline is None:
+                await acquire()
+            else:
+                deadline.check("waiting for a search-job slot")
+                try:
+                    await asyncio.wait_for(acquire(), deadline.remaining())
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded(
+                        f"Deadline of {deadline.seconds:g}s reached waiting for a search-job slot"
+                    ) from None
+            yield
+
     def _parse_time(self, time_str: str) -> str:
         """Convert relative time strings to absolute timestamps."""
         if time_str == "now":
@@ -94,6 +262,10 @@ class SumoLogicClient:
         time_zone: str = "UTC"
     ) -> SearchJob:
         """Create a new search job."""
+        deadline = current_deadline.get()
+        if deadline is not None:
+            # A job started now would only be abandoned
+            deadline.check("creating the search job")
         url = f"{self.endpoint}/api/v1/search/jobs"
         
         # Convert relative times to absolute timestamps
@@ -107,7 +279,7 @@ class SumoLogicClient:
             "timeZone": time_zone
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._http_client(30.0) as client:
             response = await client.post(url, headers=self.headers, json=payload)
             response.raise_for_status()
             
@@ -124,7 +296,7 @@ class SumoLogicClient:
         """Get the status of a search job."""
         url = f"{self.endpoint}/api/v1/search/jobs/{job_id}"
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._http_client(30.0) as client:
             response = await client.get(url, headers=self.headers)
             response.raise_for_status()
             
@@ -139,112 +311,511 @@ class SumoLogicClient:
                 record_count=data.get("recordCount")
             )
     
-    async def wait_for_job_completion(self, job_id: str, poll_interval: int = 2) -> SearchJob:
-        """Wait for a search job to complete."""
-        start_time = time.time()
-        
-        while time.time() - start_time < self.timeout:
-            job = await self.get_search_job_status(job_id)
-            
-            if job.state in ["DONE GATHERING RESULTS", "CANCELLED", "FORCE PAUSED"]:
-                return job
-            elif job.state == "FAILED":
-                raise Exception(f"Search job {job_id} failed")
-            
-            await asyncio.sleep(poll_interval)
-        
-        raise TimeoutError(f"Search job {job_id} timed out after {self.timeout} seconds")
+    async def wait_for_job_completion(
+        self,
+        job_id: str,
+        poll_interval: int = 2,
+        min_messages: Optional[int] = None
+    ) -> SearchJob:
+        """Wait for a search job to complete.
+
+        The job is polled by the client's job monitor, together with every
+        other job being waited on. With ``min_messages`` set, also return as soon as a job that is still
+        gathering results has found that many messages. Under a call deadline,
+        polls tighten as the cut-off nears and the job is returned as it
+        stands once only the time reserved for fetching is left.
+        """
+        deadline = current_deadline.get()
+        future = self.job_monitor.watch(
+            job_id,
+            priority=current_priority.get(),
+            poll_interval=poll_interval,
+            min_messages=min_messages,
+            deadline=deadline
+        )
+        timeout = float(self.timeout)
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline.remaining() - deadline.fetch_reserve))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if deadline is None or not deadline.gathering_expired():
+                raise TimeoutError(f"Search job {job_id} timed out after {self.timeout} seconds")
+        job = self.job_monitor.latest(job_id) or await self.get_search_job_status(job_id)
+        deadline.truncate(f"search job {job_id} ({job.state.lower()})")
+        return job.model_copy(update={"truncated_by_deadline": True})
+
+    async def _poll_job_status(self, job_id: str) -> SearchJob:
+        """Status of a job for the job monitor, noted in the job registry."""
+        job = await self.get_search_job_status(job_id)
+        if self.job_registry is not None:
+            await self.job_registry.touch(job_id, job.state)
+        return job
     
+    async def delete_search_job(self, job_id: str) -> None:
+        """Delete a search job, releasing its concurrent-job slot."""
+        url = f"{self.endpoint}/api/v1/search/jobs/{job_id}"
+
+        async with self._http_client(10.0) as client:
+            await client.delete(url, headers=self.headers)
+
+        if self.job_registry is not None:
+            await self.job_registry.forget(job_id)
+
+    async def start_or_attach_job(self, query: str, from_time: str, to_time: str) -> str:
+        """Return the id of a live job for this search, creating one only if needed."""
+        if self.job_registry is None:
+            return (await self.create_search_job(query, from_time, to_time)).id
+
+        registry = self.job_registry
+        # Job ids are only meaningful to the account that created them
+        key = f"{self.endpoint}|{self.access_id}|{normalize_query(query)}|{from_time}|{to_time}"
+        relative = is_relative_window(from_time, to_time)
+        while True:
+            job_id = await registry.attach_or_claim(key, relative)
+            if job_id is None:
+                break
+            try:
+                job = await self.get_search_job_status(job_id)
+                if job.state not in ("CANCELLED", "FAILED"):
+                    return job_id
+            except httpx.HTTPStatusError:
+                # Expired or deleted on the Sumo side
+                pass
+            await registry.forget(job_id)
+
+        try:
+            job = await self.create_search_job(query, from_time, to_time)
+        except BaseException:
+            await registry.release_claim(key)
+            raise
+        await registry.register(key, job.id, job.state)
+        return job.id
+
+    @contextlib.asynccontextmanager
+    async def stream_result_page(
+        self,
+        job_id: str,
+        kind: str,
+        offset: int,
+        limit: int,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[ResultPageStream]:
+        """Open one page of records or messages for row-by-row reading.
+
+        Rows are decoded as the body arrives and projected to ``fields`` if
+        given, so only what the caller keeps stays in memory. Nothing is
+        charged to the memory budget; callers that keep rows account for them.
+        """
+        url = f"{self.endpoint}/api/v1/search/jobs/{job_id}/{kind}"
+        params = {"offset": offset, "limit": limit}
+
+        async with self._http_client(60.0) as client:
+            async with client.stream("GET", url, headers=self.headers, params=params) as response:
+                response.raise_for_status()
+                yield ResultPageStream(
+                    response.aiter_bytes(), kind, record_projector(fields) if fields else None
+                )
+
+    async def _get_result_page(
+        self,
+        job_id: str,
+        kind: str,
+        offset: int,
+        limit: int,
+        fields: Optional[List[str]] = None
+    ) -> SearchResult:
+        """Fetch one page of records or messages, within the call's memory budget.
+
+        The page is parsed as it streams in. With ``fields``, each row is
+        projected as soon as it is decoded, and the memory held for the page
+        shrinks with the columns dropped.
+        """
+        memory = current_call_memory.get()
+        reserved = await memory.reserve_page(limit) if memory is not None else 0
+        project = record_projector(fields) if fields else None
+        rows: List[Dict[str, Any]] = []
+        before = kept = 0
+        try:
+            async with self.stream_result_page(job_id, kind, offset, limit) as page:
+                async for row in page:
+                    if project is not None:
+                        projected = project(row)
+                        before += _text_size([row])
+                        kept += _text_size([projected])
+                        row = projected
+                    rows.append(row)
+        except BaseException:
+            if memory is not None:
+                memory.release(reserved)
+            raise
+
+        columns = page.fields
+        size = memory.settle_page(reserved, page.bytes_read, len(rows)) if memory else 0
+        if fields:
+            columns = project_columns(columns, fields)
+            if memory is not None and before:
+                kept = size * kept // before
+                memory.release(size - kept)
+                size = kept
+        # The rows were just built from parsed JSON; validating would only copy them
+        return SearchResult.model_construct(
+            records=rows,
+            fields=columns,
+            total_count=page.total_count,
+            job_id=job_id,
+            size_bytes=size
+        )
+
     async def get_search_job_records(
         self, 
         job_id: str, 
         offset: int = 0, 
-        limit: int = 1000
+        limit: int = 1000,
+        fields: Optional[List[str]] = None
     ) -> SearchResult:
         """Get records from a completed search job."""
-        url = f"{self.endpoint}/api/v1/search/jobs/{job_id}/records"
-        
-        params = {
-            "offset": offset,
-            "limit": limit
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            return SearchResult(
-                records=data.get("records", []),
-                fields=data.get("fields", []),
-                total_count=data.get("totalCount", 0),
-                job_id=job_id
-            )
+        return await self._get_result_page(job_id, "records", offset, limit, fields)
     
+    async def get_search_job_messages(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: int = 1000,
+        fields: Optional[List[str]] = None
+    ) -> SearchResult:
+        """Get raw messages from a completed non-aggregate search job."""
+        return await self._get_result_page(job_id, "messages", offset, limit, fields)
+
+    def analyze_query(
+        self,
+        query: str,
+        from_time: str = "-1h",
+        to_time: str = "now",
+        limit: Optional[int] = None
+    ) -> QueryPlan:
+        """Estimate a query's cost and push ``limit`` into it where that is safe."""
+        from_ms = parse_epoch_ms(self._parse_time(from_time))
+        to_ms = parse_epoch_ms(self._parse_time(to_time))
+        # Unparseable times are left for the API to reject; assume an hour
+        window_seconds = (to_ms - from_ms) / 1000 if from_ms and to_ms else 3600.0
+        return analyze_query(
+            query,
+            window_seconds,
+            limit,
+            warn_threshold=self.cost_warn_threshold,
+            refuse_threshold=self.cost_refuse_threshold
+        )
+
     async def execute_query(
         self, 
         query: str, 
         from_time: str = "-1h", 
         to_time: str = "now",
-        limit: int = 1000
+        limit: int = 1000,
+        fields: Optional[List[str]] = None,
+        early: bool = False
     ) -> SearchResult:
-        """Execute a query and return results."""
-        # Create search job
-        job = await self.create_search_job(query, from_time, to_time)
-        
-        # Wait for completion
-        completed_job = await self.wait_for_job_completion(job.id)
-        
-        # Get results
-        return await self.get_search_job_records(completed_job.id, limit=limit)
+        """Execute a query and return results, projected to ``fields`` if given.
+
+        A per-message query that ends in ``| limit N`` is answered as soon as
+        enough messages are found. With ``early``, any per-message query is,
+        for previews that want some ``limit`` messages rather than the first
+        ones of the whole range.
+        """
+        cache_key = None
+        if self.shared_state is not None and self.result_cache_ttl > 0:
+            normalized = normalize_query(query)
+            # Workers of one user share the file, but results belong to one account
+            cache_key = (
+                f"execute_query|{self.endpoint}|{self.access_id}|"
+                f"{normalized}|{from_time}|{to_time}|{limit}"
+            )
+            if fields:
+                cache_key += "|" + ",".join(fields)
+            cached = await self.shared_state.cache_get(cache_key)
+            if cached is not None:
+                return SearchResult.model_validate_json(cached)
+
+        result = None
+        if self.timeslice_cache is not None and parse_timeslice_query(query):
+            result = await self._execute_timeslice_query(query, from_time, to_time, limit)
+            if result is not None and fields:
+                result.records = project_records(result.records, fields)
+                result.fields = project_columns(result.fields, fields)
+
+        stopped_early = False
+        if result is None:
+            # Per-message queries bounded by a limit can be answered from the
+            # messages found so far, without waiting for the whole range
+            wanted = None
+            if not is_aggregate_query(query) and is_per_message_query(query):
+                bound = query_limit(query)
+                if bound is not None or early:
+                    wanted = min(limit, bound or limit)
+
+            async with self.job_slot():
+                # Create search job, or reattach to one started earlier
+                job_id = await self.start_or_attach_job(query, from_time, to_time)
+
+                # Wait for completion
+                completed_job = await self.wait_for_job_completion(
+                    job_id, min_messages=wanted
+                )
+
+                result = await self._get_first_results(completed_job, limit, fields)
+                if self.job_registry is not None:
+                    result.reused_job_seconds = self.job_registry.reused_age(job_id)
+
+                if completed_job.state in ("NOT STARTED", "GATHERING RESULTS"):
+                    # Enough results already, or out of time; stop the rest of the scan
+                    await self.delete_search_job(completed_job.id)
+                    stopped_early = True
+
+        # What an unfinished scan happened to find is not the query's answer
+        if cache_key is not None and not result.truncated_by_deadline and not stopped_early:
+            await self.shared_state.cache_put(
+                cache_key, result.model_dump_json(), self.result_cache_ttl
+            )
+        return result
     
+    async def _get_first_results(
+        self, job: SearchJob, limit: int, fields: Optional[List[str]] = None
+    ) -> SearchResult:
+        """Fetch up to ``limit`` results of a job, or what it has so far if it was cut short."""
+        if job.truncated_by_deadline and not (job.record_count or job.message_count):
+            return SearchResult(
+                records=[], fields=[], total_count=0, job_id=job.id, truncated_by_deadline=True
+            )
+
+        try:
+            # Aggregates produce records, other queries messages
+            if job.record_count or not job.message_count:
+                result = await self.get_search_job_records(job.id, limit=limit, fields=fields)
+            else:
+                result = await self.get_search_job_messages(job.id, limit=limit, fields=fields)
+        except httpx.TimeoutException:
+            if not job.truncated_by_deadline:
+                raise
+            # No time left even for the partial page
+            return SearchResult(
+                records=[], fields=[], total_count=0, job_id=job.id, truncated_by_deadline=True
+            )
+
+        if job.truncated_by_deadline:
+            result.truncated_by_deadline = True
+        if not result.total_count:
+            # /records pages do not report a total; the job does
+            result.total_count = (
+                job.record_count if job.record_count else job.message_count
+            ) or len(result.records)
+        return result
+
+    async def _execute_timeslice_query(
+        self,
+        query: str,
+        from_time: str,
+        to_time: str,
+        limit: int
+    ) -> Optional[SearchResult]:
+        """Answer a timeslice aggregate from cached slices plus a delta query."""
+        spec = parse_timeslice_query(query)
+        from_ms = parse_epoch_ms(self._parse_time(from_time))
+        to_ms = parse_epoch_ms(self._parse_time(to_time))
+        if spec is None or from_ms is None or to_ms is None or from_ms >= to_ms:
+            return None
+
+        cache = self.timeslice_cache
+        plan = cache.plan(query, spec, from_ms, to_ms)
+        cache.evict_before(query, plan.from_ms)
+
+        fresh_rows: List[Dict[str, Any]] = []
+        fields = cache.cached_fields(query)
+        job_id = "timeslice-cache"
+        truncated = False
+        if plan.fetch_from_ms is not None:
+            async with self.job_slot():
+                job = await self.create_search_job(
+                    query, format_epoch_ms(plan.fetch_from_ms), format_epoch_ms(to_ms)
+                )
+                completed_job = await self.wait_for_job_completion(job.id)
+                job_id = completed_job.id
+
+                if completed_job.truncated_by_deadline:
+                    # Partial slices must never reach the cache
+                    partial = await self._get_first_results(completed_job, limit)
+                    await self.delete_search_job(job_id)
+                    fresh_rows = partial.records
+                    fields = partial.fields or fields
+                else:
+                    # Every row of the delta is needed to fill the cache, not just `limit`.
+                    # /records pages carry no totalCount: read up to the job's record
+                    # count, or until a short page if the job did not report one
+                    total = completed_job.record_count
+                    offset = 0
+                    while total is None or offset < total:
+                        size = 10000 if total is None else min(10000, total - offset)
+                        page = await self.get_search_job_records(job_id, offset=offset, limit=size)
+                        fresh_rows.extend(page.records)
+                        fields = page.fields or fields
+                        offset += len(page.records)
+                        if len(page.records) < size:
+                            break
+
+                    cache.store(query, spec, plan.fetch_from_ms, to_ms, fresh_rows, fields)
+                truncated = completed_job.truncated_by_deadline
+
+        rows = plan.cached_rows + fresh_rows
+        rows.sort(
+            key=lambda row: _slice_sort_key(row, spec.alias),
+            reverse=spec.descending
+        )
+        return SearchResult(
+            records=rows[:limit],
+            fields=fields,
+            total_count=len(rows),
+            job_id=job_id,
+            truncated_by_deadline=truncated
+        )
+
+    async def _get_metadata(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """GET a metadata endpoint, revalidating through the metadata cache if configured."""
+        cache = self.metadata_cache
+        if cache is None:
+            response = await client.get(url, headers=self.headers, params=params)
+            response.raise_for_status()
+            return response.json()
+
+        key = cache.key(url, params)
+        entry = cache.lookup(key)
+        if entry is not None:
+            data = cache.fresh(entry)
+            if data is not None:
+                return data
+
+        headers = {**self.headers, **cache.conditional_headers(entry)}
+        response = await client.get(url, headers=headers, params=params)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return cache.resolve(key, entry, response)
+
+    async def iter_collectors(
+        self,
+        page_size: int = COLLECTOR_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every collector, fetching later pages concurrently.
+
+        The API does not report a total, so once the first page comes back
+        full the next ``concurrency`` pages are requested at once; fetching
+        stops at the first short page.
+        """
+        url = f"{self.endpoint}/api/v1/collectors"
+
+        async with self._http_client(30.0) as client:
+            async def fetch_page(offset: int) -> List[Dict[str, Any]]:
+                params = {"offset": offset, "limit": page_size}
+                data = await self._get_metadata(client, url, params)
+                return data.get("collectors", [])
+
+            page = await fetch_page(0)
+            next_offset = page_size
+            in_flight: Deque["asyncio.Task[List[Dict[str, Any]]]"] = deque()
+            try:
+                while True:
+                    for collector in page:
+                        yield collector
+                    if len(page) < page_size:
+                        break
+                    while len(in_flight) < concurrency:
+                        in_flight.append(asyncio.create_task(fetch_page(next_offset)))
+                        next_offset += page_size
+                    page = await in_flight.popleft()
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
     async def get_collectors(self) -> List[Dict[str, Any]]:
         """Get list of collectors."""
-        url = f"{self.endpoint}/api/v1/collectors"
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get("collectors", [])
+        return [collector async for collector in self.iter_collectors()]
     
     async def get_sources(self, collector_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get list of sources, optionally filtered by collector."""
         if collector_id:
             url = f"{self.endpoint}/api/v1/collectors/{collector_id}/sources"
         else:
-            # Get all sources by iterating through collectors
-            collectors = await self.get_collectors()
+            # Get all sources, fetching each collector's as soon as it is enumerated
             all_sources = []
-            
-            for collector in collectors:
-                try:
+            semaphore = asyncio.Semaphore(SOURCE_FETCH_CONCURRENCY)
+
+            async with self._http_client(30.0) as client:
+                async def collector_sources(collector: Dict[str, Any]) -> List[Dict[str, Any]]:
                     collector_url = f"{self.endpoint}/api/v1/collectors/{collector['id']}/sources"
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        response = await client.get(collector_url, headers=self.headers)
-                        if response.status_code == 200:
-                            data = response.json()
-                            sources = data.get("sources", [])
-                            for source in sources:
-                                source["collector_name"] = collector.get("name", "")
-                                source["collector_id"] = collector["id"]
-                            all_sources.extend(sources)
-                except Exception:
-                    # Skip collectors that can't be accessed
-                    continue
+                    async with semaphore:
+                        try:
+                            data = await self._get_metadata(client, collector_url)
+                        except Exception:
+                            # Skip collectors that can't be accessed
+                            return []
+                    # Copy, since cached sources are shared between calls
+                    return [
+                        {
+                            **source,
+                            "collector_name": collector.get("name", ""),
+                            "collector_id": collector["id"]
+                        }
+                        for source in data.get("sources", [])
+                    ]
+
+                tasks: List["asyncio.Task[List[Dict[str, Any]]]"] = []
+                try:
+                    async for collector in self.iter_collectors():
+                        tasks.append(asyncio.create_task(collector_sources(collector)))
+                    for sources in await asyncio.gather(*tasks):
+                        all_sources.extend(sources)
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    raise
             
             return all_sources
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
+        async with self._http_client(30.0) as client:
+            data = await self._get_metadata(client, url)
             return data.get("sources", [])
     
     async def validate_query(self, query: str) -> Dict[str, Any]:
-        """Validate query syntax without executing."""
+        """Validate query syntax without executing.
+
+        Most queries are judged by the local checker in ``query_parser``;
+        only inconclusive ones cost a search job. Results are cached by
+        normalized query text.
+        """
+        key = normalize_query(query)
+        cached = self._validation_cache.get(key)
+        if cached is not None:
+            self._validation_cache.move_to_end(key)
+            return dict(cached)
+
+        local = validate_query_syntax(query)
+        if local.valid is not None:
+            result = {"valid": local.valid, "message": local.message, "source": "local"}
+        else:
+            result = await self._validate_query_remote(query)
+            result["source"] = "remote"
+
+        self._validation_cache[key] = result
+        while len(self._validation_cache) > 1024:
+            self._validation_cache.popitem(last=False)
+        return dict(result)
+
+    async def _validate_query_remote(self, query: str) -> Dict[str, Any]:
+        """Validate query syntax by creating and cancelling a search job."""
         # For now, we'll do a dry run by creating a job with a very short time range
         # and immediately cancelling it. This is a workaround as Sumo doesn't have
         # a dedicated syntax validation endpoint.
@@ -253,7 +824,7 @@ class SumoLogicClient:
             
             # Try to cancel the job immediately
             cancel_url = f"{self.endpoint}/api/v1/search/jobs/{job.id}"
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with self._http_client(10.0) as client:
                 await client.delete(cancel_url, headers=self.headers)
             
             return {"valid": True, "message": "Query syntax is valid"}
@@ -0,0 +1,82 @@
+"""Per-call latency budget shared by every phase of a tool call.
+
+A tool call that carries a deadline publishes it through a context
+variable. Slot waits, HTTP requests, job polling and page fetching read it
+to bound their own timeouts. Search phases that run out of time stop early
+and mark the call truncated so the best partial result can be returned
+instead of an error.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+# Never give a request less than this, so the final partial fetch can still run
+MIN_REQUEST_SECONDS = 1.0
+MIN_POLL_SECONDS = 0.1
+# Share of the budget held back from job polling for fetching results
+FETCH_RESERVE_FRACTION = 0.2
+MAX_FETCH_RESERVE_SECONDS = 5.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a phase cannot start because the call's deadline has passed."""
+
+
+class Deadline:
+    """A point in (monotonic) time by which a tool call should answer."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        # Phases that stopped early, in the order they did
+        self.truncated: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, phase: str) -> None:
+        """Refuse to start ``phase`` once the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s reached before {phase}")
+
+    def truncate(self, phase: str) -> None:
+        """Record that ``phase`` stopped early with a partial result."""
+        if phase not in self.truncated:
+            self.truncated.append(phase)
+
+    def timeout(self, default: float) -> float:
+        """An HTTP timeout no longer than ``default`` or the time left."""
+        return min(default, max(MIN_REQUEST_SECONDS, self.remaining()))
+
+    @property
+    def fetch_reserve(self) -> float:
+        """Seconds job polling leaves for fetching whatever the job has found."""
+        return min(MAX_FETCH_RESERVE_SECONDS, self.seconds * FETCH_RESERVE_FRACTION)
+
+    def gathering_expired(self) -> bool:
+        return self.remaining() <= self.fetch_reserve
+
+    def poll_interval(self, interval: float) -> float:
+        """Shorten a poll interval so the last poll lands near the cut-off."""
+        until_cutoff = self.remaining() - self.fetch_reserve
+        return max(MIN_POLL_SECONDS, min(interval, until_cutoff / 2))
+
+    def prefetch_depth(self, page_seconds: Optional[float], depth: int) -> int:
+        """How many more pages to keep downloading given how long a page takes.
+
+        Nothing new is started once a page would no longer finish in time.
+        """
+        if page_seconds is None or page_seconds <= 0:
+            return depth
+        return max(0, min(depth, int(self.remaining() / page_seconds)))
+
+
+# The deadline of the tool call being handled, if it has one
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "current_deadline", default=None
+)
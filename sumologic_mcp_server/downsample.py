@@ -0,0 +1,308 @@
+"""Shape-preserving downsampling of time-series results, one page at a time.
+
+A timeslice aggregate such as ``| timeslice 1m | count by _timeslice,
+_sourceHost`` returns one row per slice and group. Rows are split into
+series by their group keys and each series is reduced to a target number
+of points. Buckets are fixed slices of the query window, so every row is
+placed in O(1) as pages stream in, without sorting.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from .client import SumoLogicClient, parse_epoch_ms, record_fields
+from .deadline import current_deadline
+from .timeslice_cache import parse_timeslice_query, record_slice_ms
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+PAGE_SIZE = 10000
+MAX_DOWNSAMPLE_ROWS = 1_000_000
+_NUMERIC_TYPES = {"int", "long", "double", "float", "number"}
+
+# (time, value, row) for one point of a series
+_Point = Tuple[int, float, Dict[str, Any]]
+
+
+class SeriesShape(BaseModel):
+    """Which columns of a result hold the time, the series keys and the plotted value."""
+    time_field: str
+    group_fields: List[str]
+    value_field: str
+
+
+def _is_number(value: Any) -> bool:
+    try:
+        return math.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def detect_shape(
+    columns: List[Dict[str, Any]],
+    row: Dict[str, Any],
+    time_field: Optional[str] = None
+) -> Optional[SeriesShape]:
+    """Find the time column, group keys and first value column of a result.
+
+    Uses the ``keyField`` and ``fieldType`` flags of the API's field list
+    where present, and otherwise whether the row's values are numeric.
+    """
+    values = record_fields(row)
+    names = list(values)
+    lookup = {name.lower(): name for name in names}
+    time_name = lookup.get((time_field or "_timeslice").lower())
+    if time_name is None:
+        return None
+
+    described = {str(c.get("name", "")).lower(): c for c in columns}
+    group_fields, value_fields = [], []
+    for name in names:
+        if name == time_name:
+            continue
+        column = described.get(name.lower(), {})
+        if "keyField" in column:
+            numeric = not column["keyField"]
+        elif "fieldType" in column and column["fieldType"] != "string":
+            numeric = column["fieldType"] in _NUMERIC_TYPES
+        else:
+            numeric = _is_number(values.get(name, values.get(name.lower())))
+        (value_fields if numeric else group_fields).append(name)
+
+    if not value_fields:
+        return None
+    return SeriesShape(time_field=time_name, group_fields=group_fields, value_field=value_fields[0])
+
+
+class _Downsampler(ABC):
+    """Route rows of a window into per-series, per-bucket state."""
+
+    def __init__(self, shape: SeriesShape, from_ms: int, to_ms: int, buckets: int):
+        self.shape = shape
+        self.from_ms = from_ms
+        self.span = max(1, to_ms - from_ms)
+        self.buckets = max(1, buckets)
+        self.rows_in = 0
+        self.skipped = 0
+
+    def _field(self, values: Dict[str, Any], name: str) -> Any:
+        return values.get(name, values.get(name.lower()))
+
+    def add(self, row: Dict[str, Any]) -> None:
+        values = record_fields(row)
+        time_ms = record_slice_ms(values, self.shape.time_field)
+        value = self._field(values, self.shape.value_field)
+        if time_ms is None or not _is_number(value):
+            self.skipped += 1
+            return
+        self.rows_in += 1
+        key = tuple(str(self._field(values, name)) for name in self.shape.group_fields)
+        index = min(self.buckets - 1, max(0, (time_ms - self.from_ms) * self.buckets // self.span))
+        self._add(key, index, (time_ms, float(value), row))
+
+    @abstractmethod
+    def _add(self, key: Tuple[str, ...], index: int, point: _Point) -> None:
+        """Fold one point into the state of its series and bucket."""
+
+    @abstractmethod
+    def series(self) -> Dict[Tuple[str, ...], List[_Point]]:
+        """The kept points of every series, in time order."""
+
+
+class MinMaxDownsampler(_Downsampler):
+    """Keep the lowest and highest point of each bucket; memory is O(series x buckets)."""
+
+    def __init__(self, shape: SeriesShape, from_ms: int, to_ms: int, target_points: int):
+        super().__init__(shape, from_ms, to_ms, max(1, target_points // 2))
+        self._state: Dict[Tuple[str, ...], Dict[int, List[_Point]]] = defaultdict(dict)
+
+    def _add(self, key: Tuple[str, ...], index: int, point: _Point) -> None:
+        extremes = self._state[key].get(index)
+        if extremes is None:
+            self._state[key][index] = [point, point]
+            return
+        if point[1] < extremes[0][1]:
+            extremes[0] = point
+        if point[1] > extremes[1][1]:
+            extremes[1] = point
+
+    def series(self) -> Dict[Tuple[str, ...], List[_Point]]:
+        result = {}
+        for key, buckets in self._state.items():
+            points = []
+            for index in sorted(buckets):
+                low, high = buckets[index]
+                points.extend(sorted({id(p): p for p in (low, high)}.values(), key=lambda p: p[0]))
+            result[key] = points
+        return result
+
+
+class LTTBDownsampler(_Downsampler):
+    """Largest-Triangle-Three-Buckets over fixed time buckets.
+
+    Keeps every point until the end (the choice in a bucket depends on the
+    next bucket), but places them without sorting, so it stays linear.
+    """
+
+    def __init__(self, shape: SeriesShape, from_ms: int, to_ms: int, target_points: int):
+        super().__init__(shape, from_ms, to_ms, max(1, target_points - 2))
+        self.target_points = target_points
+        self._state: Dict[Tuple[str, ...], Dict[int, List[_Point]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+
+    def _add(self, key: Tuple[str, ...], index: int, point: _Point) -> None:
+        self._state[key][index].append(point)
+
+    def series(self) -> Dict[Tuple[str, ...], List[_Point]]:
+        result = {}
+        for key, buckets in self._state.items():
+            ordered = [buckets[index] for index in sorted(buckets)]
+            count = sum(len(points) for points in ordered)
+            if count <= self.target_points:
+                result[key] = sorted((p for points in ordered for p in points), key=lambda p: p[0])
+                continue
+            result[key] = _lttb(ordered)
+        return result
+
+
+def _lttb(buckets: List[List[_Point]]) -> List[_Point]:
+    first = min(buckets[0], key=lambda p: p[0])
+    last = max(buckets[-1], key=lambda p: p[0])
+    selected = [first]
+    for i, points in enumerate(buckets):
+        candidates = [p for p in points if p is not first and p is not last]
+        if not candidates:
+            continue
+        following = buckets[i + 1] if i + 1 < len(buckets) else [last]
+        next_t = sum(p[0] for p in following) / len(following)
+        next_v = sum(p[1] for p in following) / len(following)
+        prev_t, prev_v = selected[-1][0], selected[-1][1]
+        # The point spanning the largest triangle with its neighbours keeps the shape
+        selected.append(max(
+            candidates,
+            key=lambda p: abs((prev_t - next_t) * (p[1] - prev_v) - (prev_t - p[0]) * (next_v - prev_v))
+        ))
+    selected.append(last)
+    return selected
+
+
+class DownsampledResult(BaseModel):
+    """A time-series result reduced to a target number of points per series."""
+    job_id: str
+    records: List[Dict[str, Any]]
+    fields: List[Dict[str, Any]]
+    shape: Optional[SeriesShape] = None
+    method: str
+    series: int = 0
+    input_rows: int = 0
+    output_rows: int = 0
+    skipped_rows: int = 0
+    # Rows the job produced; more than were read if max_rows cut the scan short
+    total_rows: int = 0
+    truncated_by_deadline: bool = False
+
+    @property
+    def reduction(self) -> float:
+        return 1 - self.output_rows / self.input_rows if self.input_rows else 0.0
+
+
+async def downsample_query(
+    client: SumoLogicClient,
+    query: str,
+    from_time: str = "-1h",
+    to_time: str = "now",
+    target_points: int = 200,
+    method: str = "minmax",
+    max_rows: int = MAX_DOWNSAMPLE_ROWS,
+    page_size: int = PAGE_SIZE
+) -> DownsampledResult:
+    """Run a timeslice query and downsample every series as its pages arrive.
+
+    Rows are placed as they are decoded, so no page is held whole. With
+    ``minmax`` only the per-bucket extremes are held; ``lttb`` holds the
+    points of each series until the last page.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'; use one of {', '.join(DOWNSAMPLE_METHODS)}")
+    from_ms = parse_epoch_ms(client._parse_time(from_time))
+    to_ms = parse_epoch_ms(client._parse_time(to_time))
+    if from_ms is None or to_ms is None or from_ms >= to_ms:
+        raise ValueError(f"Cannot downsample the window '{from_time}' to '{to_time}'")
+    spec = parse_timeslice_query(query)
+    sampler_class = MinMaxDownsampler if method == "minmax" else LTTBDownsampler
+
+    async with client.job_slot():
+        job = await client.create_search_job(query, from_time, to_time)
+        try:
+            completed = await client.wait_for_job_completion(job.id)
+            total = completed.record_count or 0
+            deadline = current_deadline.get()
+            truncated = completed.truncated_by_deadline
+
+            sampler: Optional[_Downsampler] = None
+            columns: List[Dict[str, Any]] = []
+            offset = 0
+            page_seconds: Optional[float] = None
+            while offset < min(total, max_rows):
+                if deadline is not None and not deadline.prefetch_depth(page_seconds, 1):
+                    truncated = True
+                    read = sampler.rows_in + sampler.skipped if sampler is not None else 0
+                    deadline.truncate(f"downsampling after {read} of {total} rows")
+                    break
+                fetch_started = time.monotonic()
+                try:
+                    async with client.stream_result_page(
+                        job.id, "records", offset, min(page_size, max_rows - offset)
+                    ) as page:
+                        async for row in page:
+                            if sampler is None:
+                                columns = page.fields
+                                shape = detect_shape(columns, row, spec.alias if spec else None)
+                                if shape is None:
+                                    raise ValueError(
+                                        "Results are not time-series shaped: downsampling needs a "
+                                        "_timeslice column and a numeric value column"
+                                    )
+                                sampler = sampler_class(shape, from_ms, to_ms, target_points)
+                            sampler.add(row)
+                except httpx.TimeoutException:
+                    if deadline is None:
+                        raise
+                    truncated = True
+                    read = sampler.rows_in + sampler.skipped if sampler is not None else 0
+                    deadline.truncate(f"downsampling after {read} of {total} rows")
+                    break
+                page_seconds = time.monotonic() - fetch_started
+                if not page.rows:
+                    break
+                offset += page.rows
+        finally:
+            await client.delete_search_job(job.id)
+
+    if sampler is None:
+        return DownsampledResult(
+            job_id=job.id, records=[], fields=columns, method=method,
+            total_rows=total, truncated_by_deadline=truncated
+        )
+
+    series = sampler.series()
+    records = [row for points in series.values() for _, _, row in points]
+    return DownsampledResult(
+        job_id=job.id,
+        records=records,
+        fields=columns,
+        shape=sampler.shape,
+        method=method,
+        series=len(series),
+        input_rows=sampler.rows_in,
+        output_rows=len(records),
+        skipped_rows=sampler.skipped,
+        total_rows=total,
+        truncated_by_deadline=truncated
+    )
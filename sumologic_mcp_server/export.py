@@ -0,0 +1,233 @@
+"""Stream all results of a search job to a local file instead of the response."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+import httpx
+
+from .client import SearchResult, SumoLogicClient, record_fields
+from .deadline import current_deadline
+from .memory_budget import current_call_memory
+
+EXPORT_FORMATS = ("ndjson", "parquet", "arrow")
+_EXTENSIONS = {"ndjson": ".ndjson", "parquet": ".parquet", "arrow": ".arrow"}
+PAGE_SIZE = 10000
+
+
+class ExportResult(BaseModel):
+    """Summary of a finished export."""
+    path: str
+    format: str
+    row_count: int
+    pages: int
+    fields: List[Dict[str, str]]
+    job_id: str
+    job_seconds: float
+    fetch_seconds: float
+    # The call's deadline stopped the search or the download early
+    truncated_by_deadline: bool = False
+
+
+def resolve_export_path(
+    export_dir: str, path: Optional[str], fmt: str, job_id: Optional[str] = None
+) -> Path:
+    """Resolve the output path, refusing anything outside ``export_dir``.
+
+    Without ``path`` the file is named after ``job_id``.
+    """
+    base = Path(export_dir).resolve()
+    target = (base / (path or f"export-{job_id}{_EXTENSIONS[fmt]}")).resolve()
+    if base != target and base not in target.parents:
+        raise ValueError(f"Export path must be inside {base}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return target
+
+
+class _NdjsonWriter:
+    def __init__(self, path: Path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._file.writelines(json.dumps(row, default=str) + "\n" for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ArrowWriter:
+    """Columnar writer for Parquet or Arrow IPC; needs the optional pyarrow package."""
+
+    def __init__(self, path: Path, fields: List[Dict[str, str]], fmt: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError(
+                f"{fmt} export requires pyarrow: pip install 'sumologic-mcp-server[export]'"
+            )
+
+        types = {
+            "int": pa.int64(), "long": pa.int64(), "double": pa.float64(),
+            "float": pa.float64(), "boolean": pa.bool_(),
+        }
+        self._pa = pa
+        self._schema = pa.schema([
+            (field.get("name", ""), types.get(field.get("fieldType", ""), pa.string()))
+            for field in fields
+        ])
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(str(path), self._schema)
+        else:
+            self._writer = pa.ipc.new_file(str(path), self._schema)
+
+    def _convert(self, value: Any, arrow_type: Any) -> Any:
+        # Sumo returns every value as a string
+        if value is None or value == "":
+            return None
+        try:
+            if self._pa.types.is_integer(arrow_type):
+                return int(float(value))
+            if self._pa.types.is_floating(arrow_type):
+                return float(value)
+            if self._pa.types.is_boolean(arrow_type):
+                return str(value).lower() == "true"
+        except (TypeError, ValueError):
+            return None
+        return str(value)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        columns = {
+            field.name: [self._convert(row.get(field.name), field.type) for row in rows]
+            for field in self._schema
+        }
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+async def export_query(
+    client: SumoLogicClient,
+    query: str,
+    export_dir: str,
+    from_time: str = "-1h",
+    to_time: str = "now",
+    path: Optional[str] = None,
+    fmt: str = "ndjson",
+    concurrency: int = 4,
+    page_size: int = PAGE_SIZE
+) -> ExportResult:
+    """Run a query and write every result page to a file.
+
+    Pages are downloaded ``concurrency`` at a time and written in order as
+    soon as the oldest one arrives, so about ``concurrency`` pages are held
+    in memory regardless of the result size. Under a call deadline, no
+    page is started once it would no longer arrive in time, and the rows
+    already written are kept.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of {', '.join(EXPORT_FORMATS)}")
+
+    # A bad path is refused before any search runs
+    target = resolve_export_path(export_dir, path, fmt) if path else None
+
+    started = time.monotonic()
+    async with client.job_slot():
+        job = await client.create_search_job(query, from_time, to_time)
+        try:
+            completed = await client.wait_for_job_completion(job.id)
+            job_seconds = time.monotonic() - started
+
+            # Aggregate queries produce records; everything else produces messages
+            if completed.record_count:
+                total, fetch_page = completed.record_count, client.get_search_job_records
+            else:
+                total, fetch_page = completed.message_count or 0, client.get_search_job_messages
+
+            deadline = current_deadline.get()
+            page_seconds: Optional[float] = None
+
+            async def timed_fetch(offset: int) -> SearchResult:
+                nonlocal page_seconds
+                fetch_started = time.monotonic()
+                result = await fetch_page(job.id, offset=offset, limit=page_size)
+                elapsed = time.monotonic() - fetch_started
+                page_seconds = elapsed if page_seconds is None else 0.7 * page_seconds + 0.3 * elapsed
+                return result
+
+            # Timed too, so the prefetch window is sized before it is first filled
+            first = await timed_fetch(0)
+            if target is None:
+                target = resolve_export_path(export_dir, None, fmt, job.id)
+            writer = (
+                _NdjsonWriter(target) if fmt == "ndjson"
+                else _ArrowWriter(target, first.fields, fmt)
+            )
+
+            row_count = 0
+            pages = 0
+            memory = current_call_memory.get()
+            next_offset = page_size
+            cut_short = False
+
+            in_flight: List["asyncio.Task[SearchResult]"] = []
+            page: Optional[SearchResult] = first
+            try:
+                while page is not None:
+                    # Keep the download window full while the oldest page is written,
+                    # narrowing it as the deadline approaches
+                    depth = concurrency
+                    if deadline is not None:
+                        # One page at a time until a page has been timed
+                        depth = deadline.prefetch_depth(page_seconds, concurrency)
+                        if page_seconds is None:
+                            depth = min(depth, 1)
+                    while len(in_flight) < depth and next_offset < total:
+                        in_flight.append(asyncio.create_task(timed_fetch(next_offset)))
+                        next_offset += page_size
+                    rows = [record_fields(row) for row in page.records]
+                    await asyncio.to_thread(writer.write, rows)
+                    row_count += len(rows)
+                    pages += 1
+                    if memory is not None:
+                        # Written pages no longer count against the memory budget
+                        memory.release(page.size_bytes)
+                    try:
+                        page = await in_flight.pop(0) if in_flight else None
+                    except httpx.TimeoutException:
+                        if deadline is None:
+                            raise
+                        # Pages must be written in order; drop everything after the gap
+                        for task in in_flight:
+                            task.cancel()
+                        in_flight.clear()
+                        cut_short = True
+                        page = None
+            except BaseException:
+                for task in in_flight:
+                    task.cancel()
+                raise
+            finally:
+                writer.close()
+            if deadline is not None and (cut_short or next_offset < total):
+                deadline.truncate(f"export after {row_count} of {total} rows")
+            truncated = completed.truncated_by_deadline or cut_short or next_offset < total
+        finally:
+            await client.delete_search_job(job.id)
+
+    return ExportResult(
+        path=str(target),
+        format=fmt,
+        row_count=row_count,
+        pages=pages,
+        fields=first.fields,
+        job_id=job.id,
+        job_seconds=round(job_seconds, 3),
+        fetch_seconds=round(time.monotonic() - started - job_seconds, 3),
+        truncated_by_deadline=truncated
+    )
@@ -0,0 +1,282 @@
+"""Bounded-memory per-field statistics over a stream of result rows."""
+
+import asyncio
+import hashlib
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from .client import SumoLogicClient, record_fields
+from .deadline import current_deadline
+
+PAGE_SIZE = 10000
+MAX_SUMMARY_ROWS = 100_000
+MAX_FIELDS = 200
+# Rows folded per trip to a worker thread, so the event loop keeps serving other calls
+FOLD_CHUNK_ROWS = 1000
+_MISSING = (None, "", "null")
+
+
+class HyperLogLog:
+    """Approximate distinct count in ``2 ** precision`` bytes (~1.6% error at 12)."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add(self, value: str) -> None:
+        digest = hashlib.blake2b(value.encode("utf-8", "replace"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        raw = alpha * self.size ** 2 / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return round(self.size * math.log(self.size / zeros))
+        return round(raw)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in ``capacity`` counters (Metwally et al.).
+
+    Counts are overestimates by at most the reported error; any value
+    occurring more than ``n / capacity`` times is guaranteed to be tracked.
+    Values are kept in buckets by count (the stream-summary structure), so
+    finding the smallest counter to evict is O(1).
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # count -> values with that count (dicts as insertion-ordered sets)
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._min = 0
+
+    def _unlink(self, value: str, count: int, next_count: int) -> None:
+        """Take ``value`` out of bucket ``count``; ``next_count`` is where it goes next."""
+        bucket = self._buckets[count]
+        del bucket[value]
+        if not bucket:
+            del self._buckets[count]
+            if self._min == count:
+                self._min = next_count
+
+    def add(self, value: str) -> None:
+        count = self.counts.get(value)
+        if count is not None:
+            self._unlink(value, count, count + 1)
+            count += 1
+        elif len(self.counts) < self.capacity:
+            count = 1
+            self.errors[value] = 0
+            self._min = 1
+        else:
+            # Evict a smallest counter and inherit its count as error
+            floor = self._min
+            victim = next(iter(self._buckets[floor]))
+            self._unlink(victim, floor, floor + 1)
+            del self.counts[victim]
+            del self.errors[victim]
+            count = floor + 1
+            self.errors[value] = floor
+        self.counts[value] = count
+        self._buckets.setdefault(count, {})[value] = None
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return [(value, count, self.errors[value]) for value, count in ranked[:k]]
+
+
+class FieldSummary(BaseModel):
+    """Distribution of one field."""
+    name: str
+    present: int
+    null_rate: float
+    distinct_estimate: int
+    numeric: bool
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    top_values: List[Dict[str, Any]]
+
+
+class _FieldAccumulator:
+    def __init__(self, name: str, top_k_capacity: int):
+        self.name = name
+        self.present = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.distinct = HyperLogLog()
+        self.heavy = SpaceSaving(top_k_capacity)
+
+    def add(self, value: Any) -> None:
+        self.present += 1
+        text = value if isinstance(value, str) else str(value)
+        self.distinct.add(text)
+        self.heavy.add(text)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return
+        if math.isnan(number):
+            return
+        self.numeric += 1
+        self.total += number
+        self.min = number if self.min is None else min(self.min, number)
+        self.max = number if self.max is None else max(self.max, number)
+
+    def summary(self, rows: int, top_k: int) -> FieldSummary:
+        numeric = self.present > 0 and self.numeric == self.present
+        return FieldSummary(
+            name=self.name,
+            present=self.present,
+            null_rate=round(1 - self.present / rows, 4) if rows else 0.0,
+            distinct_estimate=min(self.distinct.estimate(), self.present),
+            numeric=numeric,
+            min=self.min if numeric else None,
+            max=self.max if numeric else None,
+            mean=round(self.total / self.numeric, 4) if numeric else None,
+            top_values=[
+                {"value": value, "count": count, "error": error}
+                for value, count, error in self.heavy.top(top_k)
+            ]
+        )
+
+
+class FieldStats:
+    """Single-pass field statistics whose memory does not grow with row count.
+
+    Each field holds one HyperLogLog and one space-saving sketch; fields
+    beyond ``max_fields`` are counted but not profiled.
+    """
+
+    def __init__(self, top_k: int = 5, max_fields: int = MAX_FIELDS):
+        self.top_k = top_k
+        self.max_fields = max_fields
+        self.rows = 0
+        self.unprofiled: set = set()
+        self._fields: Dict[str, _FieldAccumulator] = {}
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.rows += 1
+        for name, value in record_fields(row).items():
+            if value in _MISSING:
+                continue
+            field = self._fields.get(name)
+            if field is None:
+                if len(self._fields) >= self.max_fields:
+                    self.unprofiled.add(name)
+                    continue
+                field = self._fields[name] = _FieldAccumulator(name, self.top_k * 8)
+            field.add(value)
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def summaries(self) -> List[FieldSummary]:
+        return [field.summary(self.rows, self.top_k) for field in self._fields.values()]
+
+
+class QuerySummary(BaseModel):
+    """Field statistics for every row a query produced (up to ``max_rows``)."""
+    job_id: str
+    total_count: int
+    rows_scanned: int
+    fields: List[FieldSummary]
+    unprofiled_fields: List[str]
+    job_seconds: float
+    # The call's deadline stopped the search or the scan early
+    truncated_by_deadline: bool = False
+
+
+async def summarize_query(
+    client: SumoLogicClient,
+    query: str,
+    from_time: str = "-1h",
+    to_time: str = "now",
+    max_rows: int = MAX_SUMMARY_ROWS,
+    top_k: int = 5,
+    page_size: int = PAGE_SIZE
+) -> QuerySummary:
+    """Run a query and fold its result pages into field statistics.
+
+    Rows are folded in chunks of ``FOLD_CHUNK_ROWS`` as they are decoded
+    from each page's body, so no page is ever held whole; the folding runs
+    in a worker thread so other calls are not stalled behind it.
+    Under a call deadline, scanning stops before a page that would not
+    arrive in time and the rows counted so far are summarized.
+    """
+    stats = FieldStats(top_k=top_k)
+    started = time.monotonic()
+
+    async with client.job_slot():
+        job = await client.create_search_job(query, from_time, to_time)
+        try:
+            completed = await client.wait_for_job_completion(job.id)
+            job_seconds = time.monotonic() - started
+
+            # Aggregate queries produce records; everything else produces messages
+            if completed.record_count:
+                total, kind = completed.record_count, "records"
+            else:
+                total, kind = completed.message_count or 0, "messages"
+
+            offset = 0
+            deadline = current_deadline.get()
+            truncated = completed.truncated_by_deadline
+            page_seconds: Optional[float] = None
+            while offset < min(total, max_rows):
+                if deadline is not None and not deadline.prefetch_depth(page_seconds, 1):
+                    truncated = True
+                    deadline.truncate(f"summary scan after {stats.rows} of {total} rows")
+                    break
+                fetch_started = time.monotonic()
+                try:
+                    async with client.stream_result_page(
+                        job.id, kind, offset, min(page_size, max_rows - offset)
+                    ) as page:
+                        chunk: List[Dict[str, Any]] = []
+                        async for row in page:
+                            chunk.append(row)
+                            if len(chunk) >= FOLD_CHUNK_ROWS:
+                                await asyncio.to_thread(stats.extend, chunk)
+                                chunk = []
+                        if chunk:
+                            await asyncio.to_thread(stats.extend, chunk)
+                except httpx.TimeoutException:
+                    if deadline is None:
+                        raise
+                    truncated = True
+                    deadline.truncate(f"summary scan after {stats.rows} of {total} rows")
+                    break
+                page_seconds = time.monotonic() - fetch_started
+                if not page.rows:
+                    break
+                offset += page.rows
+        finally:
+            await client.delete_search_job(job.id)
+
+    return QuerySummary(
+        job_id=job.id,
+        total_count=total,
+        rows_scanned=stats.rows,
+        fields=stats.summaries(),
+        unprofiled_fields=sorted(stats.unprofiled),
+        job_seconds=round(job_seconds, 3),
+        truncated_by_deadline=truncated
+    )
@@ -0,0 +1,157 @@
+"""Ingest freshness of every source from a single aggregate search.
+
+Checking sources one by one costs a search job each. Instead the source
+inventory (already cached by ``get_sources``) says what should be sending
+data, and one ``max(_receipttime) by _sourceCategory, _collector`` search
+says what did. Sources of the inventory missing from the result sent
+nothing in the window.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .client import SumoLogicClient, record_fields
+from .sharding import MAX_SHARDS, execute_sharded, plan_sharded_query
+
+# Above this many categories the search is scoped by a wildcard instead of an OR list
+MAX_SCOPED_CATEGORIES = 50
+MAX_FRESHNESS_ROWS = 10000
+DEFAULT_STALE_AFTER_SECONDS = 900
+
+
+class SourceFreshness(BaseModel):
+    """When a source category on a collector last delivered data."""
+    category: str
+    collector: str
+    status: str  # "ok", "stale" or "silent"
+    last_receipt_ms: Optional[int] = None
+    last_message_ms: Optional[int] = None
+    lag_seconds: Optional[float] = None
+    messages: int = 0
+    in_inventory: bool = True
+
+
+class FreshnessReport(BaseModel):
+    """Freshness of every source matched, worst first."""
+    query: str
+    time_range: str
+    checked_at_ms: int
+    stale_after_seconds: float
+    inventory_sources: int
+    jobs: int
+    sources: List[SourceFreshness]
+    truncated_by_deadline: bool = False
+
+    def count(self, status: str) -> int:
+        return sum(1 for source in self.sources if source.status == status)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def freshness_query(categories: List[str], pattern: str = "") -> str:
+    """The aggregate search covering ``categories``, or a wildcard scope if there are many."""
+    if categories and len(categories) <= MAX_SCOPED_CATEGORIES:
+        scope = " OR ".join(f"_sourceCategory={_quote(c)}" for c in sorted(categories))
+        scope = f"({scope})" if len(categories) > 1 else scope
+    elif pattern:
+        # Quoted, so spaces or pipes in the pattern cannot add terms or stages
+        scope = f"_sourceCategory={_quote(f'*{pattern}*')}"
+    else:
+        scope = "_sourceCategory=*"
+    return (
+        f"{scope} | max(_receipttime) as last_receipt, max(_messagetime) as last_message, "
+        "count as messages by _sourceCategory, _collector"
+    )
+
+
+def _epoch(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+async def source_inventory(
+    client: SumoLogicClient,
+    pattern: str = ""
+) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """The (category, collector) pairs of every source whose category contains ``pattern``.
+
+    Keys are lowercased for matching against search results, values keep
+    the inventory's spelling.
+    """
+    inventory: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for source in await client.get_sources():
+        category = source.get("category", "")
+        if not category or (pattern and pattern.lower() not in category.lower()):
+            continue
+        collector = source.get("collector_name", "")
+        inventory.setdefault((category.lower(), collector.lower()), (category, collector))
+    return inventory
+
+
+def inventory_query(inventory: Dict[Tuple[str, str], Tuple[str, str]], pattern: str = "") -> str:
+    """The freshness search for the categories of ``inventory``."""
+    return freshness_query(sorted({category for category, _ in inventory.values()}), pattern)
+
+
+async def check_freshness(
+    client: SumoLogicClient,
+    inventory: Dict[Tuple[str, str], Tuple[str, str]],
+    pattern: str = "",
+    time_range: str = "-1h",
+    stale_after: float = DEFAULT_STALE_AFTER_SECONDS,
+    shards: int = 1
+) -> FreshnessReport:
+    """Report the ingest lag of every source in ``inventory`` and any other the search finds."""
+    query = inventory_query(inventory, pattern)
+    plan = plan_sharded_query(query)
+    if plan is None:
+        raise ValueError(f"Freshness search is not a shardable aggregate: {query}")
+    # One shard is simply one job; more split the window and merge the maxima exactly
+    sharded = await execute_sharded(
+        client, plan, time_range, "now", max(1, min(shards, MAX_SHARDS)), MAX_FRESHNESS_ROWS
+    )
+    now_ms = int(time.time() * 1000)
+
+    sources = []
+    seen = set()
+    for record in sharded.result.records:
+        values = record_fields(record)
+        category = str(values.get("_sourcecategory") or "")
+        collector = str(values.get("_collector") or "")
+        key = (category.lower(), collector.lower())
+        seen.add(key)
+        last_receipt = _epoch(values.get("last_receipt"))
+        lag = (now_ms - last_receipt) / 1000 if last_receipt is not None else None
+        sources.append(SourceFreshness(
+            category=category,
+            collector=collector,
+            status="stale" if lag is None or lag > stale_after else "ok",
+            last_receipt_ms=last_receipt,
+            last_message_ms=_epoch(values.get("last_message")),
+            lag_seconds=round(lag, 1) if lag is not None else None,
+            messages=_epoch(values.get("messages")) or 0,
+            in_inventory=key in inventory
+        ))
+
+    for key, (category, collector) in inventory.items():
+        if key not in seen:
+            sources.append(SourceFreshness(category=category, collector=collector, status="silent"))
+
+    order = {"silent": 0, "stale": 1, "ok": 2}
+    sources.sort(key=lambda s: (order[s.status], -(s.lag_seconds or 0), s.category, s.collector))
+    return FreshnessReport(
+        query=query,
+        time_range=time_range,
+        checked_at_ms=now_ms,
+        stale_after_seconds=stale_after,
+        inventory_sources=len(inventory),
+        jobs=sharded.shards,
+        sources=sources,
+        truncated_by_deadline=sharded.result.truncated_by_deadline
+    )
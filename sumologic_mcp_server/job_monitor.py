@@ -0,0 +1,270 @@
+"""One polling loop for the status of every search job in flight.
+
+Instead of each waiting coroutine polling its own job, waiters register
+with the monitor and await a future. The monitor polls each job on a
+single schedule shared by all its waiters: quickly at first, then around
+the time similar jobs have taken to finish, sooner for interactive calls
+and calls short of time. Polls are spaced to stay under a request rate,
+and when several are due the most urgent goes first.
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+from .deadline import Deadline, current_deadline
+from .scheduler import BACKGROUND, INTERACTIVE, NORMAL, PRIORITIES
+
+DONE_STATES = ("DONE GATHERING RESULTS", "CANCELLED", "FORCE PAUSED")
+FIRST_POLL_SECONDS = 0.25
+# Interactive jobs are polled twice as often, background ones half as often
+PRIORITY_INTERVAL_FACTOR = {INTERACTIVE: 0.5, NORMAL: 1.0, BACKGROUND: 2.0}
+# Weight of the newest completion in the expected-duration average
+EXPECTED_SMOOTHING = 0.3
+
+
+class JobFailed(Exception):
+    """Raised to the waiters of a search job that Sumo reports as failed."""
+
+
+class _Waiter:
+    def __init__(
+        self,
+        future: "asyncio.Future",
+        priority: str,
+        poll_interval: float,
+        min_messages: Optional[int],
+        deadline: Optional[Deadline]
+    ):
+        self.future = future
+        self.priority = priority
+        self.poll_interval = poll_interval
+        self.min_messages = min_messages
+        self.deadline = deadline
+        # Polls run in the context of a waiter, so traces show its call, but
+        # without its deadline: a poll serves every waiter of the job
+        self.context = contextvars.copy_context()
+        self.context.run(current_deadline.set, None)
+
+    def satisfied_by(self, job: Any) -> bool:
+        return job.state in DONE_STATES or bool(
+            self.min_messages
+            and job.state == "GATHERING RESULTS"
+            and (job.message_count or 0) >= self.min_messages
+        )
+
+
+class _WatchedJob:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started = time.monotonic()
+        self.next_poll = self.started
+        self.last_poll_at = self.started
+        self.polls = 0
+        self.polling = False
+        self.last: Optional[Any] = None
+        self.waiters: List[_Waiter] = []
+
+    @property
+    def priority(self) -> int:
+        return min(PRIORITIES.index(w.priority) for w in self.waiters)
+
+
+class JobMonitorStats(BaseModel):
+    """Point-in-time view of the job monitor."""
+    jobs: int
+    waiters: int
+    polls: int
+    completed: int
+    polls_per_job: float
+    expected_seconds: Optional[float]
+
+
+class JobMonitor:
+    """Poll every watched job from one task and resolve its waiters' futures.
+
+    ``fetch_status`` returns a job with ``state`` and ``message_count``.
+    The loop task only runs while jobs are watched.
+    """
+
+    def __init__(
+        self,
+        fetch_status: Callable[[str], Awaitable[Any]],
+        polls_per_second: float = 4.0
+    ):
+        self.fetch_status = fetch_status
+        self.min_spacing = 1.0 / polls_per_second if polls_per_second > 0 else 0.0
+        self.expected_seconds: Optional[float] = None
+        self.polls = 0
+        self.completed = 0
+        self._jobs: Dict[str, _WatchedJob] = {}
+        self._changed = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._polls_in_flight: Set["asyncio.Task[None]"] = set()
+        self._last_poll = 0.0
+
+    def watch(
+        self,
+        job_id: str,
+        priority: str = NORMAL,
+        poll_interval: float = 2.0,
+        min_messages: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> "asyncio.Future":
+        """Future for the job's status once it is done (or has ``min_messages``).
+
+        Cancelling the future stops watching for this waiter; a job nobody
+        waits on is no longer polled.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The previous loop is gone (e.g. between test cases); start afresh
+            self._loop = loop
+            self._jobs.clear()
+            self._polls_in_flight.clear()
+            self._changed = asyncio.Event()
+            self._task = None
+
+        future = loop.create_future()
+        waiter = _Waiter(future, priority, poll_interval, min_messages, deadline)
+        watched = self._jobs.get(job_id)
+        if watched is None:
+            watched = self._jobs[job_id] = _WatchedJob(job_id)
+            watched.next_poll = self._next_poll(watched, [waiter])
+        elif watched.last is not None and waiter.satisfied_by(watched.last):
+            future.set_result(watched.last)
+            return future
+        else:
+            # A new waiter may want an earlier poll than already planned
+            watched.next_poll = min(watched.next_poll, self._next_poll(watched, [waiter]))
+        watched.waiters.append(waiter)
+        future.add_done_callback(lambda _: self._forget(job_id, waiter))
+
+        if self._task is None or self._task.done():
+            # Started in an empty context so it never inherits one call's deadline
+            self._task = contextvars.Context().run(loop.create_task, self._run())
+        self._changed.set()
+        return future
+
+    def latest(self, job_id: str) -> Optional[Any]:
+        """The most recent status polled for a watched job."""
+        watched = self._jobs.get(job_id)
+        return watched.last if watched is not None else None
+
+    def stats(self) -> JobMonitorStats:
+        return JobMonitorStats(
+            jobs=len(self._jobs),
+            waiters=sum(len(w.waiters) for w in self._jobs.values()),
+            polls=self.polls,
+            completed=self.completed,
+            polls_per_job=round(self.polls / self.completed, 2) if self.completed else 0.0,
+            expected_seconds=(
+                round(self.expected_seconds, 3) if self.expected_seconds is not None else None
+            )
+        )
+
+    def _forget(self, job_id: str, waiter: _Waiter) -> None:
+        watched = self._jobs.get(job_id)
+        if watched is None or waiter not in watched.waiters:
+            return
+        watched.waiters.remove(waiter)
+        if not watched.waiters and not watched.polling:
+            del self._jobs[job_id]
+        self._changed.set()
+
+    def _next_poll(self, watched: _WatchedJob, waiters: List[_Waiter]) -> float:
+        """When to poll ``watched`` next on behalf of ``waiters``."""
+        now = time.monotonic()
+        elapsed = now - watched.started
+        base = min(w.poll_interval * PRIORITY_INTERVAL_FACTOR.get(w.priority, 1.0) for w in waiters)
+        if watched.polls == 0:
+            # Until jobs have been timed, look once straight away, as a lone waiter would
+            interval = 0.0
+        else:
+            # Back off from quick early polls, so short jobs are seen finishing early
+            interval = min(base, FIRST_POLL_SECONDS * 2 ** (watched.polls - 1))
+        if self.expected_seconds is not None and elapsed < self.expected_seconds:
+            # Skip polls that would only find the job still running
+            interval = min(base, max(interval, self.expected_seconds - elapsed))
+        for waiter in waiters:
+            if waiter.deadline is not None:
+                interval = min(interval, waiter.deadline.poll_interval(interval))
+        return now + interval
+
+    async def _run(self) -> None:
+        while self._jobs:
+            self._changed.clear()
+            now = time.monotonic()
+            idle = [w for w in self._jobs.values() if not w.polling]
+            due = [w for w in idle if w.next_poll <= now]
+            if due:
+                wait = self._last_poll + self.min_spacing - now
+                if wait <= 0:
+                    watched = min(due, key=lambda w: (w.priority, w.next_poll))
+                    self._last_poll = now
+                    self._start_poll(watched)
+                    continue
+            else:
+                wait = min((w.next_poll for w in idle), default=now + 60.0) - now
+            try:
+                await asyncio.wait_for(self._changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        self._task = None
+
+    def _start_poll(self, watched: _WatchedJob) -> None:
+        watched.polling = True
+        urgent = min(watched.waiters, key=lambda w: PRIORITIES.index(w.priority))
+        task = urgent.context.run(asyncio.get_running_loop().create_task, self._poll(watched))
+        self._polls_in_flight.add(task)
+        task.add_done_callback(self._polls_in_flight.discard)
+
+    async def _poll(self, watched: _WatchedJob) -> None:
+        polled_at = time.monotonic()
+        try:
+            job = await self.fetch_status(watched.job_id)
+        except Exception as e:
+            watched.polling = False
+            self._jobs.pop(watched.job_id, None)
+            for waiter in list(watched.waiters):
+                if not waiter.future.done():
+                    waiter.future.set_exception(e)
+            self._changed.set()
+            return
+
+        self.polls += 1
+        watched.polls += 1
+        watched.last = job
+        watched.polling = False
+        if job.state in DONE_STATES or job.state == "FAILED":
+            self.completed += 1
+            # The job finished some time since the previous poll; take the midpoint,
+            # unless no poll saw it running, which only bounds its duration
+            finished = (watched.last_poll_at + polled_at) / 2 if watched.polls > 1 else polled_at
+            self._observe(finished - watched.started)
+        watched.last_poll_at = polled_at
+        for waiter in list(watched.waiters):
+            if waiter.future.done():
+                continue
+            if job.state == "FAILED":
+                waiter.future.set_exception(JobFailed(f"Search job {watched.job_id} failed"))
+            elif waiter.satisfied_by(job):
+                waiter.future.set_result(job)
+
+        # Resolved waiters have been forgotten by their callbacks, but only on the next loop turn
+        waiting = [w for w in watched.waiters if not w.future.done()]
+        if not waiting or job.state in DONE_STATES or job.state == "FAILED":
+            self._jobs.pop(watched.job_id, None)
+        else:
+            watched.next_poll = self._next_poll(watched, waiting)
+        self._changed.set()
+
+    def _observe(self, seconds: float) -> None:
+        if self.expected_seconds is None:
+            self.expected_seconds = seconds
+        else:
+            self.expected_seconds += EXPECTED_SMOOTHING * (seconds - self.expected_seconds)
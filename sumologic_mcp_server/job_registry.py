@@ -0,0 +1,230 @@
+"""Persistent registry of search jobs, so a restarted server can reattach to them.
+
+Sumo Logic keeps a search job alive for a few minutes after it was last
+polled. Recording every job this server starts in a SQLite file lets a
+new process (after an editor reload, crash or reconnect) pick up the
+same job for the same query and window instead of starting it again.
+"""
+
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from .shared_state import create_private_file, default_state_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    job_id TEXT,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_keepalive REAL NOT NULL,
+    owner_pid INTEGER NOT NULL,
+    relative INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_id ON jobs (job_id);
+"""
+
+# A row without a job id is a claim: another process is creating that job
+_CLAIMED = "CLAIMED"
+
+
+class RegisteredJob(BaseModel):
+    """A search job recorded in the registry."""
+    key: str
+    job_id: Optional[str]
+    state: str
+    created_at: float
+    last_keepalive: float
+    owner_pid: int
+
+
+def default_registry_path() -> str:
+    """Per-user registry file: ``$XDG_STATE_HOME/sumologic-mcp/jobs.sqlite``."""
+    return default_state_path("jobs.sqlite")
+
+
+def is_relative_window(from_time: str, to_time: str) -> bool:
+    """Whether the window moves with the clock (e.g. ``-1h`` to ``now``)."""
+    return from_time.startswith("-") or to_time == "now"
+
+
+class JobRegistry:
+    """Cross-process record of live search jobs keyed by query and window.
+
+    A job is reattached while it was polled within ``keepalive_seconds``
+    (Sumo cancels jobs left unpolled for about five minutes). Jobs for
+    relative windows are only reused within ``relative_max_age`` of their
+    creation, since "-1h" later means a different hour, and never by the
+    registry that created them: within one process a repeated relative
+    search runs afresh, and only a restarted or second process reattaches,
+    which ``reused_age`` reports. Creating a job is claimed first, so
+    concurrent processes asking for the same search wait for one job
+    instead of each starting their own.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keepalive_seconds: int = 240,
+        relative_max_age: int = 120,
+        claim_timeout: int = 30
+    ):
+        self.path = path
+        self.keepalive_seconds = keepalive_seconds
+        self.relative_max_age = relative_max_age
+        self.claim_timeout = claim_timeout
+        self.reattached = 0
+        # Jobs this registry created, and keys it is creating jobs for
+        self._own: Set[str] = set()
+        self._claiming: Set[str] = set()
+        # Creation time of relative-window jobs reattached from another process
+        self._reused: Dict[str, float] = {}
+
+        create_private_file(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run statements under an exclusive write lock across processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _attach_or_claim(
+        self, key: str, relative: bool
+    ) -> Tuple[str, Optional[str], Optional[float]]:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE last_keepalive <= ?", (now - self.keepalive_seconds,)
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE relative = 1 AND created_at <= ?",
+                (now - self.relative_max_age,)
+            )
+            row = conn.execute(
+                "SELECT job_id, state, created_at FROM jobs WHERE key = ?", (key,)
+            ).fetchone()
+            # A relative window searched again by the same process means a later window
+            ours = relative and (row is not None) and (row[0] in self._own or key in self._claiming)
+            if row is not None and row[0] is not None and not ours:
+                return "attach", row[0], row[2]
+            if (
+                row is not None and row[1] == _CLAIMED and not ours
+                and row[2] > now - self.claim_timeout
+            ):
+                return "wait", None, None
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs "
+                "(key, job_id, state, created_at, last_keepalive, owner_pid, relative) "
+                "VALUES (?, NULL, ?, ?, ?, ?, ?)",
+                (key, _CLAIMED, now, now, os.getpid(), int(relative))
+            )
+        self._claiming.add(key)
+        return "create", None, None
+
+    async def attach_or_claim(
+        self, key: str, relative: bool, poll_interval: float = 0.25
+    ) -> Optional[str]:
+        """Return a live job id for ``key``, or None once the caller has claimed its creation.
+
+        If another process is creating the job right now, wait for its id.
+        """
+        while True:
+            action, job_id, created_at = await asyncio.to_thread(
+                self._attach_or_claim, key, relative
+            )
+            if action == "attach":
+                self.reattached += 1
+                if relative:
+                    self._reused[job_id] = created_at
+                return job_id
+            if action == "create":
+                return None
+            await asyncio.sleep(poll_interval)
+
+    def reused_age(self, job_id: str) -> Optional[float]:
+        """Seconds since another process created ``job_id``, if it was reattached for a relative window."""
+        created_at = self._reused.pop(job_id, None)
+        return time.time() - created_at if created_at is not None else None
+
+    def _register(self, key: str, job_id: str, state: str) -> None:
+        now = time.time()
+        self._own.add(job_id)
+        self._claiming.discard(key)
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET job_id = ?, state = ?, created_at = ?, last_keepalive = ? "
+                "WHERE key = ?",
+                (job_id, state, now, now, key)
+            )
+
+    async def register(self, key: str, job_id: str, state: str = "NOT STARTED") -> None:
+        """Record the job created under a claim."""
+        await asyncio.to_thread(self._register, key, job_id, state)
+
+    def _touch(self, job_id: str, state: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, last_keepalive = ? WHERE job_id = ?",
+                (state, time.time(), job_id)
+            )
+
+    async def touch(self, job_id: str, state: str) -> None:
+        """Note that a job was just polled and is in ``state``."""
+        await asyncio.to_thread(self._touch, job_id, state)
+
+    def _forget(self, job_id: Optional[str], key: Optional[str]) -> None:
+        self._own.discard(job_id)
+        self._claiming.discard(key)
+        with self._transaction() as conn:
+            if job_id is not None:
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            if key is not None:
+                conn.execute("DELETE FROM jobs WHERE key = ? AND job_id IS NULL", (key,))
+
+    async def forget(self, job_id: str) -> None:
+        """Drop a job that was deleted or has died."""
+        await asyncio.to_thread(self._forget, job_id, None)
+
+    async def release_claim(self, key: str) -> None:
+        """Give up a claim whose job could not be created."""
+        await asyncio.to_thread(self._forget, None, key)
+
+    def jobs(self) -> List[RegisteredJob]:
+        """Jobs currently considered alive."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, job_id, state, created_at, last_keepalive, owner_pid FROM jobs "
+                "WHERE job_id IS NOT NULL AND last_keepalive > ? ORDER BY created_at",
+                (time.time() - self.keepalive_seconds,)
+            ).fetchall()
+        return [
+            RegisteredJob(
+                key=key, job_id=job_id, state=state, created_at=created_at,
+                last_keepalive=last_keepalive, owner_pid=owner_pid
+            )
+            for key, job_id, state, created_at, last_keepalive, owner_pid in rows
+        ]
@@ -0,0 +1,184 @@
+"""Incremental parsing of search result pages as their bodies arrive.
+
+A page of 10,000 records is a JSON object whose ``records`` (or
+``messages``) array holds almost all of its bytes. Parsing it with
+``response.json()`` keeps the whole body and the whole object tree alive
+at once. ``ResultPageParser`` is fed the body chunk by chunk and hands
+back each row as soon as it is complete, so only the unparsed tail of the
+last chunk is buffered and a consumer can drop, project or fold each row
+before the next one is decoded.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class ResultPageParser:
+    """Push parser for ``{"fields": [...], "<kind>": [...], "totalCount": n}``.
+
+    Members other than the row array are small and decoded whole; rows are
+    returned from ``feed`` one by one as they complete.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.fields: List[Dict[str, Any]] = []
+        self.total_count = 0
+        self.rows = 0
+        # Other top-level members, e.g. error details
+        self.extra: Dict[str, Any] = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._state == "end"
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add body bytes; return the rows they completed."""
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """Finish the body; return any last rows and fail if it was cut short."""
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b"", final=True)
+        self._pos = 0
+        try:
+            rows = self._parse(final=True)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Result page is incomplete after {self.rows} {self.kind}: {e}")
+        if not self.complete:
+            raise ValueError(f"Result page is incomplete after {self.rows} {self.kind}")
+        return rows
+
+    def _value(self, final: bool) -> Optional[tuple]:
+        """Decode the JSON value at the current position, if it is all buffered."""
+        try:
+            value, end = self._json.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # A number at the very end of the buffer may continue in the next chunk
+        if not final and end == len(self._buffer) and isinstance(value, (int, float)):
+            return None
+        return value, end
+
+    def _expect(self, char: str, expected: str) -> None:
+        if char not in expected:
+            raise ValueError(
+                f"Unexpected {char!r} in result page, expected one of {expected!r}"
+            )
+
+    def _parse(self, final: bool) -> List[Any]:
+        rows = []
+        buffer = self._buffer
+        while True:
+            self._pos = _WHITESPACE.match(buffer, self._pos).end()
+            if self._pos >= len(buffer):
+                return rows
+            char = buffer[self._pos]
+            state = self._state
+
+            if state == "end":
+                raise ValueError("Unexpected data after the end of the result page")
+            if state in ("start", "after_member", "after_row"):
+                expected = {"start": "{", "after_member": ",}", "after_row": ",]"}[state]
+                self._expect(char, expected)
+                self._pos += 1
+                self._state = {
+                    "{": "first_key", "}": "end", "]": "after_member",
+                    ",": "key" if state == "after_member" else "row",
+                }[char]
+                continue
+            if state in ("first_key", "key"):
+                if char == "}" and state == "first_key":
+                    self._pos += 1
+                    self._state = "end"
+                    continue
+                self._expect(char, '"')
+                decoded = self._value(final)
+                if decoded is None:
+                    return rows
+                self._key, self._pos = decoded
+                self._state = "colon"
+                continue
+            if state == "colon":
+                self._expect(char, ":")
+                self._pos += 1
+                self._state = "value"
+                continue
+            if state == "value" and self._key == self.kind and char == "[":
+                self._pos += 1
+                self._state = "first_row"
+                continue
+            if state == "first_row" and char == "]":
+                self._pos += 1
+                self._state = "after_member"
+                continue
+
+            decoded = self._value(final)
+            if decoded is None:
+                return rows
+            value, self._pos = decoded
+            if state == "value":
+                if self._key == "fields":
+                    self.fields = value
+                elif self._key == "totalCount":
+                    self.total_count = value
+                else:
+                    self.extra[self._key] = value
+                self._state = "after_member"
+            else:
+                rows.append(value)
+                self.rows += 1
+                self._state = "after_row"
+
+
+class ResultPageStream:
+    """Rows of one result page, decoded as the response body arrives.
+
+    Iterate it once. ``fields`` and ``total_count`` are filled in as the
+    body is read; Sumo sends ``fields`` ahead of the rows.
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[bytes],
+        kind: str,
+        project: Optional[Callable[[Any], Any]] = None
+    ):
+        self.parser = ResultPageParser(kind)
+        self.bytes_read = 0
+        self._chunks = chunks
+        self._project = project
+
+    @property
+    def fields(self) -> List[Dict[str, Any]]:
+        return self.parser.fields
+
+    @property
+    def total_count(self) -> int:
+        return self.parser.total_count
+
+    @property
+    def rows(self) -> int:
+        return self.parser.rows
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        project = self._project
+        async for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            for row in self.parser.feed(chunk):
+                yield row if project is None else project(row)
+        for row in self.parser.close():
+            yield row if project is None else project(row)
@@ -0,0 +1,204 @@
+"""Process-wide budget for memory held by in-flight tool calls.
+
+Each tool call gets a ``CallMemory`` through a context variable. Result
+pages reserve their expected size before they are fetched and settle to
+their real size afterwards; rendered output is charged when the call
+returns. Everything is released when the call ends, and streaming callers
+release pages as soon as they have written them.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+# Parsed JSON takes several times the bytes of the response body
+PARSED_OVERHEAD = 3
+_DEFAULT_ROW_BYTES = 2048
+
+
+class MemoryStats(BaseModel):
+    """Point-in-time view of the memory budget."""
+    max_bytes: int
+    used_bytes: int
+    peak_bytes: int
+    calls_in_flight: int
+    waiting: int
+    waits: int
+    avg_wait_seconds: float
+    sessions: Dict[str, int]
+
+
+class CallMemory:
+    """Bytes held by one tool call."""
+
+    def __init__(self, budget: "MemoryBudget", session: str):
+        self.budget = budget
+        self.session = session
+        self.held = 0
+
+    async def reserve(self, nbytes: int) -> int:
+        """Wait until ``nbytes`` fit in the budget, then hold them."""
+        await self.budget._reserve(self, nbytes)
+        return nbytes
+
+    def adjust(self, nbytes: int) -> None:
+        """Change what this call holds without waiting (negative to release)."""
+        nbytes = max(nbytes, -self.held)
+        self.held += nbytes
+        self.budget._account(self.session, nbytes)
+
+    def release(self, nbytes: int) -> None:
+        self.adjust(-nbytes)
+
+    async def reserve_page(self, rows: int) -> int:
+        """Reserve the expected size of a result page of ``rows`` rows."""
+        estimate = min(rows * self.budget.bytes_per_row, self.budget.max_bytes // 4)
+        return await self.reserve(estimate)
+
+    def settle_page(self, reserved: int, body_bytes: int, rows: int) -> int:
+        """Replace a page's estimate with its measured size; return the bytes held for it."""
+        actual = body_bytes * PARSED_OVERHEAD
+        if rows:
+            self.budget._observe_row_size(actual / rows)
+        self.adjust(actual - reserved)
+        return actual
+
+
+# The memory account of the tool call being handled, if the budget is enabled
+current_call_memory: ContextVar[Optional[CallMemory]] = ContextVar(
+    "current_call_memory", default=None
+)
+
+
+class MemoryBudget:
+    """Apply backpressure when tool calls together hold too much memory.
+
+    New calls wait while usage is above ``admit_fraction`` of ``max_bytes``,
+    and reservations wait while they would exceed ``max_bytes`` or the
+    session's ``session_bytes`` quota. A call that holds everything
+    counted against a limit is never made to wait for itself, so a single
+    oversized call still completes. Likewise, once every other call holding
+    memory is itself waiting to reserve more, nothing can be released, so a
+    waiting call that holds memory is let through instead of deadlocking.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        session_bytes: int = 128 * 1024 * 1024,
+        admit_fraction: float = 0.9
+    ):
+        self.max_bytes = max_bytes
+        self.session_bytes = session_bytes
+        self.admit_fraction = admit_fraction
+        self.bytes_per_row = _DEFAULT_ROW_BYTES
+
+        self.used = 0
+        self.peak = 0
+        self._by_session: Counter = Counter()
+        self._calls = 0
+        self._active: Set[CallMemory] = set()
+        # Calls waiting in reserve(); they release nothing until they get it
+        self._blocked: Set[CallMemory] = set()
+        self._waiters: List["asyncio.Future[None]"] = []
+        self._waiting = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+
+    def _account(self, session: str, nbytes: int) -> None:
+        self.used += nbytes
+        self.peak = max(self.peak, self.used)
+        self._by_session[session] += nbytes
+        if self._by_session[session] <= 0:
+            del self._by_session[session]
+        if nbytes < 0:
+            self._wake()
+
+    def _wake(self) -> None:
+        """Let every waiter re-check its condition."""
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def _observe_row_size(self, row_bytes: float) -> None:
+        # Moving average, so estimates follow the shape of recent results
+        self.bytes_per_row = max(64, int(0.8 * self.bytes_per_row + 0.2 * row_bytes))
+
+    def _stalled(self, memory: CallMemory) -> bool:
+        """Whether ``memory`` holds some of the budget and every other holder is waiting."""
+        return memory.held > 0 and all(
+            other in self._blocked for other in self._active
+            if other is not memory and other.held > 0
+        )
+
+    def _fits(self, memory: CallMemory, nbytes: int) -> bool:
+        if self._stalled(memory):
+            return True
+        total_ok = self.used + nbytes <= self.max_bytes or self.used == memory.held
+        session_used = self._by_session[memory.session]
+        session_ok = (
+            session_used + nbytes <= self.session_bytes or session_used == memory.held
+        )
+        return total_ok and session_ok
+
+    async def _wait_for(self, predicate: Callable[[], bool]) -> None:
+        if predicate():
+            return
+        started = time.monotonic()
+        self._waiting += 1
+        self._waits += 1
+        try:
+            while not predicate():
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                await waiter
+        finally:
+            self._waiting -= 1
+            self._wait_seconds += time.monotonic() - started
+
+    async def _reserve(self, memory: CallMemory, nbytes: int) -> None:
+        if not self._fits(memory, nbytes):
+            self._blocked.add(memory)
+            # Another waiter may now be the only one able to make progress
+            self._wake()
+            try:
+                await self._wait_for(lambda: self._fits(memory, nbytes))
+            finally:
+                self._blocked.discard(memory)
+        memory.adjust(nbytes)
+
+    @contextlib.asynccontextmanager
+    async def call(self, session: str = "default") -> AsyncIterator[CallMemory]:
+        """Admit a tool call once usage is below the admission threshold."""
+        await self._wait_for(
+            lambda: self.used < self.max_bytes * self.admit_fraction or self.used == 0
+        )
+        memory = CallMemory(self, session)
+        self._calls += 1
+        self._active.add(memory)
+        token = current_call_memory.set(memory)
+        try:
+            yield memory
+        finally:
+            current_call_memory.reset(token)
+            self._calls -= 1
+            self._active.discard(memory)
+            memory.release(memory.held)
+
+    def stats(self) -> MemoryStats:
+        return MemoryStats(
+            max_bytes=self.max_bytes,
+            used_bytes=self.used,
+            peak_bytes=self.peak,
+            calls_in_flight=self._calls,
+            waiting=self._waiting,
+            waits=self._waits,
+            avg_wait_seconds=round(self._wait_seconds / self._waits, 3) if self._waits else 0.0,
+            sessions=dict(self._by_session)
+        )
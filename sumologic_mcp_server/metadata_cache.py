@@ -0,0 +1,119 @@
+"""Conditional-request cache for the metadata (collectors, sources) GET endpoints."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+from pydantic import BaseModel
+
+
+class CachedResponse(BaseModel):
+    """A parsed metadata response and what is needed to revalidate it."""
+    data: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: str
+    stored_at: float
+
+
+class MetadataCacheStats(BaseModel):
+    """How metadata requests were answered."""
+    entries: int
+    fresh_hits: int
+    not_modified: int
+    unchanged_body: int
+    misses: int
+
+
+class MetadataCache:
+    """Reuse parsed metadata responses across inventory refreshes.
+
+    Responses carrying an ``ETag`` or ``Last-Modified`` are always
+    revalidated with a conditional request, and a 304 returns the stored
+    objects. Responses without validators are served for ``ttl`` seconds,
+    then refetched; if the body hashes the same, the stored objects are
+    returned without parsing it again. Cached objects are shared between
+    callers and must not be modified.
+    """
+
+    def __init__(self, ttl: int = 300, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._fresh_hits = 0
+        self._not_modified = 0
+        self._unchanged_body = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        if not params:
+            return url
+        return url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """Return the stored response, if any."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def fresh(self, entry: CachedResponse) -> Optional[Any]:
+        """Return the stored data if it can be used without asking the server."""
+        if entry.etag or entry.last_modified:
+            return None
+        if time.monotonic() - entry.stored_at >= self.ttl:
+            return None
+        self._fresh_hits += 1
+        return entry.data
+
+    def conditional_headers(self, entry: Optional[CachedResponse]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def resolve(
+        self,
+        key: str,
+        entry: Optional[CachedResponse],
+        response: httpx.Response
+    ) -> Any:
+        """Turn a successful (200 or 304) response into parsed data, updating the cache."""
+        if response.status_code == 304 and entry is not None:
+            self._not_modified += 1
+            entry.stored_at = time.monotonic()
+            return entry.data
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if entry is not None and entry.content_hash == content_hash:
+            self._unchanged_body += 1
+            data = entry.data
+        else:
+            self._misses += 1
+            data = response.json()
+
+        self._entries[key] = CachedResponse(
+            data=data,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=content_hash,
+            stored_at=time.monotonic()
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return data
+
+    def stats(self) -> MetadataCacheStats:
+        return MetadataCacheStats(
+            entries=len(self._entries),
+            fresh_hits=self._fresh_hits,
+            not_modified=self._not_modified,
+            unchanged_body=self._unchanged_body,
+            misses=self._misses
+        )
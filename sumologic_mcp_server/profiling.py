@@ -0,0 +1,146 @@
+"""Opt-in sampling profiler for individual tool calls.
+
+While active, a background thread samples the Python stack of the event
+loop thread and an asyncio task measures event-loop lag. On exit the
+samples are written in collapsed-stack format (``flamegraph.pl``,
+speedscope, inferno) next to a JSON summary. Nothing is started unless a
+profiler is entered, so there is no cost when profiling is off.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ProfileSummary(BaseModel):
+    """Headline numbers for one profiled tool call."""
+    tool: str
+    call_id: str
+    duration_seconds: float
+    samples: int
+    idle_fraction: float
+    loop_lag_ms: Dict[str, float]
+    top_frames: List[Dict[str, Any]]
+    profile_path: str
+    summary_path: str
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _file_part(value: str) -> str:
+    """``value`` reduced to characters safe in a file name, with no path separators."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", value)[:64] or "_"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ToolProfiler:
+    """Async context manager profiling everything the event loop does meanwhile.
+
+    Samples cover the whole loop, so concurrent calls show up in each other's
+    profiles; idle samples (the loop waiting in ``select``) are time spent
+    waiting on Sumo Logic or the network rather than on our own CPU work.
+    """
+
+    def __init__(self, tool: str, call_id: str, output_dir: str, interval: float = 0.005):
+        self.tool = tool
+        self.call_id = call_id
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+
+        self._stacks: Counter = Counter()
+        self._lags: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lag_task: Optional["asyncio.Task[None]"] = None
+        self._started = 0.0
+        self.summary: Optional[ProfileSummary] = None
+
+    def _sample(self, target_thread: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target_thread)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    async def _measure_lag(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._lags.append(max(0.0, time.perf_counter() - expected))
+
+    async def __aenter__(self) -> "ToolProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), daemon=True
+        )
+        self._thread.start()
+        self._lag_task = asyncio.create_task(self._measure_lag())
+        # Let the lag probe take its first reading before the call starts
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        duration = time.perf_counter() - self._started
+        self._stop.set()
+        self._lag_task.cancel()
+        self._thread.join()
+        self.summary = await asyncio.to_thread(self._write, duration)
+
+    def _write(self, duration: float) -> ProfileSummary:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{_file_part(self.tool)}-{_file_part(self.call_id)}"
+        profile_path = self.output_dir / f"{stem}.collapsed"
+        summary_path = self.output_dir / f"{stem}.json"
+
+        with open(profile_path, "w", encoding="utf-8") as handle:
+            for stack, count in self._stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+        samples = sum(self._stacks.values())
+        self_time: Counter = Counter()
+        for stack, count in self._stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += count
+        # The loop blocks in selectors.select() while it waits for I/O
+        idle = sum(count for leaf, count in self_time.items() if "(selectors.py:" in leaf)
+
+        summary = ProfileSummary(
+            tool=self.tool,
+            call_id=self.call_id,
+            duration_seconds=round(duration, 4),
+            samples=samples,
+            idle_fraction=round(idle / samples, 3) if samples else 0.0,
+            loop_lag_ms={
+                "mean": round(1000 * sum(self._lags) / len(self._lags), 3) if self._lags else 0.0,
+                "p95": round(1000 * _percentile(self._lags, 0.95), 3),
+                "max": round(1000 * max(self._lags, default=0.0), 3),
+            },
+            top_frames=[
+                {"frame": frame, "samples": count}
+                for frame, count in self_time.most_common(10)
+            ],
+            profile_path=str(profile_path),
+            summary_path=str(summary_path)
+        )
+        summary_path.write_text(json.dumps(summary.model_dump(), indent=2))
+        return summary
@@ -0,0 +1,145 @@
+"""Heuristic cost estimation and safe rewrites for queries before they run."""
+
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from .query_parser import AGGREGATE_OPERATORS, is_field_name, split_stages, stage_operator
+
+_SCOPE_RE = re.compile(
+    r"\b(_sourceCategory|_index|_view|_collector|_source|_sourceName|_sourceHost|_dataTier)"
+    r"\s*=\s*(\"[^\"]*\"|\S+)",
+    re.IGNORECASE
+)
+_LEADING_WILDCARD_RE = re.compile(r"(?:^|[\s=(])\"?\*[^\s\"|)]")
+
+# Relative cost of operators that force extra work on every message
+_OPERATOR_WEIGHTS = {
+    "join": 3.0,
+    "transpose": 2.0,
+    "logreduce": 3.0,
+    "logcompare": 3.0,
+    "count_distinct": 1.5,
+    "lookup": 1.5,
+    "compare": 2.0,
+}
+_UNSCOPED_FACTOR = 20.0
+_LEADING_WILDCARD_FACTOR = 5.0
+
+
+class QueryCostEstimate(BaseModel):
+    """Relative cost of a query in "scoped hours" with the reasons behind it."""
+    score: float
+    window_hours: float
+    scoped: bool
+    leading_wildcard: bool
+    aggregate: bool
+    has_limit: bool
+    warnings: List[str] = Field(default_factory=list)
+
+
+class QueryPlan(BaseModel):
+    """A query after analysis: what will run and what was noticed."""
+    query: str
+    original_query: str
+    estimate: QueryCostEstimate
+    level: str = "ok"
+    limit_pushed_down: bool = False
+
+
+def _scope_values(scope: str) -> List[str]:
+    return [value.strip('"') for _, value in _SCOPE_RE.findall(scope)]
+
+
+def estimate_query_cost(query: str, window_seconds: float) -> QueryCostEstimate:
+    """Estimate how much data a query will scan relative to a scoped one-hour search."""
+    stages = split_stages(query)
+    scope = stages[0]
+    operators = [stage_operator(stage) for stage in stages[1:]]
+    window_hours = max(window_seconds, 0) / 3600.0
+    warnings = []
+
+    values = _scope_values(scope)
+    scoped = any(value and value.strip("*") for value in values)
+    leading_wildcard = bool(_LEADING_WILDCARD_RE.search(scope)) or any(
+        value.startswith("*") and value.strip("*") for value in values
+    )
+    aggregate = any(op in AGGREGATE_OPERATORS for op in operators)
+    has_limit = any(op in ("limit", "top") for op in operators)
+
+    score = max(window_hours, 1 / 60)
+    if not scoped:
+        score *= _UNSCOPED_FACTOR
+        warnings.append(
+            "No _sourceCategory/_index/_view scope: the search scans every partition"
+        )
+    if leading_wildcard:
+        score *= _LEADING_WILDCARD_FACTOR
+        warnings.append("Leading wildcard prevents index lookups")
+    for op in operators:
+        score *= _OPERATOR_WEIGHTS.get(op, 1.0)
+    if not aggregate and not has_limit:
+        warnings.append("Returns raw messages without '| limit'")
+
+    return QueryCostEstimate(
+        score=round(score, 2),
+        window_hours=round(window_hours, 2),
+        scoped=scoped,
+        leading_wildcard=leading_wildcard,
+        aggregate=aggregate,
+        has_limit=has_limit,
+        warnings=warnings
+    )
+
+
+def push_down_limit(query: str, limit: int) -> Optional[str]:
+    """Append ``| limit N`` when that only lets Sumo stop scanning early.
+
+    Only non-aggregate queries without their own limit are rewritten: the
+    tool returns at most ``limit`` messages anyway, so the result is the same.
+    """
+    stages = split_stages(query)
+    operators = [stage_operator(stage) for stage in stages[1:]]
+    if any(op in AGGREGATE_OPERATORS or op in ("limit", "top") for op in operators):
+        return None
+    return f"{query.rstrip()} | limit {limit}"
+
+
+def push_down_fields(query: str, fields: List[str]) -> Optional[str]:
+    """Append ``| fields a, b`` so Sumo drops every other column before sending results.
+
+    Timeslice queries are left alone, so their slice column stays available
+    to the timeslice cache; names that are not plain identifiers are only
+    projected client-side.
+    """
+    if not fields or not all(is_field_name(name) for name in fields):
+        return None
+    if any(stage_operator(stage) == "timeslice" for stage in split_stages(query)[1:]):
+        return None
+    return f"{query.rstrip()} | fields {', '.join(fields)}"
+
+
+def analyze_query(
+    query: str,
+    window_seconds: float,
+    limit: Optional[int] = None,
+    warn_threshold: float = 24.0,
+    refuse_threshold: float = 1000.0
+) -> QueryPlan:
+    """Estimate cost, classify it against thresholds and apply safe rewrites."""
+    estimate = estimate_query_cost(query, window_seconds)
+    level = "ok"
+    if estimate.score >= refuse_threshold:
+        level = "refuse"
+    elif estimate.score >= warn_threshold:
+        level = "warn"
+
+    rewritten = push_down_limit(query, limit) if limit else None
+    return QueryPlan(
+        query=rewritten or query,
+        original_query=query,
+        estimate=estimate,
+        level=level,
+        limit_pushed_down=rewritten is not None
+    )
@@ -0,0 +1,273 @@
+"""Lightweight parsing and local validation of Sumo Logic queries.
+
+This is not a full grammar. It understands enough structure (quoting,
+brackets, pipe stages and the common operators) to reject obviously broken
+queries without a round trip, and reports anything it cannot judge as
+inconclusive so the caller can fall back to the Search API.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# Only double quotes delimit strings in the Sumo query language
+_QUOTE = '"'
+_OPEN = {"(": ")", "[": "]", "{": "}"}
+_CLOSE = {v: k for k, v in _OPEN.items()}
+
+_IDENT = r"[A-Za-z_%][\w.%]*"
+_DURATION = r"\d+\s*(?:ms|s|m|h|d|w)"
+
+# Aggregating operators; their output is records rather than messages
+AGGREGATE_OPERATORS = {
+    "count", "count_distinct", "count_frequent", "sum", "avg", "min", "max",
+    "stddev", "pct", "first", "last", "most_recent", "least_recent",
+}
+
+# Operators that transform each message independently. Results of queries
+# built only from these are final as soon as Sumo has found them.
+PER_MESSAGE_OPERATORS = {
+    "parse", "json", "csv", "keyvalue", "kv", "split", "xml", "where", "fields",
+    "limit", "if", "format", "formatdate", "concat", "tolowercase", "touppercase",
+    "substring", "replace", "urldecode", "urlencode", "base64decode", "base64encode",
+    "num", "tolong", "geoip",
+}
+
+_TIMESLICE_RE = re.compile(
+    rf"^timeslice(?:\s+by)?\s+(?:{_DURATION}|\d+\s+buckets)(?:\s+as\s+{_IDENT})?$",
+    re.IGNORECASE
+)
+_LIMIT_RE = re.compile(r"^limit\s+\d+$", re.IGNORECASE)
+_SORT_RE = re.compile(
+    rf"^(?:sort|order)(?:\s+by)?\s+[+-]?{_IDENT}(?:\s+(?:asc|desc))?"
+    rf"(?:\s*,\s*[+-]?{_IDENT}(?:\s+(?:asc|desc))?)*$",
+    re.IGNORECASE
+)
+_FIELDS_RE = re.compile(rf"^fields\s+-?\s*{_IDENT}(?:\s*,\s*{_IDENT})*$", re.IGNORECASE)
+_TOP_RE = re.compile(rf"^top\s+\d+\s+{_IDENT}", re.IGNORECASE)
+_ASSIGN_RE = re.compile(rf"^{_IDENT}\s*=(?!=)\s*\S")
+_BY_LIST_RE = re.compile(rf"^{_IDENT}(?:\s+as\s+{_IDENT})?(?:\s*,\s*{_IDENT}(?:\s+as\s+{_IDENT})?)*$")
+
+
+class QueryValidation(BaseModel):
+    """Outcome of a local syntax check.
+
+    ``valid`` is True or False when the local check is conclusive and None
+    when the query uses constructs only the Search API can judge.
+    """
+    valid: Optional[bool]
+    message: str
+    errors: List[str] = Field(default_factory=list)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so equivalent query texts share cache entries."""
+    return " ".join(query.split())
+
+
+def _scan(query: str) -> Tuple[List[str], List[str]]:
+    """Split on top-level pipes and collect quoting/bracket errors."""
+    stages = []
+    errors = []
+    current = []
+    stack = []
+    quote = None
+    escaped = False
+
+    for index, char in enumerate(query):
+        if quote:
+            current.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+
+        if char == _QUOTE:
+            quote = char
+        elif char in _OPEN:
+            stack.append((char, index))
+        elif char in _CLOSE:
+            if not stack or stack[-1][0] != _CLOSE[char]:
+                errors.append(f"Unexpected '{char}' at position {index}")
+            else:
+                stack.pop()
+        elif char == "|" and not stack:
+            stages.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+
+    stages.append("".join(current).strip())
+    if quote:
+        errors.append(f"Unterminated {quote} quote")
+    for char, index in stack:
+        errors.append(f"Unclosed '{char}' at position {index}")
+    return stages, errors
+
+
+def split_stages(query: str) -> List[str]:
+    """Split a query into its pipe-separated stages, respecting quotes and brackets."""
+    return _scan(query)[0]
+
+
+def stage_operator(stage: str) -> str:
+    """Return the lowercased operator keyword that starts a stage."""
+    match = re.match(r"[A-Za-z_]+", stage)
+    return match.group(0).lower() if match else ""
+
+
+def is_field_name(name: str) -> bool:
+    """Whether ``name`` can be written unquoted as a field in a query."""
+    return re.fullmatch(_IDENT, name) is not None
+
+
+def is_aggregate_query(query: str) -> bool:
+    """Whether any stage aggregates, so results come back as records."""
+    return any(
+        stage_operator(stage) in AGGREGATE_OPERATORS for stage in split_stages(query)[1:]
+    )
+
+
+def is_per_message_query(query: str) -> bool:
+    """Whether every stage works message by message (no sort, dedup, aggregate, ...)."""
+    for stage in split_stages(query)[1:]:
+        operator = stage_operator(stage)
+        if operator in PER_MESSAGE_OPERATORS:
+            continue
+        if _ASSIGN_RE.match(stage) and operator not in AGGREGATE_OPERATORS:
+            continue
+        return False
+    return True
+
+
+def query_limit(query: str) -> Optional[int]:
+    """The ``N`` of a final ``| limit N`` stage, or None if the query does not end in one."""
+    stages = split_stages(query)
+    if len(stages) > 1 and _LIMIT_RE.match(stages[-1]):
+        return int(stages[-1].split()[-1])
+    return None
+
+
+def _check_parse(stage: str) -> Tuple[Optional[bool], Optional[str]]:
+    body = re.sub(r"^parse\s+", "", stage, flags=re.IGNORECASE)
+    body = re.sub(r"^field\s*=\s*\S+\s+", "", body, flags=re.IGNORECASE)
+    if re.match(r"regex\b", body, re.IGNORECASE):
+        pattern = re.search(r'"((?:[^"\\]|\\.)*)"', body)
+        if not pattern:
+            return False, "parse regex requires a quoted regular expression"
+        if "(?<" not in pattern.group(1) and "(?P<" not in pattern.group(1):
+            return False, "parse regex requires at least one named capture group (?<name>...)"
+        return True, None
+
+    match = re.match(r'"((?:[^"\\]|\\.)*)"\s+as\s+(.+?)(?:\s+nodrop)?$',
+                     body, re.IGNORECASE | re.DOTALL)
+    if not match:
+        if body.startswith('"'):
+            return False, "parse requires 'as <field>, ...' after the pattern"
+        return None, None
+    pattern = match.group(1)
+    names = [name.strip() for name in match.group(2).split(",")]
+    if any(not re.fullmatch(_IDENT, name) for name in names):
+        return False, "parse has an invalid field name list"
+    wildcards = pattern.count("*")
+    if wildcards != len(names):
+        return False, (
+            f"parse pattern has {wildcards} wildcard(s) but {len(names)} field name(s)"
+        )
+    return True, None
+
+
+def _check_aggregate(stage: str, operator: str) -> Tuple[Optional[bool], Optional[str]]:
+    parts = re.split(r"\bby\b", stage, maxsplit=1, flags=re.IGNORECASE)
+    head = parts[0].strip()
+    if len(parts) == 2:
+        by_list = parts[1].strip()
+        if not by_list:
+            return False, f"'{operator} by' requires at least one field"
+        if not _BY_LIST_RE.match(by_list):
+            return None, None
+    if operator in {"sum", "avg", "min", "max", "stddev", "pct", "first", "last",
+                    "most_recent", "least_recent"}:
+        if not re.match(rf"^{operator}\s*\(.+\)(?:\s+as\s+{_IDENT})?$", head, re.IGNORECASE):
+            if re.match(rf"^{operator}\s*\(.+\)", head, re.IGNORECASE):
+                # Several aggregates in one stage, e.g. "avg(x), max(x)"
+                return None, None
+            return False, f"{operator} requires a field argument, e.g. {operator}(field)"
+    return True, None
+
+
+def _check_stage(stage: str) -> Tuple[Optional[bool], Optional[str]]:
+    """Check one non-scope stage: True/False when sure, None when not."""
+    operator = stage_operator(stage)
+
+    if operator == "parse":
+        return _check_parse(stage)
+    if operator == "where":
+        if not stage[len("where"):].strip():
+            return False, "where requires a condition"
+        return True, None
+    if operator in AGGREGATE_OPERATORS:
+        return _check_aggregate(stage, operator)
+    if operator == "timeslice":
+        if _TIMESLICE_RE.match(stage):
+            return True, None
+        return False, "timeslice requires a duration such as 'timeslice 1m' or 'timeslice 15m as ts'"
+    if operator == "limit":
+        if _LIMIT_RE.match(stage):
+            return True, None
+        return False, "limit requires a positive integer"
+    if operator in ("sort", "order"):
+        if _SORT_RE.match(stage):
+            return True, None
+        return False, f"{operator} requires one or more fields, e.g. '{operator} by _count desc'"
+    if operator == "fields":
+        if _FIELDS_RE.match(stage):
+            return True, None
+        return False, "fields requires a comma-separated list of field names"
+    if operator == "top":
+        if _TOP_RE.match(stage):
+            return True, None
+        return False, "top requires a count and a field, e.g. 'top 10 _sourceHost'"
+    if _ASSIGN_RE.match(stage):
+        return True, None
+    # json, lookup, transpose, ... are left to the Search API
+    return None, None
+
+
+def validate_query_syntax(query: str) -> QueryValidation:
+    """Check a query locally; see ``QueryValidation`` for the meaning of ``valid``."""
+    if not query.strip():
+        return QueryValidation(valid=False, message="Query is empty", errors=["Query is empty"])
+
+    stages, errors = _scan(query)
+    outside_quotes = re.sub(r'"(?:[^"\\]|\\.)*"', "", query)
+    if "'" in outside_quotes or "`" in outside_quotes:
+        # Not string delimiters to us, but they may be to a specific operator
+        return QueryValidation(
+            valid=None, message="Query uses quoting that needs server-side validation"
+        )
+    if errors:
+        return QueryValidation(valid=False, message=errors[0], errors=errors)
+
+    conclusive = True
+    for position, stage in enumerate(stages[1:], start=1):
+        if not stage:
+            errors.append(f"Empty pipe segment at stage {position}")
+            continue
+        ok, message = _check_stage(stage)
+        if ok is False:
+            errors.append(f"Stage {position} ('{stage}'): {message}")
+        elif ok is None:
+            conclusive = False
+
+    if errors:
+        return QueryValidation(valid=False, message=errors[0], errors=errors)
+    if not conclusive:
+        return QueryValidation(
+            valid=None, message="Query uses operators that need server-side validation"
+        )
+    return QueryValidation(valid=True, message="Query syntax is valid")
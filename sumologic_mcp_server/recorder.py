@@ -0,0 +1,254 @@
+"""Record every Sumo Logic API interaction to a rotating NDJSON trace.
+
+Each line describes one HTTP exchange: which endpoint it hit, its timing,
+sizes, the job state it reported and, for job creation, the query and
+window. Response bodies are only kept when asked for. The trace is the
+input of ``python -m sumologic_mcp_server.replay``.
+
+Bodies are recorded as the caller reads them, not read ahead: a streamed
+result page is still parsed incrementally by the client, and its size and
+row count are tallied on the way through.
+"""
+
+import json
+import logging
+import logging.handlers
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .json_stream import ResultPageParser
+from .scheduler import current_priority, current_session
+
+_JOB_PATH_RE = re.compile(r"/v1/search/jobs(?:/([^/]+))?(?:/(records|messages))?$")
+
+
+def classify_request(method: str, path: str) -> Tuple[str, Optional[str]]:
+    """Name the API endpoint of a request and the search job it refers to."""
+    match = _JOB_PATH_RE.search(path)
+    if match is None:
+        if path.endswith("/sources"):
+            return "sources", None
+        if "/collectors" in path:
+            return "collectors", None
+        return "other", None
+    job_id, kind = match.groups()
+    if job_id is None:
+        return ("create" if method == "POST" else "other"), None
+    if kind is not None:
+        return kind, job_id
+    return ("delete" if method == "DELETE" else "status"), job_id
+
+
+class TraceRecorder:
+    """Append API interactions to ``path``, rotating it at ``max_bytes``.
+
+    Rotated files are kept as ``path.1`` .. ``path.<backups>`` like any
+    ``RotatingFileHandler`` log. Credentials are never written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        backups: int = 5,
+        include_bodies: bool = False
+    ):
+        self.path = path
+        self.include_bodies = include_bodies
+        self.events = 0
+        self._states: Dict[str, str] = {}
+
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    def close(self) -> None:
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+    def record(
+        self,
+        request: httpx.Request,
+        response: Optional[httpx.Response],
+        started: float,
+        duration: float,
+        error: Optional[str] = None,
+        body: Optional[bytes] = None,
+        response_bytes: int = 0,
+        page: Optional[ResultPageParser] = None
+    ) -> Dict[str, Any]:
+        """Write one exchange and return the event as written.
+
+        ``body`` is the response body if it was kept, ``response_bytes`` its
+        size, and ``page`` the parser that counted the rows of a result page.
+        """
+        endpoint, job_id = classify_request(request.method, request.url.path)
+        event: Dict[str, Any] = {
+            "ts": round(started, 6),
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.url.path,
+            "params": dict(request.url.params),
+            "duration_ms": round(duration * 1000, 3),
+            "request_bytes": len(request.content),
+            "session": current_session.get(),
+            "priority": current_priority.get(),
+        }
+        if job_id is not None:
+            event["job_id"] = job_id
+        if error is not None:
+            event["error"] = error
+
+        if endpoint == "create" and request.content:
+            # Needed to replay the workload, so kept even without bodies
+            payload = json.loads(request.content)
+            event.update(
+                query=payload.get("query"),
+                **{"from": payload.get("from"), "to": payload.get("to")}
+            )
+
+        if response is not None:
+            event["status"] = response.status_code
+            event["response_bytes"] = response_bytes
+            data = _json_or_none(body)
+            if endpoint == "create" and isinstance(data, dict):
+                event["job_id"] = data.get("id")
+            elif endpoint == "status" and isinstance(data, dict) and "state" in data:
+                state = data["state"]
+                previous = self._states.get(job_id)
+                event.update(
+                    state=state,
+                    message_count=data.get("messageCount"),
+                    record_count=data.get("recordCount")
+                )
+                if previous != state:
+                    event["previous_state"] = previous
+                    self._states[job_id] = state
+            elif endpoint in ("records", "messages") and page is not None:
+                event["rows"] = page.rows
+                event["total_count"] = page.total_count
+            elif endpoint == "delete":
+                self._states.pop(job_id, None)
+            if self.include_bodies:
+                event["response_body"] = data
+
+        self._logger.info(json.dumps(event, separators=(",", ":"), default=str))
+        self.events += 1
+        return event
+
+
+def _json_or_none(body: Optional[bytes]) -> Any:
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """A response body passed through to the caller while it is tallied.
+
+    Result pages are counted by a push parser and only kept whole when
+    bodies are recorded; other responses are small and always kept, for
+    their job id or state. ``on_close`` runs once, when the body is closed.
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncByteStream,
+        keep_body: bool,
+        page: Optional[ResultPageParser],
+        on_close: Callable[["_TeeStream"], None]
+    ):
+        self.inner = inner
+        self.page = page
+        self.bytes_read = 0
+        self.error: Optional[str] = None
+        self._chunks: Optional[List[bytes]] = [] if keep_body else None
+        self._on_close: Optional[Callable[["_TeeStream"], None]] = on_close
+
+    @property
+    def body(self) -> Optional[bytes]:
+        return b"".join(self._chunks) if self._chunks is not None else None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self.inner:
+                self.bytes_read += len(chunk)
+                if self._chunks is not None:
+                    self._chunks.append(chunk)
+                if self.page is not None:
+                    try:
+                        self.page.feed(chunk)
+                    except ValueError:
+                        # Not a result page after all (e.g. an error body)
+                        self.page = None
+                yield chunk
+        except Exception as e:
+            self.error = repr(e)
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self.inner.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close(self)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records each exchange it forwards.
+
+    An exchange is written when its response body is closed, so its
+    duration covers the download as the caller consumed it.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, recorder: TraceRecorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.time()
+        clock = time.monotonic()
+        try:
+            response = await self.inner.handle_async_request(request)
+        except Exception as e:
+            self.recorder.record(request, None, started, time.monotonic() - clock, repr(e))
+            raise
+
+        endpoint, _ = classify_request(request.method, request.url.path)
+        is_page = endpoint in ("records", "messages")
+
+        def finish(stream: _TeeStream) -> None:
+            self.recorder.record(
+                request, response, started, time.monotonic() - clock, stream.error,
+                body=stream.body, response_bytes=stream.bytes_read, page=stream.page
+            )
+
+        tee = _TeeStream(
+            response.stream,
+            keep_body=self.recorder.include_bodies or not is_page,
+            page=ResultPageParser(endpoint) if is_page else None,
+            on_close=finish
+        )
+        # A fresh response, so the body is streamed through the tee rather than preloaded
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=tee,
+            extensions=response.extensions,
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
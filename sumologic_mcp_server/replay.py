@@ -0,0 +1,399 @@
+"""Replay a recorded API trace against a local fake of the Sumo Logic API.
+
+Every search job in the trace becomes one ``execute_query`` call, started at
+its recorded offset (divided by ``--speed``). The fake answers with the
+recorded job durations, result counts, row sizes and per-endpoint latencies,
+so the same workload can be run under two client configurations and
+compared without touching production::
+
+    python -m sumologic_mcp_server.replay trace.ndjson* --speed 10 \\
+        --set RESULT_CACHE_TTL=0 --set TIMESLICE_CACHE_ENABLED=false
+
+Latencies are reported in trace time (replay time multiplied by the speed).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from .recorder import classify_request
+from .scheduler import NORMAL, current_priority, current_session
+from .server import build_sumo_client
+
+DONE_STATES = ("DONE GATHERING RESULTS", "CANCELLED", "FORCE PAUSED")
+_DEFAULT_LATENCY_SECONDS = 0.05
+_DEFAULT_ROW_BYTES = 200
+
+# Replays never talk to Sumo, share worker state or touch the live job registry
+_REPLAY_ENV = {
+    "SUMO_ACCESS_ID": "replay",
+    "SUMO_ACCESS_KEY": "replay",
+    "SUMO_ENDPOINT": "https://replay.invalid/api",
+    "SUMO_TRACE_PATH": "",
+    "SUMO_SHARED_STATE_PATH": "",
+}
+
+
+class TraceQuery(BaseModel):
+    """One search job of the recorded workload."""
+    query: str
+    from_time: str
+    to_time: str
+    offset_seconds: float
+    limit: int = 1000
+    run_seconds: float
+    message_count: int = 0
+    record_count: int = 0
+    row_bytes: int = _DEFAULT_ROW_BYTES
+    rows: List[Dict[str, Any]] = []
+    priority: str = NORMAL
+    session: str = "default"
+    latency_seconds: float
+
+
+class ReplayReport(BaseModel):
+    """Latency and API-call figures for one run of the workload."""
+    label: str
+    queries: int
+    errors: int
+    calls: Dict[str, int]
+    latency_mean: float
+    latency_p50: float
+    latency_p95: float
+    wall_seconds: float
+
+
+def load_trace(paths: List[str]) -> List[Dict[str, Any]]:
+    """Read NDJSON trace files (including rotated ones) in time order."""
+    events = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    events.sort(key=lambda event: event["ts"])
+    return events
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def endpoint_latencies(events: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Median recorded latency of each endpoint, in seconds."""
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for event in events:
+        durations[event["endpoint"]].append(event["duration_ms"] / 1000)
+    return {endpoint: statistics.median(values) for endpoint, values in durations.items()}
+
+
+def extract_workload(events: List[Dict[str, Any]]) -> List[TraceQuery]:
+    """Reconstruct the searches the traced client ran."""
+    by_job: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for event in events:
+        if event.get("job_id"):
+            by_job[event["job_id"]].append(event)
+    if not events:
+        return []
+    origin = events[0]["ts"]
+
+    queries = []
+    for job_events in by_job.values():
+        create = next((e for e in job_events if e["endpoint"] == "create"), None)
+        if create is None or create.get("status", 0) >= 400 or not create.get("query"):
+            continue
+        statuses = [e for e in job_events if e["endpoint"] == "status" and "state" in e]
+        done = next((e for e in statuses if e["state"] in DONE_STATES), None)
+        finished = done or (statuses[-1] if statuses else create)
+        fetches = [e for e in job_events if e["endpoint"] in ("records", "messages")]
+        fetched_rows = sum(e.get("rows", 0) for e in fetches)
+        fetched_bytes = sum(e.get("response_bytes", 0) for e in fetches)
+
+        rows: List[Dict[str, Any]] = []
+        for fetch in sorted(fetches, key=lambda e: int(e["params"].get("offset", 0))):
+            body = fetch.get("response_body")
+            if isinstance(body, dict):
+                rows.extend(body.get(fetch["endpoint"], []))
+
+        last = job_events[-1]
+        queries.append(TraceQuery(
+            query=create["query"],
+            from_time=create["from"],
+            to_time=create["to"],
+            offset_seconds=create["ts"] - origin,
+            limit=int(fetches[0]["params"].get("limit", 1000)) if fetches else 1000,
+            run_seconds=finished["ts"] - create["ts"],
+            message_count=max((e.get("message_count") or 0 for e in statuses), default=0),
+            record_count=max((e.get("record_count") or 0 for e in statuses), default=0),
+            row_bytes=fetched_bytes // fetched_rows if fetched_rows else _DEFAULT_ROW_BYTES,
+            rows=rows,
+            priority=create.get("priority", NORMAL),
+            session=create.get("session", "default"),
+            latency_seconds=last["ts"] + last["duration_ms"] / 1000 - create["ts"]
+        ))
+    queries.sort(key=lambda q: q.offset_seconds)
+    return queries
+
+
+def recorded_report(events: List[Dict[str, Any]], queries: List[TraceQuery]) -> ReplayReport:
+    """The workload's figures as they were recorded."""
+    latencies = [q.latency_seconds for q in queries]
+    wall = events[-1]["ts"] - events[0]["ts"] if events else 0.0
+    return ReplayReport(
+        label="recorded",
+        queries=len(queries),
+        errors=sum(1 for e in events if e.get("error") or e.get("status", 200) >= 400),
+        calls=dict(Counter(e["endpoint"] for e in events)),
+        latency_mean=round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        latency_p50=round(_percentile(latencies, 0.5), 3),
+        latency_p95=round(_percentile(latencies, 0.95), 3),
+        wall_seconds=round(wall, 3)
+    )
+
+
+class _FakeJob:
+    def __init__(self, spec: Optional[TraceQuery], run_seconds: float):
+        self.spec = spec
+        self.run_seconds = run_seconds
+        self.started = time.monotonic()
+
+    def progress(self) -> float:
+        if self.run_seconds <= 0:
+            return 1.0
+        return min(1.0, (time.monotonic() - self.started) / self.run_seconds)
+
+    def rows(self, kind: str) -> List[Dict[str, Any]]:
+        spec = self.spec
+        if spec is None:
+            return []
+        total = spec.record_count if kind == "records" else spec.message_count
+        rows = list(spec.rows[:total])
+        pad = "x" * max(0, spec.row_bytes - 40)
+        field = "_raw" if kind == "messages" else "value"
+        rows.extend({"map": {field: pad}} for _ in range(total - len(rows)))
+        return rows
+
+
+class ReplaySumoAPI:
+    """Fake Search API that plays back recorded job timings and result shapes.
+
+    A created job is matched to the recorded job with the same query and
+    window; searches the trace never ran (for example shard queries) get
+    the median recorded duration and no results.
+    """
+
+    def __init__(
+        self,
+        queries: List[TraceQuery],
+        latencies: Dict[str, float],
+        speed: float = 1.0
+    ):
+        self.speed = speed
+        self.latencies = latencies
+        self.calls: Counter = Counter()
+        self._recorded: Dict[Tuple[str, str, str], Deque[TraceQuery]] = defaultdict(deque)
+        for spec in queries:
+            self._recorded[(spec.query, spec.from_time, spec.to_time)].append(spec)
+        run_times = [q.run_seconds for q in queries]
+        self._default_run = statistics.median(run_times) if run_times else 1.0
+        self._jobs: Dict[str, _FakeJob] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def _match(self, payload: Dict[str, Any]) -> Optional[TraceQuery]:
+        recorded = self._recorded.get((payload["query"], payload["from"], payload["to"]))
+        if not recorded:
+            return None
+        # Repeats of the same search reuse its last recording
+        return recorded.popleft() if len(recorded) > 1 else recorded[0]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint, job_id = classify_request(request.method, request.url.path)
+        self.calls[endpoint] += 1
+        latency = self.latencies.get(endpoint, _DEFAULT_LATENCY_SECONDS)
+        await asyncio.sleep(latency / self.speed)
+
+        if endpoint == "create":
+            spec = self._match(json.loads(request.content))
+            run_seconds = spec.run_seconds if spec is not None else self._default_run
+            job_id = f"replay-{next(self._ids)}"
+            self._jobs[job_id] = _FakeJob(spec, run_seconds / self.speed)
+            return httpx.Response(202, json={"id": job_id})
+        if endpoint == "collectors":
+            return httpx.Response(200, json={"collectors": []})
+        if endpoint == "sources":
+            return httpx.Response(200, json={"sources": []})
+
+        job = self._jobs.get(job_id)
+        if job is None:
+            return httpx.Response(404, json={"message": "job not found"})
+        if endpoint == "delete":
+            del self._jobs[job_id]
+            return httpx.Response(200, json={"id": job_id})
+
+        progress = job.progress()
+        if endpoint == "status":
+            spec = job.spec
+            return httpx.Response(200, json={
+                "id": job_id,
+                "state": "DONE GATHERING RESULTS" if progress >= 1.0 else "GATHERING RESULTS",
+                "messageCount": int((spec.message_count if spec else 0) * progress),
+                "recordCount": int((spec.record_count if spec else 0) * progress),
+            })
+
+        rows = job.rows(endpoint)
+        rows = rows[:int(len(rows) * progress)]
+        offset = int(request.url.params.get("offset", 0))
+        limit = int(request.url.params.get("limit", 100))
+        page = {"fields": [], endpoint: rows[offset:offset + limit]}
+        if endpoint == "messages":
+            # Like Sumo, /records pages carry no totalCount
+            page["totalCount"] = len(rows)
+        return httpx.Response(200, json=page)
+
+
+@contextlib.contextmanager
+def _environ(overrides: Dict[str, str]) -> Iterator[None]:
+    saved = dict(os.environ)
+    os.environ.update(overrides)
+    for key in [k for k, v in os.environ.items() if v == ""]:
+        del os.environ[key]
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+async def replay(
+    queries: List[TraceQuery],
+    latencies: Dict[str, float],
+    speed: float = 1.0,
+    overrides: Optional[Dict[str, str]] = None,
+    label: str = "replay"
+) -> ReplayReport:
+    """Run the workload against a fresh fake and a client built from the environment."""
+    api = ReplaySumoAPI(queries, latencies, speed)
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(_REPLAY_ENV, JOB_REGISTRY_PATH=os.path.join(scratch, "jobs.sqlite"))
+        env.update(overrides or {})
+        with _environ(env):
+            client = build_sumo_client(transport=api.transport)
+
+        started = time.monotonic()
+        latencies_seen: List[float] = []
+        errors = 0
+
+        async def run(spec: TraceQuery) -> None:
+            nonlocal errors
+            await asyncio.sleep(spec.offset_seconds / speed)
+            current_priority.set(spec.priority)
+            current_session.set(spec.session)
+            began = time.monotonic()
+            try:
+                await client.execute_query(spec.query, spec.from_time, spec.to_time, spec.limit)
+            except Exception:
+                errors += 1
+                return
+            latencies_seen.append((time.monotonic() - began) * speed)
+
+        await asyncio.gather(*(run(spec) for spec in queries))
+        wall = (time.monotonic() - started) * speed
+        if client.job_registry is not None:
+            client.job_registry.close()
+
+    return ReplayReport(
+        label=label,
+        queries=len(queries),
+        errors=errors,
+        calls=dict(api.calls),
+        latency_mean=round(statistics.fmean(latencies_seen), 3) if latencies_seen else 0.0,
+        latency_p50=round(_percentile(latencies_seen, 0.5), 3),
+        latency_p95=round(_percentile(latencies_seen, 0.95), 3),
+        wall_seconds=round(wall, 3)
+    )
+
+
+def format_reports(reports: List[ReplayReport]) -> str:
+    """Side-by-side table; the last column is compared with the one before it."""
+    endpoints = sorted({endpoint for report in reports for endpoint in report.calls})
+    rows: List[Tuple[str, List[float]]] = [
+        ("queries", [r.queries for r in reports]),
+        ("errors", [r.errors for r in reports]),
+        ("latency mean (s)", [r.latency_mean for r in reports]),
+        ("latency p50 (s)", [r.latency_p50 for r in reports]),
+        ("latency p95 (s)", [r.latency_p95 for r in reports]),
+        ("wall time (s)", [r.wall_seconds for r in reports]),
+    ] + [
+        (f"{endpoint} calls", [r.calls.get(endpoint, 0) for r in reports])
+        for endpoint in endpoints
+    ]
+
+    header = f"{'':<20}" + "".join(f"{r.label:>14}" for r in reports)
+    if len(reports) > 1:
+        header += f"{'change':>10}"
+    lines = [header]
+    for name, values in rows:
+        line = f"{name:<20}" + "".join(f"{v:>14g}" for v in values)
+        if len(values) > 1:
+            before, after = values[-2], values[-1]
+            line += f"{(after - before) / before:>+10.0%}" if before else f"{'':>10}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _parse_overrides(pairs: List[str]) -> Dict[str, str]:
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects KEY=VALUE, got '{pair}'")
+        overrides[key] = value
+    return overrides
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded Sumo Logic API trace under a different client configuration"
+    )
+    parser.add_argument("traces", nargs="+", help="NDJSON trace files, including rotated ones")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor")
+    parser.add_argument(
+        "--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+        help="Environment setting for the candidate configuration (repeatable)"
+    )
+    args = parser.parse_args()
+
+    events = load_trace([p for p in args.traces if Path(p).exists()])
+    queries = extract_workload(events)
+    if not queries:
+        raise SystemExit("No search jobs found in the trace")
+    latencies = endpoint_latencies(events)
+
+    reports = [recorded_report(events, queries)]
+    reports.append(asyncio.run(replay(queries, latencies, args.speed, label="baseline")))
+    if args.overrides:
+        reports.append(asyncio.run(replay(
+            queries, latencies, args.speed, _parse_overrides(args.overrides), label="candidate"
+        )))
+    print(format_reports(reports))
+
+
+if __name__ == "__main__":
+    main()
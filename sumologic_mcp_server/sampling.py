@@ -0,0 +1,145 @@
+"""Representative sampling of a source category across its time window."""
+
+import asyncio
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .client import (
+    SumoLogicClient,
+    format_epoch_ms,
+    parse_epoch_ms,
+    project_columns,
+    project_records,
+    record_fields,
+)
+from .query_cost import push_down_fields
+from .tail import message_id, message_time_ms
+
+MAX_BUCKETS = 24
+# Each bucket fetches several times its share, so busy buckets can make up
+# for quiet ones and one chatty host cannot fill a bucket alone
+OVERSAMPLE = 4
+
+
+class SampleBucket(BaseModel):
+    """One time bucket of a stratified sample."""
+    from_time: str
+    to_time: str
+    available: int
+    selected: int = 0
+
+
+class StratifiedSample(BaseModel):
+    """Messages spread over time buckets, and optionally over hosts."""
+    records: List[Dict[str, Any]]
+    fields: List[Dict[str, str]]
+    buckets: List[SampleBucket]
+    hosts: int
+
+
+def _round_robin(groups: List[List[Any]], limit: int) -> List[List[Any]]:
+    """Take one item from each group in turn, returning what was taken per group."""
+    taken: List[List[Any]] = [[] for _ in groups]
+    count = 0
+    for position in range(max((len(group) for group in groups), default=0)):
+        for index, group in enumerate(groups):
+            if count >= limit:
+                return taken
+            if position < len(group):
+                taken[index].append(group[position])
+                count += 1
+    return taken
+
+
+def _interleave_hosts(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reorder records so consecutive picks come from different hosts."""
+    by_host: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for record in records:
+        host = str(record_fields(record).get("_sourcehost", ""))
+        by_host.setdefault(host, []).append(record)
+    groups = list(by_host.values())
+    return [
+        group[position]
+        for position in range(max((len(group) for group in groups), default=0))
+        for group in groups
+        if position < len(group)
+    ]
+
+
+async def stratified_sample(
+    client: SumoLogicClient,
+    source_category: str,
+    limit: int = 10,
+    from_time: str = "-1h",
+    to_time: str = "now",
+    buckets: int = 6,
+    by_host: bool = False,
+    fields: Optional[List[str]] = None
+) -> StratifiedSample:
+    """Sample ``limit`` messages spread evenly over ``buckets`` slices of the window.
+
+    Each bucket is a small ``| limit`` query and all of them run concurrently.
+    Buckets with fewer messages than their share leave room for the others,
+    so quiet periods do not shrink the sample. With ``fields``, buckets
+    fetch only those plus the columns de-duplication needs.
+    """
+    from_ms = parse_epoch_ms(client._parse_time(from_time))
+    to_ms = parse_epoch_ms(client._parse_time(to_time))
+    if from_ms is None or to_ms is None or from_ms >= to_ms:
+        raise ValueError(f"Cannot sample between '{from_time}' and '{to_time}'")
+
+    # Bucket bounds are sent with one-second precision
+    buckets = max(1, min(buckets, MAX_BUCKETS, (to_ms - from_ms) // 1000))
+    width = (to_ms - from_ms) / buckets
+    bounds = [
+        (format_epoch_ms(int(from_ms + i * width)), format_epoch_ms(int(from_ms + (i + 1) * width)))
+        for i in range(buckets)
+    ]
+
+    per_bucket = min(limit, math.ceil(limit / buckets) * OVERSAMPLE)
+
+    query = f'_sourceCategory="{source_category}" | limit {per_bucket}'
+    fetched = None
+    if fields:
+        fetched = list(dict.fromkeys(
+            fields + ["_messageid", "_messagetime"] + (["_sourcehost"] if by_host else [])
+        ))
+        query = push_down_fields(query, fetched) or query
+    results = await asyncio.gather(*(
+        client.execute_query(query, start, end, per_bucket, fields=fetched, early=True)
+        for start, end in bounds
+    ))
+
+    # Adjacent buckets share their boundary second, so drop repeats
+    seen = set()
+    groups: List[List[Dict[str, Any]]] = []
+    for result in results:
+        group = []
+        for record in result.records:
+            values = record_fields(record)
+            key = message_id(values, message_time_ms(values))
+            if key not in seen:
+                seen.add(key)
+                group.append(record)
+        groups.append(_interleave_hosts(group) if by_host else group)
+
+    taken = _round_robin(groups, limit)
+    records = [record for group in taken for record in group]
+    columns: List[Dict[str, str]] = next((r.fields for r in results if r.fields), [])
+    hosts = {record_fields(record).get("_sourcehost") for record in records} - {None}
+    if fields:
+        records = project_records(records, fields)
+        columns = project_columns(columns, fields)
+
+    return StratifiedSample(
+        records=records,
+        fields=columns,
+        buckets=[
+            SampleBucket(from_time=start, to_time=end, available=len(group), selected=len(chosen))
+            for (start, end), group, chosen in zip(bounds, groups, taken)
+        ],
+        hosts=len(hosts)
+    )
@@ -0,0 +1,164 @@
+"""Priority-aware, per-session fair scheduling of search-job slots."""
+
+import asyncio
+import contextlib
+import time
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from pydantic import BaseModel
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, NORMAL, BACKGROUND)
+
+# Set by the server for each tool call so the client need not thread them through
+current_priority: ContextVar[str] = ContextVar("job_priority", default=NORMAL)
+current_session: ContextVar[str] = ContextVar("job_session", default="default")
+
+
+class SchedulerBusy(Exception):
+    """Raised when a non-interactive job is refused because the queue is full."""
+
+
+class SchedulerStats(BaseModel):
+    """Point-in-time view of the scheduler."""
+    running: int
+    queued: Dict[str, int]
+    granted: Dict[str, int]
+    rejected: Dict[str, int]
+    avg_wait_seconds: Dict[str, float]
+
+
+class JobScheduler:
+    """Hand out concurrent-job slots by priority, fairly across sessions.
+
+    Higher classes are always served first, and ``reserved_interactive``
+    slots can only be used by interactive calls so they never queue behind
+    bulk work. Within a class the waiting session with the fewest running
+    jobs goes next. Once ``max_queue_depth`` calls are waiting, new normal
+    and background calls are refused instead of queued.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        reserved_interactive: int = 2,
+        max_queue_depth: int = 50
+    ):
+        self.max_concurrent = max_concurrent
+        self.reserved_interactive = min(reserved_interactive, max_concurrent - 1)
+        self.max_queue_depth = max_queue_depth
+
+        self._running = 0
+        self._running_by_session: Counter = Counter()
+        # priority -> session -> waiting futures, in arrival order
+        self._waiters: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._granted: Counter = Counter()
+        self._rejected: Counter = Counter()
+        self._wait_seconds: Counter = Counter()
+
+    def _capacity(self, priority: str) -> int:
+        if priority == INTERACTIVE:
+            return self.max_concurrent
+        return self.max_concurrent - self.reserved_interactive
+
+    def _queued(self, priority: Optional[str] = None) -> int:
+        classes = [priority] if priority else PRIORITIES
+        return sum(
+            len(queue) for p in classes for queue in self._waiters[p].values()
+        )
+
+    def _grant(self, priority: str, session: str) -> None:
+        self._running += 1
+        self._running_by_session[session] += 1
+        self._granted[priority] += 1
+
+    def _dispatch(self) -> None:
+        """Start as many waiting calls as capacity allows, highest class first."""
+        for priority in PRIORITIES:
+            sessions = self._waiters[priority]
+            while sessions and self._running < self._capacity(priority):
+                session = min(sessions, key=lambda s: self._running_by_session[s])
+                queue = sessions[session]
+                future = queue.popleft()
+                if not queue:
+                    del sessions[session]
+                else:
+                    # Rotate so equally loaded sessions take turns
+                    sessions.move_to_end(session)
+                if future.done():
+                    continue
+                self._grant(priority, session)
+                future.set_result(None)
+            if sessions:
+                # Lower classes never overtake a class that is still waiting
+                return
+
+    async def acquire(self, priority: str = NORMAL, session: str = "default") -> None:
+        """Wait for a slot; raise ``SchedulerBusy`` if the queue is full."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+
+        higher_waiting = any(
+            self._waiters[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1]
+        )
+        if not higher_waiting and self._running < self._capacity(priority):
+            self._grant(priority, session)
+            return
+
+        if priority != INTERACTIVE and self._queued() >= self.max_queue_depth:
+            self._rejected[priority] += 1
+            raise SchedulerBusy(
+                f"{self._queued()} search jobs are already queued; retry later"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].setdefault(session, deque()).append(future)
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled; hand the slot back
+                self.release(session)
+            raise
+        finally:
+            self._wait_seconds[priority] += time.monotonic() - started
+
+    def release(self, session: str = "default") -> None:
+        """Return a slot and start the next waiting call."""
+        self._running -= 1
+        self._running_by_session[session] -= 1
+        if self._running_by_session[session] <= 0:
+            del self._running_by_session[session]
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self, priority: Optional[str] = None, session: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """Hold a slot, defaulting priority and session from the current tool call."""
+        priority = priority or current_priority.get()
+        session = session or current_session.get()
+        await self.acquire(priority, session)
+        try:
+            yield
+        finally:
+            self.release(session)
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            running=self._running,
+            queued={p: self._queued(p) for p in PRIORITIES},
+            granted={p: self._granted[p] for p in PRIORITIES},
+            rejected={p: self._rejected[p] for p in PRIORITIES},
+            avg_wait_seconds={
+                p: round(self._wait_seconds[p] / self._granted[p], 3) if self._granted[p] else 0.0
+                for p in PRIORITIES
+            }
+        )
@@ -1,11 +1,15 @@
 """MCP server for Sumo Logic integration."""
 
 import asyncio
+import contextlib
 import json
 import os
 import sys
+import time
+import uuid
 from typing import Any, Dict, List, Optional, Sequence
 
+import httpx
 from dotenv import load_dotenv
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -18,7 +22,43 @@ from mcp.types import (
     INTERNAL_ERROR,
 )
 
-from .client import SumoLogicClient
+from .client import (
+    SumoLogicClient,
+    format_epoch_ms,
+    project_columns,
+    project_records,
+    record_fields,
+)
+from .deadline import MIN_REQUEST_SECONDS, Deadline, DeadlineExceeded, current_deadline
+from .downsample import MAX_DOWNSAMPLE_ROWS, downsample_query
+from .export import EXPORT_FORMATS, export_query
+from .field_stats import summarize_query
+from .freshness import (
+    DEFAULT_STALE_AFTER_SECONDS,
+    check_freshness,
+    inventory_query,
+    source_inventory,
+)
+from .job_registry import JobRegistry, default_registry_path
+from .memory_budget import MemoryBudget
+from .metadata_cache import MetadataCache
+from .profiling import ToolProfiler
+from .recorder import TraceRecorder
+from .query_cost import QueryPlan, push_down_fields
+from .sampling import stratified_sample
+from .scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    NORMAL,
+    JobScheduler,
+    current_priority,
+    current_session,
+)
+from .sharding import execute_sharded, plan_sharded_query
+from .shared_state import SharedState, default_state_path
+from .tail import LiveTail
+from .timeslice_cache import TimesliceCache
+from .warmup import WarmupScheduler, load_warmup_config
 
 
 # Load environment variables
@@ -28,6 +68,27 @@ app = Server("sumologic-mcp-server")
 
 # Initialize Sumo Logic client
 sumo_client = None
+live_tail = None
+warmup = None
+memory_budget = None
+
+# "true" profiles every tool call, "request" only calls passing "profile": true;
+# profiles are files on the server, so clients cannot ask for them by default
+PROFILE_MODE = os.getenv("MCP_PROFILE", "false").lower()
+
+# Latency budget for calls that do not pass "deadline_seconds"; 0 means none
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("MCP_DEFAULT_DEADLINE_SECONDS", "0"))
+
+# Scheduling class of the search jobs each tool starts
+TOOL_PRIORITIES = {
+    "validate_query_syntax": INTERACTIVE,
+    "get_sample_data": INTERACTIVE,
+    "list_metrics": INTERACTIVE,
+    "tail_query": INTERACTIVE,
+    "execute_query": NORMAL,
+    "explore_vmware_metrics": NORMAL,
+    "export_query": BACKGROUND,
+}
 
 
 def get_sumo_client() -> SumoLogicClient:
@@ -35,25 +96,153 @@ def get_sumo_client() -> SumoLogicClient:
     global sumo_client
     
     if sumo_client is None:
-        access_id = os.getenv("SUMO_ACCESS_ID")
-        access_key = os.getenv("SUMO_ACCESS_KEY")
-        endpoint = os.getenv("SUMO_ENDPOINT", "https://api.sumologic.com/api")
-        timeout = int(os.getenv("QUERY_TIMEOUT", "300"))
-        
-        if not access_id or not access_key:
-            raise ValueError(
-                "SUMO_ACCESS_ID and SUMO_ACCESS_KEY environment variables must be set"
-            )
-        
-        sumo_client = SumoLogicClient(access_id, access_key, endpoint, timeout)
+        sumo_client = build_sumo_client()
     
     return sumo_client
 
 
+def build_sumo_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> SumoLogicClient:
+    """Create a client configured from the environment."""
+    access_id = os.getenv("SUMO_ACCESS_ID")
+    access_key = os.getenv("SUMO_ACCESS_KEY")
+    endpoint = os.getenv("SUMO_ENDPOINT", "https://api.sumologic.com/api")
+    timeout = int(os.getenv("QUERY_TIMEOUT", "300"))
+    
+    if not access_id or not access_key:
+        raise ValueError(
+            "SUMO_ACCESS_ID and SUMO_ACCESS_KEY environment variables must be set"
+        )
+    
+    timeslice_cache = None
+    if os.getenv("TIMESLICE_CACHE_ENABLED", "true").lower() == "true":
+        settle = int(os.getenv("TIMESLICE_CACHE_SETTLE_SECONDS", "120"))
+        timeslice_cache = TimesliceCache(settle_seconds=settle)
+
+    metadata_cache = None
+    if os.getenv("METADATA_CACHE_ENABLED", "true").lower() == "true":
+        metadata_cache = MetadataCache(ttl=int(os.getenv("METADATA_CACHE_TTL", "300")))
+
+    job_registry = None
+    if os.getenv("JOB_REGISTRY_ENABLED", "false").lower() == "true":
+        job_registry = JobRegistry(
+            os.getenv("JOB_REGISTRY_PATH") or default_registry_path(),
+            relative_max_age=int(os.getenv("JOB_REGISTRY_RELATIVE_MAX_AGE", "120"))
+        )
+
+    shared_state = None
+    shared_state_path = os.getenv("SUMO_SHARED_STATE_PATH")
+    if shared_state_path:
+        shared_state = SharedState(
+            shared_state_path,
+            requests_per_second=float(os.getenv("SUMO_RATE_LIMIT_PER_SECOND", "4")),
+            max_concurrent_jobs=int(os.getenv("SUMO_MAX_CONCURRENT_JOBS", "20"))
+        )
+
+    recorder = None
+    trace_path = os.getenv("SUMO_TRACE_PATH")
+    if trace_path:
+        recorder = TraceRecorder(
+            trace_path,
+            max_bytes=int(os.getenv("SUMO_TRACE_MAX_MB", "64")) * 1024 * 1024,
+            backups=int(os.getenv("SUMO_TRACE_BACKUPS", "5")),
+            include_bodies=os.getenv("SUMO_TRACE_BODIES", "false").lower() == "true"
+        )
+
+    return SumoLogicClient(
+        access_id,
+        access_key,
+        endpoint,
+        timeout,
+        timeslice_cache=timeslice_cache,
+        shared_state=shared_state,
+        result_cache_ttl=int(os.getenv("RESULT_CACHE_TTL", "30")),
+        cost_warn_threshold=float(os.getenv("QUERY_COST_WARN", "24")),
+        cost_refuse_threshold=float(os.getenv("QUERY_COST_REFUSE", "1000")),
+        scheduler=JobScheduler(
+            max_concurrent=int(os.getenv("JOB_SCHEDULER_MAX_CONCURRENT", "10")),
+            reserved_interactive=int(os.getenv("JOB_SCHEDULER_RESERVED_INTERACTIVE", "2")),
+            max_queue_depth=int(os.getenv("JOB_SCHEDULER_MAX_QUEUE", "50"))
+        ),
+        metadata_cache=metadata_cache,
+        job_registry=job_registry,
+        recorder=recorder,
+        status_polls_per_second=float(os.getenv("SUMO_STATUS_POLLS_PER_SECOND", "4")),
+        transport=transport
+    )
+
+
+def get_live_tail() -> LiveTail:
+    """Get or create the live-tail session registry."""
+    global live_tail
+
+    if live_tail is None:
+        overlap = int(os.getenv("TAIL_OVERLAP_SECONDS", "30"))
+        live_tail = LiveTail(get_sumo_client(), overlap_seconds=overlap)
+
+    return live_tail
+
+
+def get_memory_budget() -> Optional[MemoryBudget]:
+    """Get or create the in-flight memory budget; None when disabled."""
+    global memory_budget
+
+    max_mb = int(os.getenv("MEMORY_BUDGET_MB", "512"))
+    if memory_budget is None and max_mb > 0:
+        memory_budget = MemoryBudget(
+            max_bytes=max_mb * 1024 * 1024,
+            session_bytes=int(os.getenv("MEMORY_SESSION_QUOTA_MB", "128")) * 1024 * 1024
+        )
+
+    return memory_budget
+
+
+@contextlib.asynccontextmanager
+async def background_tasks():
+    """Run the query warm-up scheduler for the lifetime of the server, if configured."""
+    global warmup
+
+    config_path = os.getenv("WARMUP_CONFIG")
+    if not config_path:
+        yield
+        return
+
+    warmup = WarmupScheduler(
+        get_sumo_client(),
+        load_warmup_config(config_path),
+        max_concurrent=int(os.getenv("WARMUP_MAX_CONCURRENT", "2"))
+    )
+    warmup.start()
+    try:
+        yield
+    finally:
+        await warmup.stop()
+
+
+def current_session_id() -> str:
+    """Identify the MCP session whose tool call is being handled.
+
+    Streamable HTTP sessions are named by the ``mcp-session-id`` header their
+    client sends with every request; other sessions are given a uuid that
+    lives as long as the session object does.
+    """
+    try:
+        context = app.request_context
+    except LookupError:
+        return "default"
+    request = getattr(context, "request", None)
+    header = request.headers.get("mcp-session-id") if request is not None else None
+    if header:
+        return header
+    session = context.session
+    if getattr(session, "sumo_session_id", None) is None:
+        session.sumo_session_id = uuid.uuid4().hex
+    return session.sumo_session_id
+
+
 @app.list_tools()
 async def list_tools() -> List[Tool]:
     """List available tools."""
-    return [
+    tools = [
         Tool(
             name="execute_query",
             description="Execute a Sumo Logic search query",
@@ -80,6 +269,62 @@ async def list_tools() -> List[Tool]:
                         "default": 1000,
                         "minimum": 1,
                         "maximum": 10000
+                    },
+                    "force": {
+                        "type": "boolean",
+                        "description": "Run even if the estimated cost is above the refusal threshold",
+                        "default": False
+                    },
+                    "shards": {
+                        "type": "integer",
+                        "description": (
+                            "Split an aggregate query (count/sum/avg/min/max/count_distinct/pct "
+                            "by fields) into this many parallel time shards and merge the results"
+                        ),
+                        "default": 1,
+                        "minimum": 1,
+                        "maximum": 16
+                    },
+                    "output": {
+                        "type": "string",
+                        "enum": ["records", "summary"],
+                        "description": (
+                            "'records' shows sample rows; 'summary' scans every result and "
+                            "reports per-field null rate, distinct count, numeric range and top values"
+                        ),
+                        "default": "records"
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": (
+                            "Only return these fields; pushed into the query as "
+                            "'| fields ...' where safe, and applied to every page as it is parsed"
+                        )
+                    },
+                    "downsample": {
+                        "type": "integer",
+                        "description": (
+                            "For timeslice results: fetch every row and reduce each series "
+                            "(one per group-by key) to about this many points"
+                        ),
+                        "minimum": 2,
+                        "maximum": 5000
+                    },
+                    "downsample_method": {
+                        "type": "string",
+                        "enum": ["minmax", "lttb"],
+                        "description": (
+                            "'minmax' keeps each bucket's lowest and highest point (bounded memory); "
+                            "'lttb' keeps the points that best preserve the visual shape"
+                        ),
+                        "default": "minmax"
+                    },
+                    "downsample_max_rows": {
+                        "type": "integer",
+                        "description": "Stop reading a downsampled result after this many rows",
+                        "default": MAX_DOWNSAMPLE_ROWS,
+                        "minimum": 1
                     }
                 },
                 "required": ["query"]
@@ -149,11 +394,78 @@ async def list_tools() -> List[Tool]:
                         "default": 10,
                         "minimum": 1,
                         "maximum": 100
+                    },
+                    "strategy": {
+                        "type": "string",
+                        "enum": ["first", "stratified"],
+                        "description": (
+                            "'first' returns the first messages found; 'stratified' "
+                            "spreads the sample evenly across the time range"
+                        ),
+                        "default": "first"
+                    },
+                    "time_range": {
+                        "type": "string",
+                        "description": "Time range to sample (e.g., '-1h', '-24h')",
+                        "default": "-1h"
+                    },
+                    "buckets": {
+                        "type": "integer",
+                        "description": "Number of time buckets for stratified sampling",
+                        "default": 6,
+                        "minimum": 1,
+                        "maximum": 24
+                    },
+                    "by_host": {
+                        "type": "boolean",
+                        "description": "Also spread a stratified sample across _sourceHost",
+                        "default": False
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": (
+                            "Only return these fields; pushed into the query as "
+                            "'| fields ...' where safe, and applied to every page as it is parsed"
+                        )
                     }
                 },
                 "required": ["source_category"]
             }
         ),
+        Tool(
+            name="tail_query",
+            description=(
+                "Follow a Sumo Logic query, returning only messages that arrived "
+                "since the previous call with the same session_token"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The Sumo Logic search query to follow"
+                    },
+                    "session_token": {
+                        "type": "string",
+                        "description": "Token returned by a previous call; omit to start a new tail"
+                    },
+                    "initial_window": {
+                        "type": "string",
+                        "description": "Look-back window for the first call (e.g., '-5m')",
+                        "default": "-5m"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of new messages to return per call (oldest first)",
+                        "default": 100,
+                        "minimum": 1,
+                        "maximum": 10000
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
         Tool(
             name="explore_vmware_metrics",
             description="Explore available VMware metrics and their attributes",
@@ -167,35 +479,240 @@ async def list_tools() -> List[Tool]:
                     }
                 }
             }
+        ),
+        Tool(
+            name="export_query",
+            description=(
+                "Run a query and stream all results to a local file, returning the "
+                "path, row count and schema instead of the data"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The Sumo Logic search query to export"
+                    },
+                    "from_time": {
+                        "type": "string",
+                        "description": "Start time for the search (e.g., '-1h', '-24h', '2023-01-01T00:00:00')",
+                        "default": "-1h"
+                    },
+                    "to_time": {
+                        "type": "string",
+                        "description": "End time for the search (e.g., 'now', '2023-01-01T23:59:59')",
+                        "default": "now"
+                    },
+                    "format": {
+                        "type": "string",
+                        "description": "Output format; parquet and arrow need pyarrow installed",
+                        "enum": list(EXPORT_FORMATS),
+                        "default": "ndjson"
+                    },
+                    "path": {
+                        "type": "string",
+                        "description": "File name relative to the export directory (default: export-<job id>)"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="source_freshness",
+            description=(
+                "Report how long ago each source last delivered data, from one "
+                "aggregate search over the cached source inventory"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pattern": {
+                        "type": "string",
+                        "description": "Only check source categories containing this text (e.g., 'otel', 'vmware')"
+                    },
+                    "time_range": {
+                        "type": "string",
+                        "description": "How far back to look; sources silent for longer are reported as silent",
+                        "default": "-1h"
+                    },
+                    "stale_after_seconds": {
+                        "type": "number",
+                        "description": "Ingest lag above which a source is reported as stale",
+                        "default": DEFAULT_STALE_AFTER_SECONDS,
+                        "minimum": 0
+                    },
+                    "shards": {
+                        "type": "integer",
+                        "description": "Split the search window into this many parallel jobs",
+                        "default": 1,
+                        "minimum": 1,
+                        "maximum": 16
+                    },
+                    "force": {
+                        "type": "boolean",
+                        "description": "Run even if the estimated cost is above the refusal threshold",
+                        "default": False
+                    }
+                }
+            }
+        ),
+        Tool(
+            name="server_stats",
+            description=(
+                "Show server internals: search-job scheduling, metadata cache "
+                "and warm-up query hit rates and refresh lag"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {}
+            }
         )
     ]
 
+    for tool in tools:
+        if PROFILE_MODE == "request":
+            tool.inputSchema.setdefault("properties", {})["profile"] = {
+                "type": "boolean",
+                "description": "Profile this call and write a flame-graph-compatible stack profile",
+                "default": False
+            }
+        tool.inputSchema.setdefault("properties", {})["deadline_seconds"] = {
+            "type": "number",
+            "description": (
+                "Latency budget for this call; when it runs out the partial result "
+                "found so far is returned, marked as truncated by deadline"
+            ),
+            "exclusiveMinimum": 0
+        }
+    return tools
+
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Dict[str, Any]) -> Sequence[TextContent]:
     """Handle tool calls."""
     try:
         client = get_sumo_client()
-        
-        if name == "execute_query":
-            return await execute_query_tool(client, arguments)
-        elif name == "list_source_categories":
-            return await list_source_categories_tool(client, arguments)
-        elif name == "list_metrics":
-            return await list_metrics_tool(client, arguments)
-        elif name == "validate_query_syntax":
-            return await validate_query_syntax_tool(client, arguments)
-        elif name == "get_sample_data":
-            return await get_sample_data_tool(client, arguments)
-        elif name == "explore_vmware_metrics":
-            return await explore_vmware_metrics_tool(client, arguments)
-        else:
-            raise McpError(INVALID_PARAMS, f"Unknown tool: {name}")
+        session = current_session_id()
+        current_session.set(session)
+        current_priority.set(TOOL_PRIORITIES.get(name, NORMAL))
+
+        run = dispatch_tool
+        requested = arguments.pop("profile", False) and PROFILE_MODE == "request"
+        if (requested or PROFILE_MODE == "true") and name in {t.name for t in await list_tools()}:
+            run = profiled_tool_call
+
+        deadline_seconds = arguments.pop("deadline_seconds", None) or DEFAULT_DEADLINE_SECONDS
+        deadline = Deadline(float(deadline_seconds)) if deadline_seconds else None
+
+        budget = get_memory_budget()
+        # Stats must stay reachable while the budget is exhausted
+        if budget is None or name == "server_stats":
+            return await deadline_tool_call(run, client, name, arguments, deadline)
+        async with budget.call(session) as memory:
+            result = await deadline_tool_call(run, client, name, arguments, deadline)
+            memory.adjust(sum(len(item.text) for item in result))
+            return result
             
     except Exception as e:
         raise McpError(INTERNAL_ERROR, f"Tool execution failed: {str(e)}")
 
 
+async def dispatch_tool(
+    client: SumoLogicClient,
+    name: str,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Route a tool call to its implementation."""
+    if name == "execute_query":
+        return await execute_query_tool(client, arguments)
+    elif name == "list_source_categories":
+        return await list_source_categories_tool(client, arguments)
+    elif name == "list_metrics":
+        return await list_metrics_tool(client, arguments)
+    elif name == "validate_query_syntax":
+        return await validate_query_syntax_tool(client, arguments)
+    elif name == "get_sample_data":
+        return await get_sample_data_tool(client, arguments)
+    elif name == "explore_vmware_metrics":
+        return await explore_vmware_metrics_tool(client, arguments)
+    elif name == "tail_query":
+        return await tail_query_tool(get_live_tail(), arguments)
+    elif name == "export_query":
+        return await export_query_tool(client, arguments)
+    elif name == "source_freshness":
+        return await source_freshness_tool(client, arguments)
+    elif name == "server_stats":
+        return await server_stats_tool(client, arguments)
+    else:
+        raise McpError(INVALID_PARAMS, f"Unknown tool: {name}")
+
+
+async def deadline_tool_call(
+    run,
+    client: SumoLogicClient,
+    name: str,
+    arguments: Dict[str, Any],
+    deadline: Optional[Deadline]
+) -> Sequence[TextContent]:
+    """Run a tool call under a deadline and mark any answer the deadline cut short."""
+    if deadline is None:
+        return await run(client, name, arguments)
+
+    token = current_deadline.set(deadline)
+    try:
+        result = list(await run(client, name, arguments))
+    except (DeadlineExceeded, httpx.TimeoutException) as e:
+        # Timeouts that the deadline did not shorten are real failures
+        if isinstance(e, httpx.TimeoutException) and deadline.remaining() > MIN_REQUEST_SECONDS:
+            raise
+        deadline.truncate(str(e) or "a request that ran out of time")
+        result = [TextContent(type="text", text="No results were found before the deadline.")]
+    finally:
+        current_deadline.reset(token)
+
+    if deadline.truncated:
+        marker = (
+            f"⚠️  Truncated by deadline ({deadline.seconds:g}s): partial results only. "
+            f"Cut short: {'; '.join(deadline.truncated)}"
+        )
+        result.insert(0, TextContent(type="text", text=marker))
+    return result
+
+
+async def profiled_tool_call(
+    client: SumoLogicClient,
+    name: str,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Run a tool call under the sampling profiler and append its summary.
+
+    File names come from the tool name and a server-generated id, never
+    from the client's request id.
+    """
+    profiler = ToolProfiler(
+        name,
+        f"{int(time.time())}-{uuid.uuid4().hex[:12]}",
+        os.getenv("MCP_PROFILE_DIR", "profiles"),
+        interval=float(os.getenv("MCP_PROFILE_INTERVAL_MS", "5")) / 1000
+    )
+    async with profiler:
+        result = await dispatch_tool(client, name, arguments)
+
+    summary = profiler.summary
+    output = []
+    output.append("Profile:")
+    output.append(f"  Duration: {summary.duration_seconds}s ({summary.samples} samples)")
+    output.append(f"  Waiting on I/O: {summary.idle_fraction:.0%}")
+    output.append(
+        f"  Event loop lag: mean {summary.loop_lag_ms['mean']}ms, "
+        f"p95 {summary.loop_lag_ms['p95']}ms, max {summary.loop_lag_ms['max']}ms"
+    )
+    output.append(f"  Flame graph input: {summary.profile_path}")
+    output.append(f"  Summary: {summary.summary_path}")
+
+    return list(result) + [TextContent(type="text", text="\n".join(output))]
+
+
 async def execute_query_tool(
     client: SumoLogicClient, 
     arguments: Dict[str, Any]
@@ -205,13 +722,72 @@ async def execute_query_tool(
     from_time = arguments.get("from_time", "-1h")
     to_time = arguments.get("to_time", "now")
     limit = arguments.get("limit", 1000)
-    
-    result = await client.execute_query(query, from_time, to_time, limit)
+    force = arguments.get("force", False)
+    shards = arguments.get("shards", 1)
+    fields = arguments.get("fields") or None
+
+    plan = client.analyze_query(query, from_time, to_time, limit)
+    if plan.level == "refuse" and not force:
+        raise ValueError(
+            f"Query refused: estimated cost {plan.estimate.score} exceeds "
+            f"{client.cost_refuse_threshold} ({'; '.join(plan.estimate.warnings)}). "
+            "Narrow the time range or add a _sourceCategory/_index scope, "
+            "or pass force=true to run it anyway"
+        )
+
+    if arguments.get("output", "records") == "summary":
+        return await summarize_query_tool(client, query, from_time, to_time, plan)
+    if arguments.get("downsample"):
+        return await downsample_query_tool(
+            client, query, from_time, to_time, plan,
+            arguments["downsample"], arguments.get("downsample_method", "minmax"),
+            arguments.get("downsample_max_rows", MAX_DOWNSAMPLE_ROWS)
+        )
+
+    result = None
+    warm_age = None
+    sharded = None
+    shard_plan = plan_sharded_query(plan.query) if shards > 1 else None
+    if warmup is not None:
+        result = warmup.lookup(query, from_time, to_time, limit)
+        if result is not None:
+            warm_age = warmup.age(query, from_time, to_time)
+    if result is None and shard_plan is not None:
+        sharded = await execute_sharded(client, shard_plan, from_time, to_time, shards, limit)
+        result = sharded.result
+    executed = plan.query
+    if result is None:
+        if fields:
+            executed = push_down_fields(plan.query, fields) or plan.query
+        result = await client.execute_query(executed, from_time, to_time, limit, fields)
+    elif fields:
+        # Warm and sharded results are shared, so project a copy
+        result = result.model_copy(update={
+            "records": project_records(result.records, fields),
+            "fields": project_columns(result.fields, fields)
+        })
     
     # Format results for better readability
     output = []
     output.append(f"Query: {query}")
+    if executed != query:
+        output.append(f"Executed as: {executed}")
     output.append(f"Time range: {from_time} to {to_time}")
+    if plan.level != "ok":
+        output.append(f"⚠️  Estimated cost {plan.estimate.score}: " + "; ".join(plan.estimate.warnings))
+    if warm_age is not None:
+        output.append(f"Served from warm-up cache (refreshed {warm_age:.0f}s ago)")
+    if result.reused_job_seconds is not None:
+        output.append(
+            f"Reused a search job started {result.reused_job_seconds:.0f}s ago by an earlier "
+            "server process; its window ends then, not now"
+        )
+    if sharded is not None:
+        output.append(f"Sharded into {sharded.shards} parallel jobs of: {sharded.shard_query}")
+        if sharded.truncated:
+            output.append("⚠️  A shard had too many groups; merged results are incomplete")
+    elif shards > 1 and warm_age is None:
+        output.append("Not a shardable aggregate; ran as a single job")
     output.append(f"Total results: {result.total_count}")
     output.append(f"Returned: {len(result.records)}")
     output.append("=" * 50)
@@ -238,6 +814,105 @@ async def execute_query_tool(
     return [TextContent(type="text", text="\n".join(output))]
 
 
+async def summarize_query_tool(
+    client: SumoLogicClient,
+    query: str,
+    from_time: str,
+    to_time: str,
+    plan: QueryPlan
+) -> Sequence[TextContent]:
+    """Describe the distribution of each field over all of a query's results."""
+    summary = await summarize_query(client, query, from_time, to_time)
+
+    output = []
+    output.append(f"Query: {query}")
+    output.append(f"Time range: {from_time} to {to_time}")
+    if plan.level != "ok":
+        output.append(f"⚠️  Estimated cost {plan.estimate.score}: " + "; ".join(plan.estimate.warnings))
+    output.append(f"Total results: {summary.total_count}")
+    output.append(f"Rows summarized: {summary.rows_scanned}")
+    if summary.truncated_by_deadline:
+        output.append(
+            f"⚠️  Truncated by deadline: summarized {summary.rows_scanned} of "
+            f"{summary.total_count} rows"
+        )
+    output.append("=" * 50)
+
+    for field in summary.fields:
+        line = (
+            f"{field.name}: {1 - field.null_rate:.1%} present, "
+            f"~{field.distinct_estimate} distinct"
+        )
+        if field.numeric:
+            line += f", min {field.min:g}, max {field.max:g}, mean {field.mean:g}"
+        output.append(line)
+        if field.top_values:
+            top = ", ".join(
+                f"{json.dumps(item['value'])[:80]} ({item['count']})"
+                for item in field.top_values
+            )
+            output.append(f"  top: {top}")
+
+    if summary.unprofiled_fields:
+        output.append(f"Not profiled ({len(summary.unprofiled_fields)} fields over the limit): "
+                      + ", ".join(summary.unprofiled_fields[:20]))
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
+async def downsample_query_tool(
+    client: SumoLogicClient,
+    query: str,
+    from_time: str,
+    to_time: str,
+    plan: QueryPlan,
+    target_points: int,
+    method: str,
+    max_rows: int = MAX_DOWNSAMPLE_ROWS
+) -> Sequence[TextContent]:
+    """Return every series of a timeslice query reduced to about ``target_points`` points."""
+    result = await downsample_query(
+        client, query, from_time, to_time, target_points, method, max_rows=max_rows
+    )
+
+    output = []
+    output.append(f"Query: {query}")
+    output.append(f"Time range: {from_time} to {to_time}")
+    if plan.level != "ok":
+        output.append(f"⚠️  Estimated cost {plan.estimate.score}: " + "; ".join(plan.estimate.warnings))
+    if result.shape is None:
+        output.append("No results before the deadline" if result.truncated_by_deadline else "No results")
+        return [TextContent(type="text", text="\n".join(output))]
+
+    shape = result.shape
+    output.append(
+        f"Downsampled ({method}) {result.input_rows} rows to {result.output_rows} "
+        f"({result.reduction:.1%} fewer) across {result.series} series"
+    )
+    output.append(
+        f"Time: {shape.time_field}, value: {shape.value_field}, series by: "
+        + (", ".join(shape.group_fields) or "(single series)")
+    )
+    if result.skipped_rows:
+        output.append(f"Skipped {result.skipped_rows} rows without a time or numeric value")
+    if result.total_rows > max_rows:
+        output.append(
+            f"⚠️  Read only the first {max_rows} of {result.total_rows} rows (downsample_max_rows)"
+        )
+    if result.truncated_by_deadline:
+        output.append(
+            f"⚠️  Truncated by deadline: downsampled the first "
+            f"{result.input_rows + result.skipped_rows} rows only"
+        )
+    output.append("=" * 50)
+
+    # One compact line per point, already ordered by series then time
+    for record in result.records:
+        output.append(json.dumps(record_fields(record), default=str))
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
 async def list_source_categories_tool(
     client: SumoLogicClient,
     arguments: Dict[str, Any]
@@ -266,6 +941,62 @@ async def list_source_categories_tool(
     return [TextContent(type="text", text="\n".join(output))]
 
 
+async def source_freshness_tool(
+    client: SumoLogicClient,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Report the ingest lag of each source, worst first."""
+    pattern = arguments.get("pattern", "")
+    time_range = arguments.get("time_range", "-1h")
+    stale_after = arguments.get("stale_after_seconds", DEFAULT_STALE_AFTER_SECONDS)
+
+    shards = arguments.get("shards", 1)
+    force = arguments.get("force", False)
+
+    inventory = await source_inventory(client, pattern)
+    plan = client.analyze_query(inventory_query(inventory, pattern), time_range, "now", 1)
+    if plan.level == "refuse" and not force:
+        raise ValueError(
+            f"Freshness check refused: estimated cost {plan.estimate.score} exceeds "
+            f"{client.cost_refuse_threshold} ({'; '.join(plan.estimate.warnings)}). "
+            "Shorten time_range or narrow it with a pattern, or pass force=true to run it anyway"
+        )
+
+    report = await check_freshness(client, inventory, pattern, time_range, stale_after, shards)
+
+    output = []
+    output.append(f"Query: {report.query}")
+    output.append(f"Time range: {time_range} to now")
+    if plan.level != "ok":
+        output.append(f"⚠️  Estimated cost {plan.estimate.score}: " + "; ".join(plan.estimate.warnings))
+    output.append(
+        f"Checked {len(report.sources)} sources ({report.inventory_sources} in the inventory) "
+        f"with {report.jobs} search job{'s' if report.jobs != 1 else ''}"
+    )
+    output.append(
+        f"Silent: {report.count('silent')}, stale (> {stale_after:g}s): {report.count('stale')}, "
+        f"ok: {report.count('ok')}"
+    )
+    output.append("=" * 50)
+
+    for source in report.sources:
+        line = f"  [{source.status}] {source.category} @ {source.collector or '(unknown collector)'}"
+        if source.status == "silent":
+            line += f": no data since {time_range}"
+        elif source.last_receipt_ms is None:
+            line += f": {source.messages} messages without a receipt time"
+        else:
+            line += (
+                f": last received {format_epoch_ms(source.last_receipt_ms)} "
+                f"({source.lag_seconds:g}s ago), {source.messages} messages"
+            )
+        if not source.in_inventory:
+            line += " (not in the source inventory)"
+        output.append(line)
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
 async def list_metrics_tool(
     client: SumoLogicClient,
     arguments: Dict[str, Any]
@@ -309,6 +1040,7 @@ async def validate_query_syntax_tool(
     else:
         output.append("❌ Query syntax is invalid")
         output.append(f"Error: {validation_result['message']}")
+    output.append(f"Checked: {validation_result.get('source', 'remote')}")
     
     return [TextContent(type="text", text="\n".join(output))]
 
@@ -320,14 +1052,37 @@ async def get_sample_data_tool(
     """Get sample data from a source category."""
     source_category = arguments["source_category"]
     limit = arguments.get("limit", 10)
-    
-    query = f'_sourceCategory="{source_category}" | limit {limit}'
-    
-    result = await client.execute_query(query, "-1h", "now", limit)
+    time_range = arguments.get("time_range", "-1h")
+    fields = arguments.get("fields") or None
     
     output = []
     output.append(f"Sample data from: {source_category}")
-    output.append(f"Showing {len(result.records)} records")
+
+    if arguments.get("strategy", "first") == "stratified":
+        result = await stratified_sample(
+            client,
+            source_category,
+            limit=limit,
+            from_time=time_range,
+            buckets=arguments.get("buckets", 6),
+            by_host=arguments.get("by_host", False),
+            fields=fields
+        )
+        output.append(
+            f"Showing {len(result.records)} records from {len(result.buckets)} time buckets"
+            + (f" and {result.hosts} hosts" if arguments.get("by_host") else "")
+        )
+        for bucket in result.buckets:
+            output.append(
+                f"  {bucket.from_time} - {bucket.to_time}: "
+                f"{bucket.selected} of {bucket.available} fetched"
+            )
+    else:
+        query = f'_sourceCategory="{source_category}" | limit {limit}'
+        if fields:
+            query = push_down_fields(query, fields) or query
+        result = await client.execute_query(query, time_range, "now", limit, fields, early=True)
+        output.append(f"Showing {len(result.records)} records")
     output.append("=" * 50)
     
     if result.fields:
@@ -393,11 +1148,221 @@ async def explore_vmware_metrics_tool(
     return [TextContent(type="text", text="\n".join(output))]
 
 
+async def tail_query_tool(
+    tail: LiveTail,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Return new messages for a live-tail session."""
+    query = arguments["query"]
+    token = arguments.get("session_token")
+    initial_window = arguments.get("initial_window", "-5m")
+    limit = arguments.get("limit", 100)
+
+    result = await tail.poll(
+        query, token, initial_window, limit, namespace=current_session_id()
+    )
+
+    output = []
+    output.append(f"Query: {query}")
+    output.append(f"Session token: {result.token}")
+    output.append(f"Time range: {result.from_time} to {result.to_time}")
+    output.append(f"New messages: {len(result.records)}")
+    output.append(f"Duplicates skipped: {result.duplicates_skipped}")
+    if result.truncated:
+        output.append(f"⚠️  More than {limit} new messages; returned the oldest, call again for the rest")
+    output.append("=" * 50)
+
+    for record in result.records:
+        output.append(json.dumps(record, indent=2, default=str))
+        output.append("")
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
+async def export_query_tool(
+    client: SumoLogicClient,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Export every result of a query to a local file."""
+    query = arguments["query"]
+    from_time = arguments.get("from_time", "-1h")
+    to_time = arguments.get("to_time", "now")
+    fmt = arguments.get("format", "ndjson")
+
+    result = await export_query(
+        client,
+        query,
+        os.getenv("EXPORT_DIR", "exports"),
+        from_time,
+        to_time,
+        path=arguments.get("path"),
+        fmt=fmt,
+        concurrency=int(os.getenv("EXPORT_CONCURRENCY", "4"))
+    )
+
+    output = []
+    output.append(f"Query: {query}")
+    output.append(f"Time range: {from_time} to {to_time}")
+    output.append("=" * 50)
+    output.append(f"Exported {result.row_count} rows in {result.pages} pages to {result.path}")
+    if result.truncated_by_deadline:
+        output.append("⚠️  Truncated by deadline: the file holds only the rows fetched in time")
+    output.append(f"Format: {result.format}")
+    output.append(f"Search job: {result.job_seconds}s, download and write: {result.fetch_seconds}s")
+    output.append("Schema:")
+    for field in result.fields:
+        output.append(f"  - {field.get('name', 'unknown')}: {field.get('fieldType', 'unknown')}")
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
+async def server_stats_tool(
+    client: SumoLogicClient,
+    arguments: Dict[str, Any]
+) -> Sequence[TextContent]:
+    """Report scheduler, cache and warm-up statistics."""
+    output = []
+    output.append("Server stats")
+    output.append("=" * 50)
+
+    if client.scheduler is not None:
+        stats = client.scheduler.stats()
+        output.append(f"Search jobs: {stats.running} running")
+        for priority in stats.queued:
+            output.append(
+                f"  {priority}: {stats.queued[priority]} queued, {stats.granted[priority]} granted, "
+                f"{stats.rejected[priority]} rejected, avg wait {stats.avg_wait_seconds[priority]}s"
+            )
+
+    stats = client.job_monitor.stats()
+    expected = f"{stats.expected_seconds}s" if stats.expected_seconds is not None else "unknown"
+    output.append(
+        f"Job status polling: {stats.jobs} jobs watched by {stats.waiters} waiters, "
+        f"{stats.polls} polls for {stats.completed} completed jobs ({stats.polls_per_job} per job), "
+        f"expected job time {expected}"
+    )
+
+    if client.metadata_cache is not None:
+        stats = client.metadata_cache.stats()
+        output.append(
+            f"Metadata cache: {stats.entries} entries, {stats.fresh_hits} fresh hits, "
+            f"{stats.not_modified} not modified, {stats.unchanged_body} unchanged, {stats.misses} misses"
+        )
+
+    budget = get_memory_budget()
+    if budget is not None:
+        stats = budget.stats()
+        mib = 1024 * 1024
+        output.append(
+            f"Memory budget: {stats.used_bytes / mib:.1f} of {stats.max_bytes / mib:.0f} MiB in use "
+            f"(peak {stats.peak_bytes / mib:.1f} MiB), {stats.calls_in_flight} calls in flight, "
+            f"{stats.waiting} waiting, {stats.waits} waits averaging {stats.avg_wait_seconds}s"
+        )
+        for session, used in sorted(stats.sessions.items(), key=lambda item: -item[1])[:10]:
+            output.append(f"  session {session}: {used / mib:.1f} MiB")
+
+    if client.job_registry is not None:
+        jobs = client.job_registry.jobs()
+        output.append(
+            f"Job registry: {len(jobs)} live jobs, "
+            f"{client.job_registry.reattached} reattached by this process"
+        )
+
+    if warmup is not None:
+        stats = warmup.stats()
+        output.append(
+            f"Warm-up: hit rate {stats.hit_rate:.0%} ({stats.hits} hits, {stats.misses} not ready, "
+            f"{stats.uncovered} other queries), {stats.refreshing} refreshing"
+        )
+        for query in stats.queries:
+            age = f"{query.age_seconds}s old" if query.age_seconds is not None else "not yet loaded"
+            line = (
+                f"  {query.name}: {age}, {query.hits} hits, {query.misses} misses, "
+                f"refresh lag {query.refresh_lag_seconds}s, last refresh took {query.last_refresh_seconds}s"
+            )
+            if query.last_error:
+                line += f", last error: {query.last_error}"
+            output.append(line)
+    else:
+        output.append("Warm-up: not configured (set WARMUP_CONFIG)")
+
+    return [TextContent(type="text", text="\n".join(output))]
+
+
+def create_http_app(stateless: Optional[bool] = None):
+    """Build an ASGI app serving MCP over streamable HTTP (/mcp) and SSE (/sse).
+
+    Every connected session shares this process's Sumo Logic client and
+    caches; per-session state such as tail cursors is kept apart.
+
+    Sessions live in the memory of the process that opened them, so when
+    requests may land on any of several workers the app is built
+    ``stateless`` (default: ``MCP_STATELESS``): each /mcp request stands on
+    its own and the SSE endpoints, which cannot work without sessions, are
+    not served.
+    """
+    from mcp.server.sse import SseServerTransport
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+
+    if stateless is None:
+        stateless = os.getenv("MCP_STATELESS", "false").lower() == "true"
+    session_manager = StreamableHTTPSessionManager(app=app, stateless=stateless)
+    routes = [Mount("/mcp", app=session_manager.handle_request)]
+
+    if not stateless:
+        sse = SseServerTransport("/messages/")
+
+        async def handle_sse(request):
+            async with sse.connect_sse(
+                request.scope, request.receive, request._send
+            ) as (read_stream, write_stream):
+                await app.run(read_stream, write_stream, app.create_initialization_options())
+            return Response()
+
+        routes += [
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+        ]
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_starlette_app):
+        async with session_manager.run(), background_tasks():
+            yield
+
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
 def main():
     """Main entry point for the MCP server."""
+    import argparse
     import sys
     from mcp.server.stdio import stdio_server
-    
+
+    parser = argparse.ArgumentParser(description="Sumo Logic MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("MCP_TRANSPORT", "stdio"),
+        help="stdio for a single client, http to serve many sessions (streamable HTTP and SSE)"
+    )
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("MCP_SOCKET"),
+        help="Unix domain socket to listen on instead of host/port"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("MCP_WORKERS", "1")),
+        help="Worker processes for the http transport; they share cache and rate limits"
+    )
+    args = parser.parse_args()
+
     # Validate environment variables
     if not os.getenv("SUMO_ACCESS_ID") or not os.getenv("SUMO_ACCESS_KEY"):
         print("Error: SUMO_ACCESS_ID and SUMO_ACCESS_KEY environment variables must be set", file=sys.stderr)
@@ -406,12 +1371,43 @@ def main():
     
     print(f"Starting Sumo Logic MCP Server", file=sys.stderr)
     print(f"Sumo Logic endpoint: {os.getenv('SUMO_ENDPOINT', 'https://api.sumologic.com/api')}", file=sys.stderr)
+
+    if args.transport == "http":
+        import uvicorn
+
+        where = args.socket or f"http://{args.host}:{args.port}"
+        print(f"Serving MCP on {where} (/mcp streamable HTTP, /sse SSE)", file=sys.stderr)
+
+        if args.workers > 1:
+            # Workers inherit the environment, so they all open the same state
+            # file; by default one private to this user
+            if not os.getenv("SUMO_SHARED_STATE_PATH"):
+                os.environ["SUMO_SHARED_STATE_PATH"] = default_state_path("state.sqlite")
+            # A session's requests may reach any worker, so no worker keeps sessions
+            os.environ["MCP_STATELESS"] = "true"
+            print(
+                f"Workers: {args.workers} (shared state: {os.environ['SUMO_SHARED_STATE_PATH']}, "
+                "stateless /mcp only, no SSE)",
+                file=sys.stderr
+            )
+            uvicorn.run(
+                "sumologic_mcp_server.server:create_http_app",
+                factory=True,
+                host=args.host,
+                port=args.port,
+                uds=args.socket,
+                workers=args.workers
+            )
+        else:
+            uvicorn.run(create_http_app(), host=args.host, port=args.port, uds=args.socket)
+        return 0
+
     print("Server ready for connections...", file=sys.stderr)
     
     # Run the MCP server
     async def run_server():
-        async with stdio_server() as (read_stream, write_stream):
-            await app.run(read_stream, write_stream, {})
+        async with background_tasks(), stdio_server() as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
     
     asyncio.run(run_server())
     return 0
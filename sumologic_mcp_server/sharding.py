@@ -0,0 +1,381 @@
+"""Run aggregate queries as parallel time shards and merge the partial aggregates.
+
+A query like ``... | avg(latency) as lat, count by host | sort by lat`` is
+rewritten so each shard returns partials that can be combined exactly
+(counts and sums add, averages become sum/count, min/max take the extreme)
+or approximately (distinct counts through a HyperLogLog over the values,
+percentiles from a weighted merge of per-shard quantiles).
+"""
+
+import asyncio
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .client import SearchResult, SumoLogicClient, parse_epoch_ms, record_fields
+from .field_stats import HyperLogLog
+from .query_parser import is_per_message_query, split_stages, stage_operator
+
+MAX_SHARDS = 16
+MAX_ROWS_PER_SHARD = 100_000
+# Per-shard quantiles whose weighted merge approximates a percentile
+QUANTILE_POINTS = (1, 5, 10, 20, 25, 30, 40, 50, 60, 70, 75, 80, 90, 95, 99)
+
+_IDENT = r"[A-Za-z_][\w]*"
+_AGG_ITEM_RE = re.compile(
+    rf"^(count_distinct|count|sum|avg|min|max|pct)\s*(?:\(\s*([^()]*?)\s*\))?"
+    rf"(?:\s+as\s+({_IDENT}))?$",
+    re.IGNORECASE
+)
+_SORT_RE = re.compile(
+    rf"^(?:sort|order)(?:\s+by)?\s+([+-]?)({_IDENT})(?:\s+(asc|desc))?$", re.IGNORECASE
+)
+_LIMIT_RE = re.compile(r"^limit\s+(\d+)$", re.IGNORECASE)
+_DEFAULT_NAMES = {
+    "count": "_count", "sum": "_sum", "avg": "_avg", "min": "_min", "max": "_max",
+    "count_distinct": "_count_distinct",
+}
+
+
+class Aggregate(BaseModel):
+    """One aggregate of the sharded stage."""
+    operator: str
+    field: Optional[str] = None
+    percentile: Optional[float] = None
+    name: str
+
+
+class ShardPlan(BaseModel):
+    """A recognized aggregate query and the query each shard runs."""
+    aggregates: List[Aggregate]
+    group_by: List[str]
+    shard_query: str
+    sort_field: Optional[str] = None
+    sort_descending: bool = True
+    limit: Optional[int] = None
+    # Extra group-by fields whose values feed distinct-count sketches
+    distinct_fields: List[str] = Field(default_factory=list)
+
+
+def _split_top_level(text: str, separator: str = ",") -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        depth += char == "("
+        depth -= char == ")"
+        if char == separator and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current).strip())
+    return parts
+
+
+def _split_by(stage: str) -> Tuple[str, List[str]]:
+    for match in re.finditer(r"\s+by\s+", stage, re.IGNORECASE):
+        before = stage[:match.start()]
+        if before.count("(") == before.count(")"):
+            return stage[:match.start()].strip(), _split_top_level(stage[match.end():])
+    return stage.strip(), []
+
+
+def _parse_aggregates(head: str) -> Optional[List[Aggregate]]:
+    aggregates = []
+    for item in _split_top_level(head):
+        match = _AGG_ITEM_RE.match(item)
+        if not match:
+            return None
+        operator, args, alias = match.group(1).lower(), match.group(2), match.group(3)
+        arguments = [arg.strip() for arg in args.split(",")] if args else []
+        percentile = None
+        if operator == "pct":
+            if len(arguments) != 2:
+                return None
+            try:
+                percentile = float(arguments[1])
+            except ValueError:
+                return None
+            name = alias or f"_{arguments[0]}_pct_{arguments[1]}"
+        elif operator == "count":
+            if len(arguments) > 1:
+                return None
+            name = alias or _DEFAULT_NAMES[operator]
+        elif len(arguments) != 1:
+            return None
+        else:
+            name = alias or _DEFAULT_NAMES[operator]
+        field = arguments[0] if arguments else None
+        if field is not None and not re.fullmatch(_IDENT, field):
+            return None
+        aggregates.append(Aggregate(
+            operator=operator, field=field, percentile=percentile, name=name.lower()
+        ))
+    return aggregates
+
+
+def _partials(index: int, aggregate: Aggregate) -> List[str]:
+    """Per-shard aggregate expressions for one final aggregate."""
+    prefix = f"shard{index}"
+    field = aggregate.field
+    if aggregate.operator == "count":
+        return [f"count({field}) as {prefix}" if field else f"count as {prefix}"]
+    if aggregate.operator in ("sum", "min", "max"):
+        return [f"{aggregate.operator}({field}) as {prefix}"]
+    if aggregate.operator == "avg":
+        return [f"sum({field}) as {prefix}_sum", f"count({field}) as {prefix}_n"]
+    if aggregate.operator == "pct":
+        points = sorted(set(QUANTILE_POINTS) | {aggregate.percentile})
+        return [f"count({field}) as {prefix}_n"] + [
+            f"pct({field}, {point:g}) as {prefix}_q{i}" for i, point in enumerate(points)
+        ]
+    # count_distinct: the field joins the group-by; the shard only counts rows
+    return [f"count as {prefix}"]
+
+
+def plan_sharded_query(query: str) -> Optional[ShardPlan]:
+    """Recognize ``<search> | <aggregates> [by fields] [| sort by f] [| limit n]``.
+
+    Returns None for anything else, including queries with stages after the
+    aggregate that need every row (``where``, ``top``, further aggregates).
+    """
+    stages = split_stages(query)
+    index = next(
+        (i for i, stage in enumerate(stages) if i > 0 and stage_operator(stage) in
+         ("count", "count_distinct", "sum", "avg", "min", "max", "pct")),
+        None
+    )
+    if index is None:
+        return None
+    # Everything before the aggregate must work message by message; a global
+    # stage (dedup, limit, another aggregate) would mean something else per shard
+    prefix = [stage for stage in stages[1:index] if stage_operator(stage) != "timeslice"]
+    if any(stage_operator(stage) == "limit" for stage in prefix):
+        return None
+    if not is_per_message_query(" | ".join(stages[:1] + prefix)):
+        return None
+
+    head, group_by = _split_by(stages[index])
+    aggregates = _parse_aggregates(head)
+    if not aggregates or any(not re.fullmatch(_IDENT, field) for field in group_by):
+        return None
+
+    sort_field, descending, limit = None, True, None
+    for stage in stages[index + 1:]:
+        sort = _SORT_RE.match(stage)
+        limit_match = _LIMIT_RE.match(stage)
+        if sort and sort_field is None and limit is None:
+            sign, sort_field, direction = sort.groups()
+            descending = sign != "+" and (direction or "desc").lower() == "desc"
+            sort_field = sort_field.lower()
+        elif limit_match and limit is None:
+            limit = int(limit_match.group(1))
+        else:
+            return None
+
+    distinct_fields = [
+        a.field for a in aggregates if a.operator == "count_distinct" and a.field not in group_by
+    ]
+    partials = [p for i, aggregate in enumerate(aggregates) for p in _partials(i, aggregate)]
+    shard_stage = ", ".join(partials)
+    shard_groups = group_by + sorted(set(distinct_fields))
+    if shard_groups:
+        shard_stage += " by " + ", ".join(shard_groups)
+
+    return ShardPlan(
+        aggregates=aggregates,
+        group_by=group_by,
+        shard_query=" | ".join(stages[:index] + [shard_stage]),
+        sort_field=sort_field,
+        sort_descending=descending,
+        limit=limit,
+        distinct_fields=sorted(set(distinct_fields))
+    )
+
+
+def _value(fields: Dict[str, Any], name: str) -> Any:
+    # Sumo lowercases field names in records
+    return fields.get(name, fields.get(name.lower()))
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _partial(fields: Dict[str, Any], name: str) -> float:
+    """An additive partial, treating a missing value as zero."""
+    return _number(_value(fields, name)) or 0.0
+
+
+def _weighted_quantile(points: List[Tuple[float, float]], percentile: float) -> Optional[float]:
+    """Percentile of a distribution given as (value, weight) points."""
+    points = sorted(p for p in points if p[1] > 0)
+    total = sum(weight for _, weight in points)
+    if not total:
+        return None
+    target = total * percentile / 100
+    running = 0.0
+    for value, weight in points:
+        running += weight
+        if running >= target:
+            return value
+    return points[-1][0]
+
+
+class _GroupState:
+    def __init__(self, plan: ShardPlan):
+        self.values: List[Any] = [None] * len(plan.aggregates)
+        self.counts: List[float] = [0.0] * len(plan.aggregates)
+        self.sketches: Dict[int, HyperLogLog] = {}
+        self.points: Dict[int, List[Tuple[float, float]]] = {}
+
+
+def merge_shards(plan: ShardPlan, shards: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Combine per-shard partial rows into final rows shaped like the unsharded result."""
+    groups: Dict[Tuple[Any, ...], _GroupState] = {}
+
+    for rows in shards:
+        for row in rows:
+            fields = record_fields(row)
+            key = tuple(_value(fields, name) for name in plan.group_by)
+            state = groups.get(key)
+            if state is None:
+                state = groups[key] = _GroupState(plan)
+
+            for i, aggregate in enumerate(plan.aggregates):
+                prefix = f"shard{i}"
+                operator = aggregate.operator
+                if operator in ("count", "sum"):
+                    state.values[i] = (state.values[i] or 0.0) + _partial(fields, prefix)
+                elif operator in ("min", "max"):
+                    value = _number(_value(fields, prefix))
+                    if value is not None:
+                        current = state.values[i]
+                        pick = min if operator == "min" else max
+                        state.values[i] = value if current is None else pick(current, value)
+                elif operator == "avg":
+                    state.values[i] = (state.values[i] or 0.0) + _partial(fields, f"{prefix}_sum")
+                    state.counts[i] += _partial(fields, f"{prefix}_n")
+                elif operator == "count_distinct":
+                    value = _value(fields, aggregate.field)
+                    if value not in (None, ""):
+                        state.sketches.setdefault(i, HyperLogLog()).add(str(value))
+                else:
+                    weight = _partial(fields, f"{prefix}_n")
+                    points = sorted(set(QUANTILE_POINTS) | {aggregate.percentile})
+                    quantiles = [
+                        _number(_value(fields, f"{prefix}_q{j}")) for j in range(len(points))
+                    ]
+                    state.points.setdefault(i, []).extend(
+                        (q, weight / len(points)) for q in quantiles if q is not None
+                    )
+
+    results = []
+    for key, state in groups.items():
+        output: Dict[str, Any] = {name.lower(): value for name, value in zip(plan.group_by, key)}
+        for i, aggregate in enumerate(plan.aggregates):
+            if aggregate.operator == "avg":
+                value = state.values[i] / state.counts[i] if state.counts[i] else None
+            elif aggregate.operator == "count_distinct":
+                sketch = state.sketches.get(i)
+                value = sketch.estimate() if sketch else 0
+            elif aggregate.operator == "pct":
+                value = _weighted_quantile(state.points.get(i, []), aggregate.percentile)
+            else:
+                value = state.values[i]
+            output[aggregate.name] = value
+        results.append(output)
+
+    if plan.sort_field:
+        def sort_key(row: Dict[str, Any]) -> Tuple[int, Any]:
+            value = row.get(plan.sort_field)
+            number = _number(value)
+            return (0, number) if number is not None else (1, str(value))
+        results.sort(key=sort_key, reverse=plan.sort_descending)
+    if plan.limit is not None:
+        results = results[:plan.limit]
+
+    return [{"map": {k: _format(v) for k, v in row.items()}} for row in results]
+
+
+def _format(value: Any) -> Any:
+    """Render merged numbers the way Sumo returns them: as strings."""
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(round(value, 6))
+    return value if value is None else str(value)
+
+
+class ShardedResult(BaseModel):
+    """Merged result of a sharded aggregate."""
+    result: SearchResult
+    shards: int
+    shard_query: str
+    truncated: bool = False
+
+
+async def _run_shard(
+    client: SumoLogicClient, query: str, from_ms: int, to_ms: int, max_rows: int
+) -> Tuple[List[Dict[str, Any]], bool, bool]:
+    """Return the shard's rows, whether it hit ``max_rows``, and whether the deadline cut it."""
+    rows: List[Dict[str, Any]] = []
+    async with client.job_slot():
+        job = await client.create_search_job(query, str(from_ms), str(to_ms))
+        try:
+            completed = await client.wait_for_job_completion(job.id)
+            total = completed.record_count or 0
+            while len(rows) < min(total, max_rows):
+                page = await client.get_search_job_records(
+                    job.id, offset=len(rows), limit=min(10000, max_rows - len(rows))
+                )
+                if not page.records:
+                    break
+                rows.extend(page.records)
+        finally:
+            await client.delete_search_job(job.id)
+    return rows, total > max_rows, completed.truncated_by_deadline
+
+
+async def execute_sharded(
+    client: SumoLogicClient,
+    plan: ShardPlan,
+    from_time: str = "-1h",
+    to_time: str = "now",
+    shards: int = 4,
+    limit: int = 1000,
+    max_rows_per_shard: int = MAX_ROWS_PER_SHARD
+) -> ShardedResult:
+    """Split the window into ``shards`` equal parts, run them concurrently and merge."""
+    from_ms = parse_epoch_ms(client._parse_time(from_time))
+    to_ms = parse_epoch_ms(client._parse_time(to_time))
+    if from_ms is None or to_ms is None or from_ms >= to_ms:
+        raise ValueError(f"Cannot shard the window '{from_time}' to '{to_time}'")
+
+    shards = max(1, min(shards, MAX_SHARDS))
+    bounds = [from_ms + (to_ms - from_ms) * i // shards for i in range(shards + 1)]
+    # Epoch millis keep the shards exact; each ends just before the next begins
+    outcomes = await asyncio.gather(*(
+        _run_shard(client, plan.shard_query, bounds[i], bounds[i + 1] - 1, max_rows_per_shard)
+        for i in range(shards)
+    ))
+
+    rows = merge_shards(plan, [shard_rows for shard_rows, _, _ in outcomes])
+    fields = [{"name": name.lower(), "fieldType": "string"} for name in plan.group_by] + [
+        {"name": a.name, "fieldType": "double"} for a in plan.aggregates
+    ]
+    return ShardedResult(
+        result=SearchResult(
+            records=rows[:limit],
+            fields=fields,
+            total_count=len(rows),
+            job_id="sharded",
+            truncated_by_deadline=any(cut for _, _, cut in outcomes)
+        ),
+        shards=shards,
+        shard_query=plan.shard_query,
+        truncated=any(truncated for _, truncated, _ in outcomes)
+    )
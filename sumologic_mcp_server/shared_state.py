@@ -0,0 +1,243 @@
+"""State shared between server worker processes through a local SQLite file.
+
+Holds the result cache, a token bucket for the Sumo API request rate and
+leases for the concurrent search-job budget, so several workers behave
+like a single client towards Sumo Logic. The file holds results of the
+user's searches, so it is private to that user.
+"""
+
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Optional
+
+import httpx
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_limit (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_slots (
+    slot_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def default_state_path(filename: str) -> str:
+    """Per-user state file: ``$XDG_STATE_HOME/sumologic-mcp/<filename>``."""
+    state_home = os.getenv("XDG_STATE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    return os.path.join(state_home, "sumologic-mcp", filename)
+
+
+def create_private_file(path: str) -> None:
+    """Create a state file (and its directory) readable by this user only.
+
+    SQLite gives the -wal and -shm files the permissions of the database.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+    os.chmod(path, 0o600)
+
+
+class SharedState:
+    """Cross-process result cache, rate limiter and job budget.
+
+    Job slots are leases renewed every third of ``job_lease_seconds`` while
+    held, so a long export keeps its slot and a crashed worker's slots lapse
+    within one lease.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        requests_per_second: float = 4.0,
+        burst: int = 10,
+        max_concurrent_jobs: int = 20,
+        job_lease_seconds: float = 60
+    ):
+        self.path = path
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.job_lease_seconds = job_lease_seconds
+
+        create_private_file(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run statements under an exclusive write lock across processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Result cache
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM result_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _cache_put(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            )
+
+    async def cache_get(self, key: str) -> Optional[str]:
+        """Return a cached value written by any worker, if still fresh."""
+        value = await asyncio.to_thread(self._cache_get, key)
+        if value is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+        return value
+
+    async def cache_put(self, key: str, value: str, ttl: float) -> None:
+        """Store a value visible to every worker for ``ttl`` seconds."""
+        await asyncio.to_thread(self._cache_put, key, value, ttl)
+
+    # Request rate limit
+
+    def _take_token(self) -> float:
+        """Take one request token; return 0, or the seconds to wait for one."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit WHERE name = 'sumo'"
+            ).fetchone()
+            tokens, updated_at = row if row else (float(self.burst), now)
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.requests_per_second)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / self.requests_per_second
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit (name, tokens, updated_at) VALUES ('sumo', ?, ?)",
+                (tokens, now)
+            )
+        return wait
+
+    async def acquire_request(self) -> None:
+        """Wait until the global request rate allows another API call."""
+        while True:
+            wait = await asyncio.to_thread(self._take_token)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # Concurrent job budget
+
+    def _try_lease(self, slot_id: str) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_slots WHERE expires_at <= ?", (now,))
+            (active,) = conn.execute("SELECT COUNT(*) FROM job_slots").fetchone()
+            if active >= self.max_concurrent_jobs:
+                return False
+            conn.execute(
+                "INSERT INTO job_slots (slot_id, pid, expires_at) VALUES (?, ?, ?)",
+                (slot_id, os.getpid(), now + self.job_lease_seconds)
+            )
+        return True
+
+    def _renew(self, slot_id: str) -> None:
+        # Put back a lease that lapsed while the loop was busy, so the count stays right
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_slots (slot_id, pid, expires_at) VALUES (?, ?, ?)",
+                (slot_id, os.getpid(), time.time() + self.job_lease_seconds)
+            )
+
+    def _release(self, slot_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_slots WHERE slot_id = ?", (slot_id,))
+
+    def active_jobs(self) -> int:
+        """Number of unexpired job leases across all workers."""
+        with self._lock:
+            (active,) = self._conn.execute(
+                "SELECT COUNT(*) FROM job_slots WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+        return active
+
+    @contextlib.asynccontextmanager
+    async def job_slot(self, poll_interval: float = 0.25) -> AsyncIterator[None]:
+        """Hold one of the globally budgeted search-job slots.
+
+        The lease is renewed while the slot is held and expires on its own
+        otherwise, so a crashed worker cannot leak slots.
+        """
+        slot_id = uuid.uuid4().hex
+        while not await asyncio.to_thread(self._try_lease, slot_id):
+            await asyncio.sleep(poll_interval)
+
+        async def renew() -> None:
+            while True:
+                await asyncio.sleep(self.job_lease_seconds / 3)
+                await asyncio.to_thread(self._renew, slot_id)
+
+        renewal = asyncio.create_task(renew())
+        try:
+            yield
+        finally:
+            renewal.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await renewal
+            await asyncio.to_thread(self._release, slot_id)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that takes a shared rate-limit token before each request."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, state: SharedState):
+        self.inner = inner
+        self.state = state
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.state.acquire_request()
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
@@ -0,0 +1,199 @@
+"""Live-tail support: incremental polling of a query with a high-water mark."""
+
+import hashlib
+import heapq
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .client import SumoLogicClient, format_epoch_ms, record_fields
+
+PAGE_SIZE = 10000
+
+class TailSession(BaseModel):
+    """State kept between polls of a single tail session."""
+    token: str
+    query: str
+    watermark_ms: Optional[int] = None
+    seen_ids: Dict[str, int] = Field(default_factory=dict)
+    polls: int = 0
+    last_poll_at: float = 0.0
+
+
+class TailResult(BaseModel):
+    """New messages returned by one poll of a tail session."""
+    token: str
+    records: List[Dict[str, Any]]
+    from_time: str
+    to_time: str
+    watermark_ms: Optional[int] = None
+    duplicates_skipped: int = 0
+    # More new messages are waiting for the next poll
+    truncated: bool = False
+
+
+def message_time_ms(fields: Dict[str, Any]) -> Optional[int]:
+    """Return the message timestamp in epoch millis, if one is present."""
+    for key in ("_messagetime", "_receipttime"):
+        value = fields.get(key)
+        if value not in (None, ""):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def message_id(fields: Dict[str, Any], time_ms: Optional[int]) -> str:
+    """Return a stable identifier for a message used for de-duplication."""
+    if fields.get("_messageid"):
+        return str(fields["_messageid"])
+    # Fall back to a content hash when the query does not expose _messageid
+    digest = hashlib.sha1(f"{time_ms}|{fields.get('_raw', '')}".encode()).hexdigest()
+    return f"h:{digest}"
+
+
+class LiveTail:
+    """Follow a query over time, returning only messages not seen before.
+
+    Each session remembers the newest ``_messagetime`` it has returned. The
+    next poll searches only from that watermark minus a small overlap (to
+    catch late-indexed messages), and drops anything already returned.
+
+    A poll reads every page of its slice, ``page_size`` messages at a time.
+    Sumo returns the newest messages first, so stopping at ``limit`` would
+    lose the older ones for good once the watermark moved past them; instead
+    the oldest ``limit`` new messages are kept as pages arrive, returned,
+    and the watermark stops at the last of them.
+    """
+
+    def __init__(
+        self,
+        client: SumoLogicClient,
+        overlap_seconds: int = 30,
+        max_sessions: int = 100,
+        session_ttl: int = 3600,
+        page_size: int = PAGE_SIZE
+    ):
+        self.client = client
+        self.page_size = page_size
+        self.overlap_ms = overlap_seconds * 1000
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self._sessions: "OrderedDict[str, TailSession]" = OrderedDict()
+
+    def _get_session(
+        self, token: Optional[str], query: str, namespace: str = ""
+    ) -> TailSession:
+        """Look up a session by token, creating or resetting it as needed."""
+        now = time.time()
+
+        # Expire idle sessions
+        for key, session in list(self._sessions.items()):
+            if now - session.last_poll_at > self.session_ttl:
+                del self._sessions[key]
+
+        token = token or uuid.uuid4().hex
+        # Tokens are scoped to the MCP session that created them
+        key = f"{namespace}:{token}"
+        session = self._sessions.get(key)
+        if session is None or session.query != query:
+            session = TailSession(token=token, query=query)
+
+        session.last_poll_at = now
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        return session
+
+    def close(self, token: str, namespace: str = "") -> bool:
+        """Forget a tail session."""
+        return self._sessions.pop(f"{namespace}:{token}", None) is not None
+
+    async def poll(
+        self,
+        query: str,
+        token: Optional[str] = None,
+        initial_window: str = "-5m",
+        limit: int = 1000,
+        namespace: str = ""
+    ) -> TailResult:
+        """Fetch up to ``limit`` messages that arrived since the previous poll of ``token``."""
+        session = self._get_session(token, query, namespace)
+
+        if session.watermark_ms is None:
+            from_time = initial_window
+        else:
+            from_time = format_epoch_ms(session.watermark_ms - self.overlap_ms)
+        to_time = "now"
+
+        # The oldest `limit` new messages so far, as a heap whose top is the
+        # newest of them; ties keep the message read first
+        oldest: List[Any] = []
+        order = itertools.count()
+        new_count = 0
+        duplicates = 0
+        async with self.client.job_slot():
+            job = await self.client.create_search_job(query, from_time, to_time)
+            try:
+                await self.client.wait_for_job_completion(job.id)
+                offset = 0
+                while True:
+                    page = await self.client.get_search_job_messages(
+                        job.id, offset=offset, limit=self.page_size
+                    )
+                    offset += len(page.records)
+                    for message in page.records:
+                        fields = record_fields(message)
+                        time_ms = message_time_ms(fields)
+                        msg_id = message_id(fields, time_ms)
+                        if msg_id in session.seen_ids:
+                            duplicates += 1
+                            continue
+                        new_count += 1
+                        item = (-(time_ms or 0), -next(order), time_ms, msg_id, fields)
+                        if len(oldest) < limit:
+                            heapq.heappush(oldest, item)
+                        else:
+                            heapq.heappushpop(oldest, item)
+                    if len(page.records) < self.page_size:
+                        break
+            finally:
+                await self.client.delete_search_job(job.id)
+
+        # Return the oldest new messages; the rest are at or after the new
+        # watermark, so the next poll finds them again
+        new_records = [item[2:] for item in sorted(oldest, reverse=True)]
+        watermark = session.watermark_ms
+        for time_ms, msg_id, _ in new_records:
+            session.seen_ids[msg_id] = time_ms or 0
+            if time_ms is not None and (watermark is None or time_ms > watermark):
+                watermark = time_ms
+
+        # Only ids inside the next overlap window can be returned again; the
+        # extra second covers the truncation done by format_epoch_ms
+        if watermark is not None:
+            horizon = watermark - self.overlap_ms - 1000
+            session.seen_ids = {
+                key: ts for key, ts in session.seen_ids.items() if ts >= horizon
+            }
+
+        session.watermark_ms = watermark
+        session.polls += 1
+        session.last_poll_at = time.time()
+
+        return TailResult(
+            token=session.token,
+            records=[fields for _, _, fields in new_records],
+            from_time=from_time,
+            to_time=to_time,
+            watermark_ms=watermark,
+            duplicates_skipped=duplicates,
+            truncated=new_count > limit
+        )
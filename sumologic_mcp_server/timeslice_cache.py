@@ -0,0 +1,224 @@
+"""Per-slice result cache for rolling-window ``| timeslice`` aggregate queries."""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .query_parser import is_per_message_query, normalize_query, split_stages, stage_operator
+
+_UNIT_MS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+_TIMESLICE_RE = re.compile(
+    r"^timeslice\s+(\d+)\s*([smhd])(?:\s+as\s+([A-Za-z_][\w]*))?\s*$", re.IGNORECASE
+)
+_AGGREGATE_RE = re.compile(
+    r"^(count|count_distinct|count_frequent|sum|avg|min|max|stddev|pct|first|last)\b",
+    re.IGNORECASE
+)
+_BY_RE = re.compile(r"\bby\b(.*)$", re.IGNORECASE)
+_SORT_RE = re.compile(r"^(?:sort|order)\s+by\s+([A-Za-z_][\w]*)(?:\s+(asc|desc))?\s*$", re.IGNORECASE)
+
+
+class TimesliceSpec(BaseModel):
+    """Shape of a cacheable timesliced aggregate query."""
+    slice_ms: int
+    alias: str = "_timeslice"
+    descending: bool = False
+
+
+class TimeslicePlan(BaseModel):
+    """What needs fetching to answer a query over a window."""
+    from_ms: int
+    to_ms: int
+    fetch_from_ms: Optional[int]
+    cached_rows: List[Dict[str, Any]] = Field(default_factory=list)
+    cached_slices: int = 0
+
+
+class _CacheEntry(BaseModel):
+    """Completed slices for a single query."""
+    slices: Dict[int, List[Dict[str, Any]]] = Field(default_factory=dict)
+    fields: List[Dict[str, str]] = Field(default_factory=list)
+
+
+def record_slice_ms(fields: Dict[str, Any], alias: str) -> Optional[int]:
+    """Return the slice start (epoch millis) of a result row."""
+    value = fields.get(alias)
+    if value is None:
+        # Sumo lowercases field names in records
+        value = fields.get(alias.lower())
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_timeslice_query(query: str) -> Optional[TimesliceSpec]:
+    """Recognize ``... | timeslice N | <agg> by _timeslice ...`` queries.
+
+    Only queries whose final aggregate groups by the timeslice, optionally
+    followed by a sort on it, are cacheable: each output row then depends on
+    the messages of exactly one slice, so slices can be merged verbatim.
+    Every stage before the aggregate must work message by message, too: a
+    ``limit``, ``dedup`` or ``sort`` there makes a slice's rows depend on
+    messages outside it.
+    """
+    stages = split_stages(query)
+    spec = None
+    aggregated = False
+    # Stages ahead of the aggregate, other than the timeslice itself
+    before = stages[:1]
+
+    for stage in stages[1:]:
+        if spec is None:
+            match = _TIMESLICE_RE.match(stage)
+            if match:
+                amount, unit, alias = match.groups()
+                spec = TimesliceSpec(
+                    slice_ms=int(amount) * _UNIT_MS[unit.lower()],
+                    alias=alias or "_timeslice"
+                )
+            else:
+                before.append(stage)
+            continue
+
+        if not aggregated:
+            if _AGGREGATE_RE.match(stage):
+                by_clause = _BY_RE.search(stage)
+                group_keys = [
+                    key.strip().lower()
+                    for key in (by_clause.group(1).split(",") if by_clause else [])
+                ]
+                if spec.alias.lower() not in group_keys:
+                    return None
+                aggregated = True
+            elif _TIMESLICE_RE.match(stage):
+                return None
+            else:
+                before.append(stage)
+            continue
+
+        # Only an ordering on the slice itself may follow the aggregate
+        sort = _SORT_RE.match(stage)
+        if not sort or sort.group(1).lower() != spec.alias.lower():
+            return None
+        spec.descending = (sort.group(2) or "desc").lower() == "desc"
+
+    if spec is None or not aggregated or spec.slice_ms <= 0:
+        return None
+    # A limit is per message for early stopping, but keeps the first N of the whole window
+    if not is_per_message_query(" | ".join(before)) or any(
+        stage_operator(stage) == "limit" for stage in before[1:]
+    ):
+        return None
+    return spec
+
+
+class TimesliceCache:
+    """Cache completed timeslice buckets so repeat queries fetch only the delta.
+
+    A slice is considered complete once its end is older than
+    ``settle_seconds``, giving late-arriving data time to be indexed. Open
+    and missing slices are always re-queried.
+    """
+
+    def __init__(self, settle_seconds: int = 120, max_queries: int = 256):
+        self.settle_ms = settle_seconds * 1000
+        self.max_queries = max_queries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return normalize_query(query)
+
+    def plan(
+        self,
+        query: str,
+        spec: TimesliceSpec,
+        from_ms: int,
+        to_ms: int,
+        now_ms: Optional[int] = None
+    ) -> TimeslicePlan:
+        """Work out which slices can be served from cache."""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        # Rolling windows snap to slice boundaries so buckets line up between runs
+        from_ms -= from_ms % spec.slice_ms
+        closed_before = min(to_ms, now_ms - self.settle_ms)
+
+        entry = self._entries.get(self._key(query))
+        cached_rows: List[Dict[str, Any]] = []
+        cached_slices = 0
+        slice_start = from_ms
+        if entry is not None:
+            self._entries.move_to_end(self._key(query))
+            while slice_start + spec.slice_ms <= closed_before and slice_start in entry.slices:
+                cached_rows.extend(entry.slices[slice_start])
+                cached_slices += 1
+                slice_start += spec.slice_ms
+
+        fetch_from = slice_start if slice_start < to_ms else None
+        if cached_slices:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return TimeslicePlan(
+            from_ms=from_ms,
+            to_ms=to_ms,
+            fetch_from_ms=fetch_from,
+            cached_rows=cached_rows,
+            cached_slices=cached_slices
+        )
+
+    def store(
+        self,
+        query: str,
+        spec: TimesliceSpec,
+        fetch_from_ms: int,
+        to_ms: int,
+        rows: List[Dict[str, Any]],
+        fields: List[Dict[str, str]],
+        now_ms: Optional[int] = None
+    ) -> None:
+        """Record completed slices from a freshly fetched range."""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed_before = min(to_ms, now_ms - self.settle_ms)
+
+        key = self._key(query)
+        entry = self._entries.get(key) or _CacheEntry()
+        if fields:
+            entry.fields = fields
+
+        fresh: Dict[int, List[Dict[str, Any]]] = {}
+        slice_start = fetch_from_ms
+        while slice_start + spec.slice_ms <= closed_before:
+            # Slices with no rows are still complete, just empty
+            fresh[slice_start] = []
+            slice_start += spec.slice_ms
+
+        for row in rows:
+            slice_ms = record_slice_ms(row.get("map", row), spec.alias)
+            if slice_ms in fresh:
+                fresh[slice_ms].append(row)
+
+        entry.slices.update(fresh)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_queries:
+            self._entries.popitem(last=False)
+
+    def cached_fields(self, query: str) -> List[Dict[str, str]]:
+        """Return the field list remembered for a query."""
+        entry = self._entries.get(self._key(query))
+        return entry.fields if entry else []
+
+    def evict_before(self, query: str, from_ms: int) -> None:
+        """Drop slices that have rolled out of the query's window."""
+        entry = self._entries.get(self._key(query))
+        if entry is not None:
+            entry.slices = {k: v for k, v in entry.slices.items() if k >= from_ms}
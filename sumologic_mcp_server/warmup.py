@@ -0,0 +1,219 @@
+"""Keep the results of a configured set of common queries warm in the background."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .client import SearchResult, SumoLogicClient
+from .query_parser import normalize_query
+from .scheduler import BACKGROUND, current_priority, current_session
+
+# Retry a failed refresh sooner than its interval, but not in a tight loop
+RETRY_SECONDS = 60
+
+
+class WarmupQuery(BaseModel):
+    """One query to keep warm, as written in the config file."""
+    query: str
+    name: Optional[str] = None
+    from_time: str = "-1h"
+    to_time: str = "now"
+    limit: int = 1000
+    interval_seconds: int = 300
+
+
+class WarmupQueryStats(BaseModel):
+    """Refresh and cache-hit figures for one warm query."""
+    name: str
+    hits: int
+    misses: int
+    refreshes: int
+    failures: int
+    age_seconds: Optional[float] = None
+    refresh_lag_seconds: Optional[float] = None
+    last_refresh_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class WarmupStats(BaseModel):
+    """Warm-up scheduler totals and per-query figures."""
+    hits: int
+    misses: int
+    uncovered: int
+    hit_rate: float
+    refreshing: int
+    queries: List[WarmupQueryStats]
+
+
+def load_warmup_config(path: str) -> List[WarmupQuery]:
+    """Read warm queries from a JSON file: a list, or an object with a ``queries`` list."""
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict):
+        data = data.get("queries", [])
+    return [WarmupQuery.model_validate(item) for item in data]
+
+
+class _WarmEntry:
+    def __init__(self, spec: WarmupQuery, executed_query: str):
+        self.spec = spec
+        self.executed_query = executed_query
+        self.result: Optional[SearchResult] = None
+        self.refreshed_at: Optional[float] = None
+        self.next_due = time.monotonic()
+        self.task: Optional["asyncio.Task[None]"] = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.refresh_lag: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class WarmupScheduler:
+    """Refresh configured queries on their intervals and serve them from memory.
+
+    Refreshes run as background-priority search jobs, at most
+    ``max_concurrent`` at a time. Results stay servable for two intervals,
+    so a failing refresh stops being served instead of going stale forever.
+    """
+
+    def __init__(
+        self,
+        client: SumoLogicClient,
+        queries: List[WarmupQuery],
+        max_concurrent: int = 2
+    ):
+        self.client = client
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._entries: Dict[str, _WarmEntry] = {}
+        for spec in queries:
+            # Run the query as execute_query would (e.g. with a pushed-down limit), but
+            # key it as the user writes it: the limit is the entry's, not the key's
+            plan = client.analyze_query(spec.query, spec.from_time, spec.to_time, spec.limit)
+            entry = _WarmEntry(spec, plan.query)
+            self._entries[self._key(spec.query, spec.from_time, spec.to_time)] = entry
+        self._uncovered = 0
+        self._runner: Optional["asyncio.Task[None]"] = None
+
+    @staticmethod
+    def _key(query: str, from_time: str, to_time: str) -> str:
+        return f"{normalize_query(query)}|{from_time}|{to_time}"
+
+    def lookup(
+        self, query: str, from_time: str, to_time: str, limit: int
+    ) -> Optional[SearchResult]:
+        """Return a warm result for this call, if one is fresh enough.
+
+        ``query`` is the query as the caller wrote it; any ``limit`` of up to
+        the configured one is served from the warm rows.
+        """
+        entry = self._entries.get(self._key(query, from_time, to_time))
+        if entry is None:
+            self._uncovered += 1
+            return None
+
+        fresh = (
+            entry.result is not None
+            and limit <= entry.spec.limit
+            and time.monotonic() - entry.refreshed_at <= 2 * entry.spec.interval_seconds
+        )
+        if not fresh:
+            entry.misses += 1
+            return None
+
+        entry.hits += 1
+        result = entry.result
+        return result.model_copy(update={"records": result.records[:limit]})
+
+    def age(self, query: str, from_time: str, to_time: str) -> Optional[float]:
+        """Seconds since the warm result for this call was refreshed."""
+        entry = self._entries.get(self._key(query, from_time, to_time))
+        if entry is None or entry.refreshed_at is None:
+            return None
+        return time.monotonic() - entry.refreshed_at
+
+    async def _refresh(self, entry: _WarmEntry) -> None:
+        current_priority.set(BACKGROUND)
+        current_session.set("warmup")
+        spec = entry.spec
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                entry.refresh_lag = max(0.0, started - entry.next_due)
+                try:
+                    # Resolve the window now so a refresh never reuses an older
+                    # cached result or registered job for the same relative window
+                    entry.result = await self.client.execute_query(
+                        entry.executed_query,
+                        self.client._parse_time(spec.from_time),
+                        self.client._parse_time(spec.to_time),
+                        spec.limit
+                    )
+                except Exception as e:
+                    entry.failures += 1
+                    entry.last_error = str(e)
+                    entry.next_due = time.monotonic() + min(spec.interval_seconds, RETRY_SECONDS)
+                    return
+                entry.refreshed_at = time.monotonic()
+                entry.last_duration = entry.refreshed_at - started
+                entry.refreshes += 1
+                entry.last_error = None
+                entry.next_due = started + spec.interval_seconds
+        finally:
+            entry.task = None
+
+    async def run(self) -> None:
+        """Start due refreshes until cancelled."""
+        while True:
+            now = time.monotonic()
+            for entry in self._entries.values():
+                if entry.task is None and entry.next_due <= now:
+                    entry.task = asyncio.create_task(self._refresh(entry))
+            idle = [e.next_due for e in self._entries.values() if e.task is None]
+            await asyncio.sleep(min(1.0, max(0.05, min(idle, default=now + 1.0) - now)))
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = [e.task for e in self._entries.values() if e.task is not None]
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> WarmupStats:
+        now = time.monotonic()
+        hits = sum(e.hits for e in self._entries.values())
+        misses = sum(e.misses for e in self._entries.values())
+        lookups = hits + misses + self._uncovered
+        return WarmupStats(
+            hits=hits,
+            misses=misses,
+            uncovered=self._uncovered,
+            hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+            refreshing=sum(1 for e in self._entries.values() if e.task is not None),
+            queries=[
+                WarmupQueryStats(
+                    name=e.spec.name or e.spec.query[:60],
+                    hits=e.hits,
+                    misses=e.misses,
+                    refreshes=e.refreshes,
+                    failures=e.failures,
+                    age_seconds=round(now - e.refreshed_at, 1) if e.refreshed_at else None,
+                    refresh_lag_seconds=round(e.refresh_lag, 3) if e.refresh_lag is not None else None,
+                    last_refresh_seconds=round(e.last_duration, 3) if e.last_duration is not None else None,
+                    last_error=e.last_error
+                )
+                for e in self._entries.values()
+            ]
+        )
@@ -0,0 +1,76 @@
+"""In-process fake of the Sumo Logic Search API for tests."""
+
+import itertools
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+_JOB_RE = re.compile(r"/v1/search/jobs(?:/([^/]+))?(?:/(records|messages))?$")
+
+
+class FakeSumoAPI:
+    """Serve search jobs that complete immediately with canned messages and records.
+
+    Set ``state`` to keep every job in another state (e.g. still gathering).
+    """
+
+    def __init__(
+        self,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        records: Optional[List[Dict[str, Any]]] = None,
+        state: str = "DONE GATHERING RESULTS"
+    ):
+        self.messages = messages or []
+        self.records = records or []
+        self.state = state
+        self.calls: Counter = Counter()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.created: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        match = _JOB_RE.search(request.url.path)
+        if not match:
+            return httpx.Response(404, json={"message": "not found"})
+        job_id, kind = match.groups()
+
+        if request.method == "POST" and job_id is None:
+            self.calls["create"] += 1
+            job_id = f"job-{next(self._ids)}"
+            self.jobs[job_id] = json.loads(request.content)
+            self.created.append(self.jobs[job_id])
+            return httpx.Response(202, json={"id": job_id})
+
+        if job_id not in self.jobs:
+            return httpx.Response(404, json={"message": "job not found"})
+
+        if request.method == "DELETE":
+            self.calls["delete"] += 1
+            del self.jobs[job_id]
+            return httpx.Response(200, json={"id": job_id})
+
+        if kind is None:
+            self.calls["status"] += 1
+            return httpx.Response(200, json={
+                "id": job_id,
+                "state": self.state,
+                "messageCount": len(self.messages),
+                "recordCount": len(self.records),
+            })
+
+        self.calls[kind] += 1
+        rows = self.messages if kind == "messages" else self.records
+        offset = int(request.url.params.get("offset", 0))
+        limit = int(request.url.params.get("limit", 100))
+        page = {"fields": [{"name": "_raw", "fieldType": "string"}], kind: rows[offset:offset + limit]}
+        if kind == "messages":
+            # Like Sumo, /records pages carry no totalCount
+            page["totalCount"] = len(rows)
+        return httpx.Response(200, json=page)
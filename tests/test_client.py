@@ -1,9 +1,14 @@
 """Tests for Sumo Logic client."""
 
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from sumologic_mcp_server.client import SumoLogicClient, SearchJob, SearchResult
+from sumologic_mcp_server.memory_budget import MemoryBudget
+from sumologic_mcp_server.shared_state import SharedState
+
+from .fake_sumo import FakeSumoAPI
 
 
 @pytest.fixture
@@ -54,10 +59,9 @@ async def test_get_search_job_status(client):
 
 
 @pytest.mark.asyncio
-async def test_get_search_job_records(client):
+async def test_get_search_job_records():
     """Test getting search job records."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {
+    body = {
         "records": [
             {"field1": "value1", "field2": "value2"},
             {"field1": "value3", "field2": "value4"}
@@ -68,13 +72,148 @@ async def test_get_search_job_records(client):
         ],
         "totalCount": 2
     }
-    
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-        
-        result = await client.get_search_job_records("test-job-123")
-        
-        assert len(result.records) == 2
-        assert len(result.fields) == 2
-        assert result.total_count == 2
-        assert result.job_id == "test-job-123"
\ No newline at end of file
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+    )
+
+    result = await client.get_search_job_records("test-job-123")
+
+    assert len(result.records) == 2
+    assert len(result.fields) == 2
+    assert result.total_count == 2
+    assert result.job_id == "test-job-123"
+
+
+@pytest.mark.asyncio
+async def test_execute_query_returns_early_for_per_message_queries(client):
+    """A raw query stops polling once enough messages exist and cancels the job."""
+    def status(state, messages):
+        return SearchJob(
+            id="job-1", state=state, query="q", from_time="", to_time="",
+            message_count=messages, record_count=0
+        )
+
+    client.create_search_job = AsyncMock(return_value=status("NOT STARTED", 0))
+    client.get_search_job_status = AsyncMock(side_effect=[
+        status("GATHERING RESULTS", 3),
+        status("GATHERING RESULTS", 12),
+        status("DONE GATHERING RESULTS", 500),
+    ])
+    client.get_search_job_messages = AsyncMock(
+        return_value=SearchResult(records=[{}] * 10, fields=[], total_count=12, job_id="job-1")
+    )
+    client.delete_search_job = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()):
+        result = await client.execute_query('_sourceCategory="app" | limit 10', limit=10)
+
+    assert len(result.records) == 10
+    assert client.get_search_job_status.await_count == 2
+    client.delete_search_job.assert_awaited_once_with("job-1")
+
+
+@pytest.mark.asyncio
+async def test_execute_query_waits_for_unbounded_raw_queries(client):
+    """Without a limit stage or an opt-in, the first messages found are not the answer."""
+    def status(state, messages):
+        return SearchJob(
+            id="job-1", state=state, query="q", from_time="", to_time="",
+            message_count=messages, record_count=0
+        )
+
+    client.create_search_job = AsyncMock(return_value=status("NOT STARTED", 0))
+    client.get_search_job_status = AsyncMock(side_effect=[
+        status("GATHERING RESULTS", 12),
+        status("DONE GATHERING RESULTS", 500),
+    ])
+    client.get_search_job_messages = AsyncMock(
+        return_value=SearchResult(records=[{}] * 10, fields=[], total_count=500, job_id="job-1")
+    )
+    client.delete_search_job = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()):
+        await client.execute_query("error", limit=10)
+
+    assert client.get_search_job_status.await_count == 2
+    client.delete_search_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_early_results_are_returned_but_not_cached(tmp_path):
+    """An opted-in preview stops early, and the next call runs its own job."""
+    def status(state, messages):
+        return SearchJob(
+            id="job-1", state=state, query="q", from_time="", to_time="",
+            message_count=messages, record_count=0
+        )
+
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        shared_state=SharedState(str(tmp_path / "state.sqlite")),
+        result_cache_ttl=60
+    )
+    client.create_search_job = AsyncMock(return_value=status("NOT STARTED", 0))
+    client.get_search_job_status = AsyncMock(return_value=status("GATHERING RESULTS", 12))
+    client.get_search_job_messages = AsyncMock(
+        return_value=SearchResult(records=[{}] * 10, fields=[], total_count=12, job_id="job-1")
+    )
+    client.delete_search_job = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()):
+        for _ in range(2):
+            result = await client.execute_query("error", limit=10, early=True)
+            assert len(result.records) == 10
+
+    assert client.create_search_job.await_count == 2
+    assert client.delete_search_job.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_query_waits_for_aggregates(client):
+    """Aggregate results are only final once the job is done."""
+    def status(state, messages, records):
+        return SearchJob(
+            id="job-1", state=state, query="q", from_time="", to_time="",
+            message_count=messages, record_count=records
+        )
+
+    client.create_search_job = AsyncMock(return_value=status("NOT STARTED", 0, 0))
+    client.get_search_job_status = AsyncMock(side_effect=[
+        status("GATHERING RESULTS", 5000, 2),
+        status("DONE GATHERING RESULTS", 9000, 3),
+    ])
+    client.get_search_job_records = AsyncMock(
+        return_value=SearchResult(records=[{}] * 3, fields=[], total_count=3, job_id="job-1")
+    )
+    client.delete_search_job = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()):
+        await client.execute_query('_sourceCategory="app" | count by host', limit=10)
+
+    assert client.get_search_job_status.await_count == 2
+    client.delete_search_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_execute_query_projects_fields_while_parsing_pages():
+    """Only the requested fields are kept, and the memory held shrinks with them."""
+    api = FakeSumoAPI(messages=[
+        {"map": {"_raw": "x" * 500, "_SourceHost": f"web-{i}", "status": "200"}}
+        for i in range(10)
+    ])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    budget = MemoryBudget()
+
+    async with budget.call() as memory:
+        full = await client.execute_query("error", limit=10)
+        held_full = memory.held
+        projected = await client.execute_query("error", limit=10, fields=["_sourcehost"])
+        held_projected = memory.held - held_full
+
+    assert projected.records[0] == {"map": {"_SourceHost": "web-0"}}
+    assert projected.fields == []
+    assert len(full.records[0]["map"]) == 3
+    assert 0 < held_projected < held_full / 10
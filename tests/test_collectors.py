@@ -0,0 +1,109 @@
+"""Tests for collector and source enumeration."""
+
+import httpx
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.metadata_cache import MetadataCache
+
+
+def make_client(collectors, denied=()):
+    requests = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        parts = request.url.path.rstrip("/").split("/")
+        if parts[-1] == "collectors":
+            offset = int(request.url.params["offset"])
+            limit = int(request.url.params["limit"])
+            return httpx.Response(200, json={"collectors": collectors[offset:offset + limit]})
+        collector_id = int(parts[-2])
+        if collector_id in denied:
+            return httpx.Response(403, json={"message": "forbidden"})
+        return httpx.Response(200, json={"sources": [
+            {"id": collector_id * 10, "category": f"cat/{collector_id}"}
+        ]})
+
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=httpx.MockTransport(handle)
+    )
+    return client, requests
+
+
+@pytest.mark.asyncio
+async def test_iter_collectors_pages_until_short_page():
+    collectors = [{"id": i, "name": f"c{i}"} for i in range(25)]
+    client, requests = make_client(collectors)
+
+    seen = [c["id"] async for c in client.iter_collectors(page_size=10, concurrency=2)]
+
+    assert seen == list(range(25))
+    offsets = sorted(int(r.url.params["offset"]) for r in requests)
+    # The page after the short one may be requested, but nothing further
+    assert offsets[:3] == [0, 10, 20]
+    assert max(offsets) <= 30
+
+
+@pytest.mark.asyncio
+async def test_get_sources_covers_every_page_and_skips_denied_collectors():
+    collectors = [{"id": i, "name": f"c{i}"} for i in range(1, 1203)]
+    client, _ = make_client(collectors, denied={5})
+
+    sources = await client.get_sources()
+
+    assert len(sources) == 1201
+    assert sources[0] == {
+        "id": 10, "category": "cat/1", "collector_name": "c1", "collector_id": 1
+    }
+    assert all(source["collector_id"] != 5 for source in sources)
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_revalidates_with_etag_and_reuses_objects():
+    bodies = {"collectors": [{"id": 1, "name": "c1"}]}
+    conditional = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        conditional.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=bodies, headers={"ETag": '"v1"'})
+
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=httpx.MockTransport(handle),
+        metadata_cache=MetadataCache(ttl=300)
+    )
+
+    first = await client.get_collectors()
+    second = await client.get_collectors()
+
+    assert conditional == [None, '"v1"']
+    assert second[0] is first[0]
+    assert client.metadata_cache.stats().not_modified == 1
+
+
+@pytest.mark.asyncio
+async def test_metadata_cache_without_validators_uses_ttl_then_content_hash():
+    requests = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"sources": [{"id": 7, "category": "app"}]})
+
+    cache = MetadataCache(ttl=300)
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=httpx.MockTransport(handle),
+        metadata_cache=cache
+    )
+
+    await client.get_sources(collector_id=3)
+    await client.get_sources(collector_id=3)
+    assert len(requests) == 1
+
+    cache.ttl = 0
+    await client.get_sources(collector_id=3)
+    assert len(requests) == 2
+    assert cache.stats().unchanged_body == 1
@@ -0,0 +1,166 @@
+"""Tests for per-call deadlines."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.deadline import Deadline, DeadlineExceeded, current_deadline
+from sumologic_mcp_server.export import export_query
+from sumologic_mcp_server.scheduler import JobScheduler
+
+from .fake_sumo import FakeSumoAPI
+
+
+def make_client(transport, **kwargs) -> SumoLogicClient:
+    return SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=transport, **kwargs
+    )
+
+
+def test_poll_interval_and_prefetch_adapt_to_time_left():
+    deadline = Deadline(10)
+    assert deadline.fetch_reserve == 2
+    assert deadline.poll_interval(2) == 2
+    deadline.expires_at -= 9
+    assert deadline.poll_interval(2) == 0.1
+    assert deadline.gathering_expired()
+
+    assert deadline.prefetch_depth(None, 4) == 4
+    assert deadline.prefetch_depth(0.4, 4) == 2
+    assert deadline.prefetch_depth(5, 4) == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_query_returns_partial_results_at_the_deadline():
+    api = FakeSumoAPI(
+        messages=[{"map": {"_raw": f"line {i}"}} for i in range(3)],
+        state="GATHERING RESULTS"
+    )
+    client = make_client(api.transport)
+
+    current_deadline.set(Deadline(0.5))
+    result = await asyncio.wait_for(client.execute_query("error", limit=100), 2)
+
+    assert result.truncated_by_deadline
+    assert len(result.records) == 3
+    # The unfinished job is stopped rather than left scanning
+    assert api.calls["delete"] == 1
+    assert current_deadline.get().truncated == ["search job job-1 (gathering results)"]
+
+
+@pytest.mark.asyncio
+async def test_no_job_is_started_after_the_deadline():
+    api = FakeSumoAPI()
+    client = make_client(api.transport)
+    deadline = Deadline(1)
+    deadline.expires_at -= 2
+    current_deadline.set(deadline)
+
+    with pytest.raises(DeadlineExceeded):
+        await client.execute_query("error")
+    assert api.calls["create"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_job_slot_counts_against_the_deadline():
+    client = make_client(FakeSumoAPI().transport, scheduler=JobScheduler(max_concurrent=1))
+    async with client.scheduler.slot():
+        current_deadline.set(Deadline(0.2))
+        with pytest.raises(DeadlineExceeded, match="search-job slot"):
+            await client.execute_query("error")
+    assert client.scheduler.stats().running == 0
+
+
+@pytest.mark.asyncio
+async def test_export_stops_prefetching_when_pages_no_longer_fit(tmp_path):
+    api = FakeSumoAPI(messages=[{"map": {"_raw": str(i)}} for i in range(50)])
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/messages"):
+            await asyncio.sleep(0.2)
+        return api.handle(request)
+
+    client = make_client(httpx.MockTransport(slow))
+    current_deadline.set(Deadline(0.5))
+    result = await export_query(client, "error", str(tmp_path), page_size=10, concurrency=1)
+
+    assert result.truncated_by_deadline
+    assert 0 < result.row_count < 50
+    assert api.calls["delete"] == 1
+    assert current_deadline.get().truncated == [f"export after {result.row_count} of 50 rows"]
+
+
+def slow_pages(api, seconds):
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(("/messages", "/records")):
+            await asyncio.sleep(seconds)
+        return api.handle(request)
+    return httpx.MockTransport(handle)
+
+
+@pytest.mark.asyncio
+async def test_export_times_a_page_before_prefetching_under_a_deadline(tmp_path):
+    api = FakeSumoAPI(messages=[{"map": {"_raw": str(i)}} for i in range(45_000)])
+    client = make_client(slow_pages(api, 0.15))
+    current_deadline.set(Deadline(0.45))
+
+    started = asyncio.get_running_loop().time()
+    result = await export_query(client, "error", str(tmp_path), concurrency=4)
+
+    # The first window is not filled blindly, so the export ends close to the deadline
+    assert asyncio.get_running_loop().time() - started < 0.65
+    assert result.truncated_by_deadline and result.row_count < 45_000
+    assert current_deadline.get().truncated[0].startswith("export after")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("arguments, marker", [
+    ({"query": "error", "output": "summary"}, "Truncated by deadline: summarized"),
+    (
+        {"query": "_index=web | timeslice 1m | count by _timeslice", "downsample": 50},
+        "Truncated by deadline: downsampled the first",
+    ),
+    ({"query": "error"}, None),
+])
+async def test_scanning_tools_mark_answers_cut_short(arguments, marker, monkeypatch, tmp_path):
+    from sumologic_mcp_server import server
+
+    start = 1_700_000_000_000
+    rows = [
+        {"map": {"_timeslice": str(start + i * 60_000), "_count": str(i), "_raw": str(i)}}
+        for i in range(45_000)
+    ]
+    api = FakeSumoAPI(messages=rows, records=rows)
+    client = make_client(slow_pages(api, 0.15))
+    if marker is None:
+        # export_query, through the tool
+        monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+        name, marker = "export_query", "Truncated by deadline: the file holds only"
+    else:
+        name = "execute_query"
+
+    result = await server.deadline_tool_call(
+        server.dispatch_tool, client, name, arguments, Deadline(0.45)
+    )
+
+    text = "\n".join(item.text for item in result)
+    assert "Cut short:" in text
+    assert marker in text
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_mark_answers_cut_short_by_the_deadline():
+    from sumologic_mcp_server.server import deadline_tool_call
+
+    async def run(client, name, arguments):
+        current_deadline.get().check("creating the search job")
+
+    deadline = Deadline(1)
+    deadline.expires_at -= 2
+    result = await deadline_tool_call(run, None, "execute_query", {}, deadline)
+
+    assert result[0].text.startswith("⚠️  Truncated by deadline (1s)")
+    assert "before creating the search job" in result[0].text
+    assert current_deadline.get() is None
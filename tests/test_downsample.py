@@ -0,0 +1,118 @@
+"""Tests for time-series downsampling."""
+
+import math
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient, parse_epoch_ms, record_fields
+from sumologic_mcp_server.downsample import (
+    LTTBDownsampler,
+    MinMaxDownsampler,
+    SeriesShape,
+    _Downsampler,
+    detect_shape,
+    downsample_query,
+)
+
+from .fake_sumo import FakeSumoAPI
+
+START = parse_epoch_ms("2024-01-01T00:00:00")
+END = START + 24 * 3600 * 1000
+SHAPE = SeriesShape(time_field="_timeslice", group_fields=["_sourcehost"], value_field="_count")
+
+
+def rows(hosts=("web-1", "web-2"), slices=1440):
+    return [
+        {"map": {
+            "_timeslice": str(START + i * 60_000),
+            "_sourcehost": host,
+            "_count": str(100 + round(50 * math.sin(i / 60)) + (500 if i == 700 else 0)),
+        }}
+        for host in hosts
+        for i in range(slices)
+    ]
+
+
+def test_detect_shape_uses_key_flags_and_falls_back_to_values():
+    columns = [
+        {"name": "_timeslice", "fieldType": "long", "keyField": True},
+        {"name": "status", "fieldType": "int", "keyField": True},
+        {"name": "_count", "fieldType": "int", "keyField": False},
+    ]
+    row = {"map": {"_timeslice": "1", "status": "200", "_count": "5"}}
+    shape = detect_shape(columns, row)
+    assert shape.group_fields == ["status"] and shape.value_field == "_count"
+
+    shape = detect_shape([], rows()[0])
+    assert shape.group_fields == ["_sourcehost"] and shape.value_field == "_count"
+    assert detect_shape([], {"map": {"_raw": "x"}}) is None
+
+
+@pytest.mark.parametrize("sampler_class", [MinMaxDownsampler, LTTBDownsampler])
+def test_downsamplers_reduce_each_series_and_keep_the_spike(sampler_class):
+    sampler = sampler_class(SHAPE, START, END, 100)
+    for row in rows():
+        sampler.add(row)
+    spike = max(float(record_fields(row)["_count"]) for row in rows())
+
+    series = sampler.series()
+    assert set(series) == {("web-1",), ("web-2",)}
+    for points in series.values():
+        assert 50 <= len(points) <= 100
+        times = [t for t, _, _ in points]
+        assert times == sorted(times)
+        assert max(v for _, v, _ in points) == spike
+        # The first and last slices anchor the line
+        if sampler_class is LTTBDownsampler:
+            assert times[0] == START and times[-1] == START + 1439 * 60_000
+
+
+@pytest.mark.asyncio
+async def test_downsample_query_streams_pages_and_reports_reduction():
+    api = FakeSumoAPI(records=rows())
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    result = await downsample_query(
+        client, "_index=web | timeslice 1m | count by _timeslice, _sourcehost",
+        "2024-01-01T00:00:00", "2024-01-02T00:00:00", target_points=50, page_size=500
+    )
+
+    assert api.calls["records"] == 6
+    assert api.calls["delete"] == 1
+    assert result.input_rows == 2880
+    assert result.series == 2
+    assert result.output_rows <= 100
+    assert result.reduction > 0.95
+    assert {record_fields(r)["_sourcehost"] for r in result.records} == {"web-1", "web-2"}
+
+
+def test_downsamplers_must_implement_add_and_series():
+    class Partial(_Downsampler):
+        def series(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        Partial(SHAPE, START, END, 10)
+
+
+@pytest.mark.asyncio
+async def test_execute_query_downsample_max_rows_caps_the_scan():
+    from sumologic_mcp_server import server
+
+    api = FakeSumoAPI(records=rows())
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+
+    result = await server.dispatch_tool(client, "execute_query", {
+        "query": "_index=web | timeslice 1m | count by _timeslice, _sourcehost",
+        "from_time": "2024-01-01T00:00:00",
+        "to_time": "2024-01-02T00:00:00",
+        "downsample": 50,
+        "downsample_max_rows": 1000,
+    })
+
+    text = result[0].text
+    assert "Downsampled (minmax) 1000 rows" in text
+    assert "Read only the first 1000 of 2880 rows" in text
@@ -0,0 +1,54 @@
+"""Tests for streaming query export."""
+
+import json
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.export import export_query
+
+from .fake_sumo import FakeSumoAPI
+
+
+@pytest.fixture
+def api():
+    return FakeSumoAPI(messages=[{"map": {"_raw": f"line {i}", "n": str(i)}} for i in range(10)])
+
+
+@pytest.fixture
+def client(api):
+    return SumoLogicClient("id", "key", "https://fake.sumologic.com/api", transport=api.transport)
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_writes_every_page_in_order(api, client, tmp_path):
+    result = await export_query(
+        client, "error", str(tmp_path), fmt="ndjson", page_size=3, concurrency=2
+    )
+
+    lines = (tmp_path / f"export-{result.job_id}.ndjson").read_text().splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [str(i) for i in range(10)]
+    assert result.row_count == 10
+    assert result.pages == 4
+    assert api.calls["messages"] == 4
+    assert api.calls["delete"] == 1
+
+
+@pytest.mark.asyncio
+async def test_export_parquet(client, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    result = await export_query(client, "error", str(tmp_path), path="out.parquet", fmt="parquet", page_size=4)
+
+    table = pq.read_table(result.path)
+    assert table.num_rows == 10
+    assert table.column("_raw").to_pylist()[0] == "line 0"
+
+
+@pytest.mark.asyncio
+async def test_export_refuses_paths_outside_export_dir(api, client, tmp_path):
+    with pytest.raises(ValueError, match="inside"):
+        await export_query(client, "error", str(tmp_path), path="../escape.ndjson")
+
+    # Refused before a search job was spent on it
+    assert api.calls["create"] == 0
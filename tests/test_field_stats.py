@@ -0,0 +1,116 @@
+"""Tests for streaming field statistics."""
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.field_stats import FieldStats, HyperLogLog, SpaceSaving, summarize_query
+
+from .fake_sumo import FakeSumoAPI
+
+
+def test_hyperloglog_estimates_within_a_few_percent():
+    sketch = HyperLogLog()
+    for i in range(50000):
+        sketch.add(f"user-{i}")
+    assert abs(sketch.estimate() - 50000) / 50000 < 0.05
+
+    small = HyperLogLog()
+    for i in range(10):
+        small.add(str(i % 5))
+    assert small.estimate() == 5
+
+
+def test_space_saving_keeps_heavy_hitters_with_bounded_counters():
+    sketch = SpaceSaving(capacity=8)
+    for i in range(10000):
+        sketch.add("hot" if i % 3 == 0 else f"cold-{i}")
+    assert len(sketch.counts) == 8
+    value, count, error = sketch.top(1)[0]
+    assert value == "hot"
+    assert count - error <= 3334 <= count
+
+
+def test_field_stats_reports_nulls_numeric_range_and_top_values():
+    stats = FieldStats(top_k=2)
+    for i in range(100):
+        row = {"host": f"web-{i % 4}", "latency": str(i)}
+        if i % 10 == 0:
+            row["latency"] = ""
+        stats.add({"map": row})
+
+    fields = {field.name: field for field in stats.summaries()}
+    assert fields["host"].distinct_estimate == 4
+    assert not fields["host"].numeric
+    assert fields["host"].top_values[0]["count"] == 25
+    assert fields["latency"].null_rate == 0.1
+    assert fields["latency"].numeric
+    assert (fields["latency"].min, fields["latency"].max) == (1.0, 99.0)
+
+
+@pytest.mark.asyncio
+async def test_summarize_query_pages_through_every_message():
+    api = FakeSumoAPI(messages=[{"map": {"status": str(200 + i % 3)}} for i in range(250)])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+
+    summary = await summarize_query(client, '_sourceCategory="app"', page_size=100)
+
+    assert summary.rows_scanned == 250
+    assert api.calls["messages"] == 3
+    assert api.calls["delete"] == 1
+    assert summary.fields[0].distinct_estimate == 3
+
+
+def test_space_saving_evicts_in_constant_time_and_keeps_its_guarantees():
+    import random
+    import time
+    from collections import Counter
+
+    rng = random.Random(7)
+    values = [f"v-{rng.randrange(50)}" if rng.random() < 0.5 else f"u-{i}" for i in range(200_000)]
+    sketch = SpaceSaving(capacity=1000)
+    started = time.perf_counter()
+    for value in values:
+        sketch.add(value)
+    # A min() scan per eviction would take tens of seconds here
+    assert time.perf_counter() - started < 2
+
+    truth = Counter(values)
+    assert len(sketch.counts) == 1000
+    assert sum(sketch.counts.values()) == len(values)
+    for value, count in sketch.counts.items():
+        assert count - sketch.errors[value] <= truth[value] <= count
+    # Everything above n / capacity is tracked
+    assert {v for v, n in truth.items() if n > len(values) / 1000} <= set(sketch.counts)
+
+
+@pytest.mark.asyncio
+async def test_summarize_query_leaves_the_event_loop_free_for_other_calls():
+    import asyncio
+
+    api = FakeSumoAPI(messages=[
+        {"map": {f"f{j}": f"{i}-{j}" if j < 10 else str(i % 7) for j in range(20)}}
+        for i in range(30_000)
+    ])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    loop = asyncio.get_running_loop()
+    gaps = []
+
+    async def ticker():
+        while True:
+            before = loop.time()
+            await asyncio.sleep(0.005)
+            gaps.append(loop.time() - before)
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        summary = await summarize_query(client, "error", max_rows=30_000)
+    finally:
+        ticking.cancel()
+
+    assert summary.rows_scanned == 30_000
+    # Folding inline would starve the ticker for the whole scan
+    assert len(gaps) > 10 and max(gaps) < 0.5
@@ -0,0 +1,114 @@
+"""Tests for the source freshness check."""
+
+import time
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.freshness import (
+    MAX_SCOPED_CATEGORIES,
+    check_freshness,
+    freshness_query,
+    source_inventory,
+)
+from sumologic_mcp_server.query_parser import split_stages
+
+from .fake_sumo import FakeSumoAPI
+
+SOURCES = [
+    {"category": "app/web", "collector_name": "c1"},
+    {"category": "app/web", "collector_name": "c1"},
+    {"category": "app/db", "collector_name": "c2"},
+    {"category": "app/batch", "collector_name": "c3"},
+    {"category": "infra/dns", "collector_name": "c4"},
+]
+
+
+def row(category, collector, age_seconds, messages=10):
+    last = int(time.time() * 1000) - age_seconds * 1000
+    # Shard jobs name their partial aggregates shard0..shardN
+    return {"map": {
+        "_sourcecategory": category,
+        "_collector": collector,
+        "shard0": str(last),
+        "shard1": str(last - 5000),
+        "shard2": str(messages),
+    }}
+
+
+def make_client(records):
+    api = FakeSumoAPI(records=records)
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+
+    async def get_sources(collector_id=None):
+        return SOURCES
+
+    client.get_sources = get_sources
+    return client, api
+
+
+def test_freshness_query_lists_categories_until_there_are_too_many():
+    query = freshness_query(["b", 'a"x'])
+    assert query.startswith('(_sourceCategory="a\\"x" OR _sourceCategory="b") | max(_receipttime)')
+    assert query.endswith("by _sourceCategory, _collector")
+
+    many = [f"cat/{i}" for i in range(MAX_SCOPED_CATEGORIES + 1)]
+    assert freshness_query(many, "cat").startswith('_sourceCategory="*cat*" |')
+    assert freshness_query(many).startswith("_sourceCategory=* |")
+
+
+def test_freshness_pattern_cannot_inject_terms_or_stages():
+    many = [f"cat/{i}" for i in range(MAX_SCOPED_CATEGORIES + 1)]
+    query = freshness_query(many, 'x" OR * | delete')
+    assert query.startswith('_sourceCategory="*x\\" OR * | delete*" | max(_receipttime)')
+    assert len(split_stages(query)) == 2
+
+
+@pytest.mark.asyncio
+async def test_one_job_reports_lag_stale_and_silent_sources():
+    client, api = make_client([
+        row("app/web", "c1", 60),
+        row("app/db", "c2", 3600),
+        row("app/new", "c9", 30),
+    ])
+    inventory = await source_inventory(client, "app")
+    assert len(inventory) == 3
+
+    report = await check_freshness(client, inventory, "app", "-24h", stale_after=900)
+
+    assert api.calls["create"] == 1 and api.calls["delete"] == 1
+    assert "infra/dns" not in api.created[0]["query"]
+    statuses = [(s.category, s.status) for s in report.sources]
+    assert statuses == [
+        ("app/batch", "silent"), ("app/db", "stale"), ("app/web", "ok"), ("app/new", "ok")
+    ]
+    web = report.sources[2]
+    assert 59 <= web.lag_seconds <= 62 and web.messages == 10
+    assert web.last_message_ms == web.last_receipt_ms - 5000
+    assert not report.sources[3].in_inventory
+
+
+@pytest.mark.asyncio
+async def test_sharded_check_merges_latest_receipt_across_shards():
+    client, api = make_client([row("app/web", "c1", 60)])
+    inventory = await source_inventory(client, "web")
+
+    report = await check_freshness(client, inventory, "web", "-4h", shards=4)
+
+    assert api.calls["create"] == 4
+    assert report.jobs == 4
+    [web] = report.sources
+    assert web.status == "ok" and web.messages == 40
+
+
+@pytest.mark.asyncio
+async def test_unshardable_search_is_refused_before_any_job(monkeypatch):
+    client, api = make_client([])
+    monkeypatch.setattr("sumologic_mcp_server.freshness.plan_sharded_query", lambda query: None)
+
+    with pytest.raises(ValueError, match="not a shardable aggregate"):
+        await check_freshness(client, await source_inventory(client, "app"), "app")
+
+    assert api.calls["create"] == 0
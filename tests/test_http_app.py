@@ -0,0 +1,168 @@
+"""Tests for the HTTP transport, driven in-process through httpx's ASGI transport."""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from mcp.types import TextContent
+
+from sumologic_mcp_server import server
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.scheduler import current_session
+
+from .fake_sumo import FakeSumoAPI
+
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+INITIALIZE = {
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "test", "version": "1.0"},
+    },
+}
+CALL = {
+    "jsonrpc": "2.0", "id": 2, "method": "tools/call",
+    "params": {"name": "execute_query", "arguments": {"query": "* | count by _sourceHost"}},
+}
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    api = FakeSumoAPI(records=[{"map": {"_sourcehost": f"host-{i}", "_count": "1"}} for i in range(5)])
+    client = SumoLogicClient("id", "key", "https://fake.sumologic.com/api", transport=api.transport)
+    monkeypatch.setattr(server, "sumo_client", client)
+    return api
+
+
+def reply(response: httpx.Response) -> dict:
+    """The JSON-RPC message of a JSON or single-event SSE response."""
+    assert response.status_code == 200, response.text
+    if response.headers["content-type"].startswith("application/json"):
+        return response.json()
+    data = [line[5:].strip() for line in response.text.splitlines() if line.startswith("data:")]
+    return json.loads(data[-1])
+
+
+class Worker:
+    """One process's app, with its lifespan running, behind an httpx client."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __aenter__(self):
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+        self.http = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app), base_url="http://127.0.0.1:8000"
+        )
+        return self.http
+
+    async def __aexit__(self, *exc):
+        await self.http.aclose()
+        await self._lifespan.__aexit__(*exc)
+
+
+@pytest.mark.asyncio
+async def test_session_requests_run_against_the_http_app(fake_api):
+    async with Worker(server.create_http_app(stateless=False)) as http:
+        response = await http.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+        assert reply(response)["result"]["serverInfo"]["name"] == "sumologic-mcp-server"
+        session = {**HEADERS, "mcp-session-id": response.headers["mcp-session-id"]}
+
+        await http.post(
+            "/mcp/", json={"jsonrpc": "2.0", "method": "notifications/initialized"}, headers=session
+        )
+        result = reply(await http.post("/mcp/", json=CALL, headers=session))["result"]
+
+    assert "Returned: 5" in result["content"][0]["text"]
+    assert fake_api.calls["create"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_attributed_to_their_own_session(fake_api, monkeypatch):
+    seen = {}
+    all_in = asyncio.Event()
+
+    async def dispatch(client, name, arguments):
+        seen[arguments["query"]] = current_session.get()
+        if len(seen) == 6:
+            all_in.set()
+        # Hold every call open until all of them overlap
+        await asyncio.wait_for(all_in.wait(), 5)
+        return [TextContent(type="text", text="ok")]
+
+    monkeypatch.setattr(server, "dispatch_tool", dispatch)
+    async with Worker(server.create_http_app(stateless=False)) as http:
+        sessions = []
+        for _ in range(2):
+            response = await http.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+            session = {**HEADERS, "mcp-session-id": response.headers["mcp-session-id"]}
+            await http.post(
+                "/mcp/", json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                headers=session
+            )
+            sessions.append(session)
+
+        calls = [
+            (f"{n}-{i}", session) for n, session in enumerate(sessions) for i in range(3)
+        ]
+        responses = await asyncio.gather(*(
+            http.post("/mcp/", json={
+                **CALL, "id": 10 + i,
+                "params": {"name": "execute_query", "arguments": {"query": query}},
+            }, headers=session)
+            for i, (query, session) in enumerate(calls)
+        ))
+
+    assert all(reply(response)["result"]["content"][0]["text"] == "ok" for response in responses)
+    assert seen == {query: session["mcp-session-id"] for query, session in calls}
+
+
+@pytest.mark.asyncio
+async def test_multi_worker_requests_of_one_session_may_reach_different_workers(
+    fake_api, monkeypatch, tmp_path
+):
+    monkeypatch.setenv("SUMO_ACCESS_ID", "id")
+    monkeypatch.setenv("SUMO_ACCESS_KEY", "key")
+    monkeypatch.setenv("SUMO_SHARED_STATE_PATH", "")
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    monkeypatch.setenv("MCP_STATELESS", "false")
+    monkeypatch.setattr(sys, "argv", ["sumologic-mcp-server", "--transport", "http", "--workers", "2"])
+    started = {}
+    monkeypatch.setattr("uvicorn.run", lambda target, **kwargs: started.update(target=target, **kwargs))
+
+    assert server.main() == 0
+    assert started["workers"] == 2 and started["factory"]
+    assert os.environ["SUMO_SHARED_STATE_PATH"] == str(tmp_path / "sumologic-mcp" / "state.sqlite")
+
+    # What each uvicorn worker process builds from the factory
+    import_path, name = started["target"].split(":")
+    factory = getattr(sys.modules[import_path], name)
+    async with Worker(factory()) as first, Worker(factory()) as second:
+        # The session is opened on one worker and used on the other
+        init = reply(await first.post("/mcp/", json=INITIALIZE, headers=HEADERS))
+        assert init["result"]["serverInfo"]["name"] == "sumologic-mcp-server"
+        version = {**HEADERS, "mcp-protocol-version": init["result"]["protocolVersion"]}
+        result = reply(await second.post("/mcp/", json=CALL, headers=version))["result"]
+        assert "Returned: 5" in result["content"][0]["text"]
+
+        # SSE sessions cannot follow a client across workers, so they are not offered
+        assert (await second.get("/sse")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_single_process_app_serves_sse_alongside_streamable_http(fake_api):
+    async with Worker(server.create_http_app(stateless=False)) as http:
+        # No such SSE session, but the message endpoint is there to say so
+        response = await http.post(
+            "/messages/?session_id=00000000000000000000000000000000", json=INITIALIZE
+        )
+        assert response.status_code == 404
+
+        # Requests without a session are refused rather than served statelessly
+        response = await http.post("/mcp/", json=CALL, headers=HEADERS)
+        assert response.status_code == 400
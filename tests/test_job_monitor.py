@@ -0,0 +1,121 @@
+"""Tests for the shared job-status poller."""
+
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+from sumologic_mcp_server.client import SearchJob, SumoLogicClient
+from sumologic_mcp_server.job_monitor import JobFailed, JobMonitor
+from sumologic_mcp_server.scheduler import BACKGROUND, INTERACTIVE
+
+from .fake_sumo import FakeSumoAPI
+
+
+class TimedJobs:
+    """Status source whose jobs finish a fixed time after they are started (or first polled)."""
+
+    def __init__(self, seconds, failing=()):
+        self.seconds = seconds
+        self.failing = set(failing)
+        self.started = {}
+        self.polls = Counter()
+        self.order = []
+
+    def start(self, monitor, job_id, **kwargs):
+        self.started[job_id] = time.monotonic()
+        return monitor.watch(job_id, **kwargs)
+
+    async def fetch(self, job_id):
+        self.polls[job_id] += 1
+        self.order.append((job_id, time.monotonic()))
+        started = self.started.setdefault(job_id, time.monotonic())
+        if job_id in self.failing:
+            state = "FAILED"
+        elif time.monotonic() - started >= self.seconds:
+            state = "DONE GATHERING RESULTS"
+        else:
+            state = "GATHERING RESULTS"
+        return SearchJob(
+            id=job_id, query="*", from_time="-1h", to_time="now",
+            state=state, message_count=self.polls[job_id] * 10
+        )
+
+
+@pytest.mark.asyncio
+async def test_waiters_on_one_job_share_its_polls():
+    jobs = TimedJobs(0.3)
+    monitor = JobMonitor(jobs.fetch)
+
+    results = await asyncio.gather(*(monitor.watch("job-1", poll_interval=0.1) for _ in range(5)))
+
+    assert {job.state for job in results} == {"DONE GATHERING RESULTS"}
+    # One poll stream, not five
+    assert jobs.polls["job-1"] <= 6
+    assert monitor.stats().jobs == 0
+
+
+@pytest.mark.asyncio
+async def test_polls_are_spaced_and_urgent_jobs_go_first():
+    jobs = TimedJobs(0.0)
+    monitor = JobMonitor(jobs.fetch, polls_per_second=20)
+
+    background = [monitor.watch(f"bg-{i}", priority=BACKGROUND) for i in range(5)]
+    interactive = monitor.watch("ui", priority=INTERACTIVE)
+    await asyncio.gather(interactive, *background)
+
+    times = [t for _, t in jobs.order]
+    assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+    assert jobs.order[0][0] == "ui"
+
+
+@pytest.mark.asyncio
+async def test_min_messages_failure_and_cancelled_waiters():
+    jobs = TimedJobs(10.0, failing={"bad"})
+    monitor = JobMonitor(jobs.fetch)
+
+    early = await monitor.watch("slow", poll_interval=0.05, min_messages=20)
+    assert early.state == "GATHERING RESULTS" and early.message_count >= 20
+
+    with pytest.raises(JobFailed):
+        await monitor.watch("bad")
+
+    waiting = monitor.watch("abandoned", poll_interval=0.05)
+    await asyncio.sleep(0.1)
+    waiting.cancel()
+    await asyncio.sleep(0.01)
+    polls = jobs.polls["abandoned"]
+    await asyncio.sleep(0.2)
+    assert jobs.polls["abandoned"] == polls
+
+
+@pytest.mark.asyncio
+async def test_expected_duration_skips_polls_of_similar_jobs():
+    jobs = TimedJobs(0.4)
+    monitor = JobMonitor(jobs.fetch)
+
+    await jobs.start(monitor, "first", poll_interval=2)
+    assert jobs.polls["first"] == 3
+    assert 0.4 <= monitor.expected_seconds <= 0.6
+
+    # The first poll waits for the expected duration and finds the job done
+    await asyncio.gather(*(jobs.start(monitor, f"next-{i}", poll_interval=2) for i in range(3)))
+    assert [jobs.polls[f"next-{i}"] for i in range(3)] == [1, 1, 1]
+    assert monitor.stats().completed == 4
+
+
+@pytest.mark.asyncio
+async def test_client_waits_through_the_shared_monitor():
+    api = FakeSumoAPI(records=[{"map": {"_count": "1"}}])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+
+    results = await asyncio.gather(*(
+        client.execute_query(f"_index=web | count by host{i}") for i in range(10)
+    ))
+
+    assert all(result.total_count == 1 for result in results)
+    assert api.calls["status"] == 10
+    assert client.job_monitor.stats().polls == 10
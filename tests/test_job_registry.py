@@ -0,0 +1,101 @@
+"""Tests for the persistent search-job registry."""
+
+import asyncio
+import os
+import stat
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server import server
+from sumologic_mcp_server.job_registry import JobRegistry, default_registry_path
+
+from .fake_sumo import FakeSumoAPI
+
+QUERY = '_sourceCategory="app" | count by host'
+
+
+def make_client(api, path):
+    return SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=api.transport, job_registry=JobRegistry(str(path))
+    )
+
+
+@pytest.mark.asyncio
+async def test_restarted_process_reattaches_to_live_job(tmp_path):
+    api = FakeSumoAPI(records=[{"map": {"host": "a", "_count": "3"}}])
+    path = tmp_path / "jobs.sqlite"
+
+    first = await make_client(api, path).execute_query(QUERY, limit=10)
+    # A new client on the same file stands in for a restarted server
+    second = await make_client(api, path).execute_query(QUERY, limit=10)
+
+    assert api.calls["create"] == 1
+    assert second.job_id == first.job_id
+    assert second.records == first.records
+    # The window is relative, so the answer says how old the reused job is
+    assert first.reused_job_seconds is None
+    assert 0 <= second.reused_job_seconds < 5
+
+
+@pytest.mark.asyncio
+async def test_dead_jobs_are_forgotten_and_rerun(tmp_path):
+    api = FakeSumoAPI(records=[{"map": {"host": "a", "_count": "3"}}])
+    path = tmp_path / "jobs.sqlite"
+
+    first = await make_client(api, path).execute_query(QUERY, limit=10)
+    del api.jobs[first.job_id]
+    second = await make_client(api, path).execute_query(QUERY, limit=10)
+
+    assert api.calls["create"] == 2
+    assert second.job_id != first.job_id
+    assert [job.job_id for job in JobRegistry(str(path)).jobs()] == [second.job_id]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_processes_wait_for_the_claimed_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    creator, waiter = JobRegistry(path), JobRegistry(path)
+
+    assert await creator.attach_or_claim("k", relative=True) is None
+    waiting = asyncio.create_task(waiter.attach_or_claim("k", relative=True, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    await creator.register("k", "job-7")
+    assert await asyncio.wait_for(waiting, 1) == "job-7"
+
+
+@pytest.mark.asyncio
+async def test_one_process_reruns_a_repeated_relative_window(tmp_path):
+    api = FakeSumoAPI(records=[{"map": {"host": "a", "_count": "3"}}])
+    client = make_client(api, tmp_path / "jobs.sqlite")
+
+    first = await client.execute_query(QUERY, "-15m", "now", limit=10)
+    second = await client.execute_query(QUERY, "-15m", "now", limit=10)
+    # Fixed windows are still shared
+    fixed = [
+        await client.execute_query(QUERY, "2024-01-01T00:00:00", "2024-01-01T01:00:00", limit=10)
+        for _ in range(2)
+    ]
+
+    assert api.calls["create"] == 3
+    assert second.job_id != first.job_id and second.reused_job_seconds is None
+    assert fixed[0].job_id == fixed[1].job_id
+
+
+def test_registry_is_opt_in_and_private_to_its_user(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUMO_ACCESS_ID", "id")
+    monkeypatch.setenv("SUMO_ACCESS_KEY", "key")
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    monkeypatch.delenv("JOB_REGISTRY_ENABLED", raising=False)
+    monkeypatch.delenv("JOB_REGISTRY_PATH", raising=False)
+    assert server.build_sumo_client().job_registry is None
+
+    monkeypatch.setenv("JOB_REGISTRY_ENABLED", "true")
+    registry = server.build_sumo_client().job_registry
+
+    assert registry.path == default_registry_path() == str(tmp_path / "state" / "sumologic-mcp" / "jobs.sqlite")
+    assert stat.S_IMODE(os.stat(registry.path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(registry.path)).st_mode) == 0o700
@@ -0,0 +1,97 @@
+"""Tests for incremental parsing of result pages."""
+
+import json
+import tracemalloc
+
+import httpx
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient, record_fields
+from sumologic_mcp_server.json_stream import ResultPageParser
+
+from .fake_sumo import FakeSumoAPI
+
+
+def page_body(rows, total=None):
+    return json.dumps({
+        "fields": [{"name": "_raw", "fieldType": "string"}],
+        "messages": rows,
+        "totalCount": len(rows) if total is None else total,
+    }, ensure_ascii=False).encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 1 << 20])
+def test_parser_yields_the_same_rows_for_any_chunking(chunk_size):
+    rows = [{"map": {"_raw": "é" * i, "n": i}} for i in range(50)]
+    body = page_body(rows, total=12345)
+    parser = ResultPageParser("messages")
+
+    parsed = []
+    for start in range(0, len(body), chunk_size):
+        parsed.extend(parser.feed(body[start:start + chunk_size]))
+    parsed.extend(parser.close())
+
+    assert parsed == rows
+    # A number split across chunks is not cut short
+    assert parser.total_count == 12345
+    assert parser.fields == [{"name": "_raw", "fieldType": "string"}]
+
+
+def test_parser_rejects_truncated_and_malformed_pages():
+    parser = ResultPageParser("messages")
+    parser.feed(page_body([{"a": 1}, {"a": 2}])[:-10])
+    with pytest.raises(ValueError, match="incomplete"):
+        parser.close()
+
+    with pytest.raises(ValueError):
+        ResultPageParser("messages").feed(b'{"messages": [{"a": 1}} ')
+
+
+@pytest.mark.asyncio
+async def test_stream_result_page_projects_rows_as_they_arrive():
+    api = FakeSumoAPI(messages=[{"map": {"_raw": f"line {i}", "host": f"h{i}"}} for i in range(30)])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    job = await client.create_search_job("error", "-1h", "now")
+
+    async with client.stream_result_page(job.id, "messages", 10, 5, fields=["host"]) as page:
+        rows = [record_fields(row) async for row in page]
+
+    assert rows == [{"host": f"h{i}"} for i in range(10, 15)]
+    assert page.total_count == 30 and page.rows == 5
+
+
+@pytest.mark.asyncio
+async def test_streamed_page_peak_memory_stays_below_the_body_size():
+    rows, row_bytes = 20000, 200
+
+    async def body():
+        yield b'{"fields": [], "messages": ['
+        chunk = []
+        for i in range(rows):
+            chunk.append(json.dumps({"map": {"_raw": f"{i:08d}" + "x" * row_bytes}}).encode())
+            if len(chunk) == 256:
+                yield b",".join(chunk) + b","
+                chunk = []
+        yield b",".join(chunk) + b'], "totalCount": %d}' % rows
+
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    )
+
+    tracemalloc.start()
+    try:
+        count = 0
+        async with client.stream_result_page("job-1", "messages", 0, rows) as page:
+            async for row in page:
+                count += len(record_fields(row)["_raw"]) > row_bytes
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == rows == page.rows
+    # The body is over 4 MB; only a chunk and a row are held at a time
+    assert page.bytes_read > 4_000_000
+    assert peak < 1_000_000
@@ -0,0 +1,103 @@
+"""Tests for the in-flight memory budget."""
+
+import asyncio
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.export import export_query
+from sumologic_mcp_server.memory_budget import PARSED_OVERHEAD, MemoryBudget
+
+from .fake_sumo import FakeSumoAPI
+
+
+@pytest.mark.asyncio
+async def test_reservations_wait_for_memory_to_be_released():
+    budget = MemoryBudget(max_bytes=1000, session_bytes=1000)
+
+    async with budget.call("a") as first:
+        await first.reserve(800)
+        async with budget.call("b") as second:
+            blocked = asyncio.create_task(second.reserve(400))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+            assert budget.stats().waiting == 1
+
+            first.release(800)
+            await asyncio.wait_for(blocked, 1)
+            assert budget.stats().used_bytes == 400
+
+    assert budget.stats().used_bytes == 0
+    assert budget.stats().peak_bytes == 800
+
+
+@pytest.mark.asyncio
+async def test_calls_reserving_in_steps_do_not_deadlock():
+    budget = MemoryBudget(max_bytes=1000, session_bytes=1000)
+    step = asyncio.Event()
+
+    async def call(session):
+        async with budget.call(session) as memory:
+            await memory.reserve(400)
+            await step.wait()
+            # Both now hold 400 and want 400 more than the 200 left
+            await memory.reserve(400)
+            await asyncio.sleep(0.01)
+            return memory.held
+
+    calls = [asyncio.create_task(call(s)) for s in ("a", "b")]
+    await asyncio.sleep(0.01)
+    step.set()
+    assert await asyncio.wait_for(asyncio.gather(*calls), 1) == [800, 800]
+    assert budget.stats().used_bytes == 0
+    # Only one went over the budget at a time; the other waited for it
+    assert budget.stats().peak_bytes == 1600 - 400
+
+
+@pytest.mark.asyncio
+async def test_session_quota_and_single_oversized_call():
+    budget = MemoryBudget(max_bytes=10_000, session_bytes=500)
+
+    async with budget.call("greedy") as alone:
+        # A call holding all of its session's usage is never blocked by itself
+        await asyncio.wait_for(alone.reserve(2000), 1)
+        async with budget.call("greedy") as other:
+            blocked = asyncio.create_task(other.reserve(100))
+            async with budget.call("polite") as polite:
+                await asyncio.wait_for(polite.reserve(400), 1)
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+            alone.release(2000)
+            await asyncio.wait_for(blocked, 1)
+
+
+@pytest.mark.asyncio
+async def test_new_calls_wait_while_budget_is_nearly_full():
+    budget = MemoryBudget(max_bytes=1000, session_bytes=1000)
+
+    async with budget.call("a") as memory:
+        await memory.reserve(950)
+        entering = asyncio.create_task(budget.call("b").__aenter__())
+        await asyncio.sleep(0.01)
+        assert not entering.done()
+        memory.release(950)
+        await asyncio.wait_for(entering, 1)
+
+
+@pytest.mark.asyncio
+async def test_pages_are_charged_and_export_releases_them(tmp_path):
+    api = FakeSumoAPI(messages=[{"map": {"_raw": "x" * 100}} for _ in range(50)])
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    budget = MemoryBudget(max_bytes=10_000_000)
+
+    async with budget.call("s") as memory:
+        page = await client.get_search_job_messages(
+            (await client.create_search_job("q")).id, limit=10
+        )
+        assert page.size_bytes > 10 * 100 * PARSED_OVERHEAD
+        assert memory.held == page.size_bytes
+
+        await export_query(client, "q", str(tmp_path), page_size=10)
+        assert memory.held == page.size_bytes
@@ -0,0 +1,75 @@
+"""Tests for per-call profiling."""
+
+import asyncio
+import json
+
+import pytest
+
+from sumologic_mcp_server.profiling import ToolProfiler
+
+
+def busy(seconds):
+    end = asyncio.get_running_loop().time() + seconds
+    while asyncio.get_running_loop().time() < end:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_profile_writes_collapsed_stacks_and_summary(tmp_path):
+    async with ToolProfiler("execute_query", "42", str(tmp_path), interval=0.001) as profiler:
+        busy(0.05)
+        await asyncio.sleep(0.05)
+
+    summary = profiler.summary
+    assert summary.samples > 0
+    assert 0 < summary.idle_fraction < 1
+    # Blocking the loop shows up as lag on the next tick
+    assert summary.loop_lag_ms["max"] > 10
+
+    lines = (tmp_path / "execute_query-42.collapsed").read_text().splitlines()
+    assert any("busy (test_profiling.py" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+    saved = json.loads((tmp_path / "execute_query-42.json").read_text())
+    assert saved["samples"] == summary.samples
+
+
+@pytest.mark.asyncio
+async def test_profile_files_stay_in_the_output_directory(tmp_path):
+    output = tmp_path / "profiles"
+    async with ToolProfiler("../../escape", "../id/x", str(output), interval=0.001) as profiler:
+        await asyncio.sleep(0.01)
+
+    written = sorted(p.name for p in output.iterdir())
+    assert written == ["______escape-___id_x.collapsed", "______escape-___id_x.json"]
+    assert [p.name for p in tmp_path.iterdir()] == ["profiles"]
+    assert profiler.summary.profile_path.startswith(str(output))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode, name, profiled", [
+    ("false", "list_source_categories", False),
+    ("request", "list_source_categories", True),
+    ("request", "../../unknown", False),
+])
+async def test_clients_only_profile_listed_tools_when_allowed(mode, name, profiled, tmp_path, monkeypatch):
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from sumologic_mcp_server import server
+
+    monkeypatch.setattr(server, "PROFILE_MODE", mode)
+    monkeypatch.setattr(server, "sumo_client", object())
+    monkeypatch.setenv("MCP_PROFILE_DIR", str(tmp_path))
+
+    async def dispatch(client, tool, arguments):
+        return [server.TextContent(type="text", text="ok")]
+
+    monkeypatch.setattr(server, "dispatch_tool", dispatch)
+    async with create_connected_server_and_client_session(server.app) as session:
+        tools = await session.list_tools()
+        assert ("profile" in tools.tools[0].inputSchema["properties"]) == (mode == "request")
+        result = await session.call_tool(name, {"profile": True})
+
+    assert ("Profile:" in result.content[-1].text) == profiled
+    assert len(list(tmp_path.iterdir())) == (2 if profiled else 0)
@@ -0,0 +1,49 @@
+"""Tests for query cost estimation and limit pushdown."""
+
+from sumologic_mcp_server.query_cost import (
+    analyze_query,
+    estimate_query_cost,
+    push_down_fields,
+    push_down_limit,
+)
+
+HOUR = 3600
+
+
+def test_unscoped_queries_cost_more():
+    scoped = estimate_query_cost('_sourceCategory="prod/app" error', HOUR)
+    unscoped = estimate_query_cost("error", HOUR)
+    wildcard = estimate_query_cost("_sourceCategory=*app* error", HOUR)
+
+    assert scoped.scoped and scoped.score == 1.0
+    assert not unscoped.scoped and unscoped.score == 20.0
+    assert wildcard.leading_wildcard
+    assert wildcard.score == 5 * scoped.score
+    assert estimate_query_cost("*timeout*", HOUR).score == 100.0
+
+
+def test_thresholds_classify_plans():
+    assert analyze_query("_index=prod error | count", HOUR).level == "ok"
+    assert analyze_query("error | count", 2 * HOUR).level == "warn"
+    assert analyze_query("error | count", 7 * 24 * HOUR).level == "refuse"
+
+
+def test_limit_pushed_only_into_raw_message_queries():
+    assert push_down_limit("_index=prod error", 50) == "_index=prod error | limit 50"
+    assert push_down_limit("_index=prod error | count by host", 50) is None
+    assert push_down_limit("_index=prod error | limit 10", 50) is None
+
+    plan = analyze_query("_index=prod error | where a > 1", HOUR, limit=100)
+    assert plan.limit_pushed_down
+    assert plan.query.endswith("| limit 100")
+    assert plan.original_query == "_index=prod error | where a > 1"
+
+
+def test_fields_are_pushed_down_unless_unsafe():
+    assert push_down_fields("_index=prod error | limit 5", ["_sourcehost", "status"]) == (
+        "_index=prod error | limit 5 | fields _sourcehost, status"
+    )
+    assert push_down_fields("_index=prod | count by host", ["host"]).endswith("| fields host")
+    # The timeslice cache needs the slice column
+    assert push_down_fields("_index=prod | timeslice 1m | count by _timeslice", ["_count"]) is None
+    assert push_down_fields("_index=prod", ["bad field"]) is None
@@ -0,0 +1,61 @@
+"""Tests for local query parsing and validation."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.query_parser import split_stages, validate_query_syntax
+
+
+def test_split_stages_respects_quotes_and_brackets():
+    """Pipes inside strings or parentheses do not start a new stage."""
+    stages = split_stages('_sourceCategory=app "a|b" | parse regex "(?<x>a|b)" | where (a | b)')
+    assert stages == ['_sourceCategory=app "a|b"', 'parse regex "(?<x>a|b)"', "where (a | b)"]
+
+
+@pytest.mark.parametrize("query", [
+    "_sourceCategory=prod error | count by _sourceHost | sort by _count desc | limit 10",
+    '_sourceCategory=prod | parse "user=* action=*" as user, action | count by user, action',
+    '_sourceCategory=prod | parse regex "took (?<ms>\\d+)ms" | avg(ms) by _sourceHost',
+    "_sourceCategory=prod | timeslice 5m | count by _timeslice",
+    "_sourceCategory=prod | latency = duration / 1000 | where latency > 5 | fields latency",
+])
+def test_valid_queries(query):
+    assert validate_query_syntax(query).valid is True
+
+
+@pytest.mark.parametrize("query, fragment", [
+    ("", "empty"),
+    ('_sourceCategory=prod "unterminated', "Unterminated"),
+    ("_sourceCategory=prod | where (a > 1", "Unclosed"),
+    ("_sourceCategory=prod | count by", "requires at least one field"),
+    ("_sourceCategory=prod | count by host |", "Empty pipe segment"),
+    ('_sourceCategory=prod | parse "a=* b=*" as a', "wildcard"),
+    ('_sourceCategory=prod | parse regex "no groups"', "named capture group"),
+    ("_sourceCategory=prod | timeslice fast", "timeslice requires"),
+    ("_sourceCategory=prod | limit ten", "positive integer"),
+    ("_sourceCategory=prod | sum by host", "field argument"),
+])
+def test_invalid_queries(query, fragment):
+    result = validate_query_syntax(query)
+    assert result.valid is False
+    assert fragment in result.message
+
+
+def test_unknown_operators_are_inconclusive():
+    assert validate_query_syntax("_sourceCategory=prod | json auto | transpose row _timeslice").valid is None
+
+
+@pytest.mark.asyncio
+async def test_client_validates_locally_and_caches_remote_results():
+    """Conclusive queries skip the API; remote verdicts are cached by normalized text."""
+    client = SumoLogicClient("id", "key")
+    client._validate_query_remote = AsyncMock(return_value={"valid": True, "message": "ok"})
+
+    result = await client.validate_query("error | count by host")
+    assert result == {"valid": True, "message": "Query syntax is valid", "source": "local"}
+
+    await client.validate_query("error | json auto")
+    result = await client.validate_query("error  |  json   auto")
+    assert result["source"] == "remote"
+    assert client._validate_query_remote.await_count == 1
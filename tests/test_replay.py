@@ -0,0 +1,132 @@
+"""Tests for API trace recording and replay."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.recorder import RecordingTransport, TraceRecorder
+from sumologic_mcp_server.replay import (
+    endpoint_latencies,
+    extract_workload,
+    format_reports,
+    load_trace,
+    recorded_report,
+    replay,
+)
+
+from .fake_sumo import FakeSumoAPI
+
+
+async def record_workload(path, **recorder_options) -> TraceRecorder:
+    api = FakeSumoAPI(messages=[{"map": {"_raw": f"line {i}"}} for i in range(30)])
+    recorder = TraceRecorder(str(path), **recorder_options)
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=api.transport, recorder=recorder
+    )
+    for _ in range(3):
+        await client.execute_query("error", "2026-01-01T00:00:00", "2026-01-01T01:00:00", 10)
+        await asyncio.sleep(0.05)
+    recorder.close()
+    return recorder
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_endpoints_states_and_sizes(tmp_path):
+    trace = tmp_path / "trace.ndjson"
+    await record_workload(trace)
+
+    events = load_trace([str(trace)])
+    assert [e["endpoint"] for e in events[:3]] == ["create", "status", "messages"]
+    create, status, fetch = events[:3]
+    assert create["query"] == "error" and create["from"] == "2026-01-01T00:00:00"
+    assert status["state"] == "DONE GATHERING RESULTS" and status["previous_state"] is None
+    assert fetch["rows"] == 10 and fetch["response_bytes"] > 0
+    assert "response_body" not in fetch
+    assert all("test_key" not in json.dumps(e) for e in events)
+
+
+class SlowPage(httpx.AsyncByteStream):
+    """A records page delivered in chunks, noting how far it has been sent."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_recording_tees_streamed_pages_instead_of_reading_them_ahead(tmp_path):
+    body = json.dumps({
+        "fields": [{"name": "n"}],
+        "records": [{"map": {"n": str(i)}} for i in range(3)],
+        "totalCount": 3,
+    }).encode()
+    page = SlowPage([body[i:i + 40] for i in range(0, len(body), 40)])
+    inner = httpx.MockTransport(lambda request: httpx.Response(200, stream=page))
+    recorder = TraceRecorder(str(tmp_path / "trace.ndjson"))
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api",
+        transport=RecordingTransport(inner, recorder)
+    )
+
+    sent_at_first_row = None
+    async with client.stream_result_page("job-1", "records", 0, 3) as rows:
+        async for _ in rows:
+            if sent_at_first_row is None:
+                sent_at_first_row = page.sent
+    recorder.close()
+
+    assert sent_at_first_row < len(page.chunks)
+    [event] = load_trace([str(tmp_path / "trace.ndjson")])
+    assert event["endpoint"] == "records"
+    assert event["rows"] == 3 and event["total_count"] == 3
+    assert event["response_bytes"] == len(body)
+
+
+@pytest.mark.asyncio
+async def test_recorder_rotates_and_optionally_keeps_bodies(tmp_path):
+    trace = tmp_path / "trace.ndjson"
+    recorder = await record_workload(trace, max_bytes=1500, backups=20, include_bodies=True)
+
+    files = sorted(str(p) for p in tmp_path.iterdir())
+    assert len(files) > 1
+    events = load_trace(files)
+    assert len(events) == recorder.events
+    fetch = next(e for e in events if e["endpoint"] == "messages")
+    assert len(fetch["response_body"]["messages"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_calls_under_another_configuration(tmp_path, monkeypatch):
+    trace = tmp_path / "trace.ndjson"
+    await record_workload(trace, include_bodies=True)
+    events = load_trace([str(trace)])
+    queries = extract_workload(events)
+    assert len(queries) == 3
+    assert queries[0].limit == 10 and queries[0].message_count == 30
+    assert queries[0].rows[0] == {"map": {"_raw": "line 0"}}
+
+    latencies = endpoint_latencies(events)
+    monkeypatch.setenv("JOB_REGISTRY_ENABLED", "false")
+    shared = str(tmp_path / "shared.sqlite")
+    baseline = await replay(queries, latencies, speed=2, label="baseline")
+    candidate = await replay(
+        queries, latencies, speed=2, label="candidate",
+        overrides={"SUMO_SHARED_STATE_PATH": shared, "RESULT_CACHE_TTL": "300"}
+    )
+
+    assert baseline.errors == candidate.errors == 0
+    assert baseline.calls["create"] == 3
+    # The result cache answers the repeated searches without new jobs
+    assert candidate.calls["create"] == 1
+
+    table = format_reports([recorded_report(events, queries), baseline, candidate])
+    assert "create calls" in table and "-67%" in table
@@ -0,0 +1,80 @@
+"""Tests for stratified sampling."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sumologic_mcp_server.client import SearchResult, SumoLogicClient, parse_epoch_ms
+from sumologic_mcp_server.sampling import stratified_sample
+
+
+def message(bucket, index, host):
+    return {"map": {
+        "_messageid": f"{bucket}-{index}",
+        "_sourcehost": host,
+        "_raw": f"bucket {bucket} message {index}",
+    }}
+
+
+@pytest.fixture
+def client():
+    return SumoLogicClient("test_id", "test_key", "https://test.sumologic.com/api")
+
+
+@pytest.mark.asyncio
+async def test_sample_spreads_over_buckets_and_fills_quiet_ones(client):
+    start = parse_epoch_ms("2024-01-01T00:00:00")
+    # Bucket 0 is a burst, bucket 1 is silent, buckets 2 and 3 are quiet
+    available = {0: 50, 1: 0, 2: 1, 3: 2}
+
+    async def execute_query(query, from_time, to_time, limit, fields=None, early=False):
+        # A sample needs some messages of each bucket, not the first ones
+        assert early
+        bucket = (parse_epoch_ms(from_time) - start) // (15 * 60 * 1000)
+        rows = [message(bucket, i, "web-1") for i in range(available[bucket])]
+        return SearchResult(records=rows[:limit], fields=[], total_count=len(rows), job_id="j")
+
+    client.execute_query = AsyncMock(side_effect=execute_query)
+    sample = await stratified_sample(
+        client, "app", limit=8, from_time="2024-01-01T00:00:00",
+        to_time="2024-01-01T01:00:00", buckets=4
+    )
+
+    assert client.execute_query.await_count == 4
+    assert [b.selected for b in sample.buckets] == [5, 0, 1, 2]
+    assert len(sample.records) == 8
+
+
+@pytest.mark.asyncio
+async def test_sample_by_host_interleaves_hosts(client):
+    rows = [message(0, i, "noisy") for i in range(6)] + [message(0, 6, "quiet")]
+    client.execute_query = AsyncMock(
+        return_value=SearchResult(records=rows, fields=[], total_count=7, job_id="j")
+    )
+
+    sample = await stratified_sample(
+        client, "app", limit=2, from_time="2024-01-01T00:00:00",
+        to_time="2024-01-01T01:00:00", buckets=1, by_host=True
+    )
+
+    assert sample.hosts == 2
+    assert client.execute_query.await_args.args[0] == '_sourceCategory="app" | limit 2'
+
+
+@pytest.mark.asyncio
+async def test_sample_fetches_only_requested_fields_plus_dedup_keys(client):
+    rows = [message(0, i, "web-1") for i in range(3)]
+    client.execute_query = AsyncMock(
+        return_value=SearchResult(records=rows, fields=[], total_count=3, job_id="j")
+    )
+    sample = await stratified_sample(
+        client, "app", limit=3, from_time="2024-01-01T00:00:00",
+        to_time="2024-01-01T01:00:00", buckets=1, fields=["_sourcehost"]
+    )
+
+    query, *_ = client.execute_query.await_args.args
+    assert query.endswith("| fields _sourcehost, _messageid, _messagetime")
+    assert client.execute_query.await_args.kwargs["fields"] == [
+        "_sourcehost", "_messageid", "_messagetime"
+    ]
+    assert sample.records == [{"map": {"_sourcehost": "web-1"}}] * 3
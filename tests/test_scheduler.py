@@ -0,0 +1,83 @@
+"""Tests for the job priority scheduler."""
+
+import asyncio
+
+import pytest
+
+from sumologic_mcp_server.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    NORMAL,
+    JobScheduler,
+    SchedulerBusy,
+)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_reserved_slots_keep_interactive_calls_flowing():
+    """Background work cannot take the slots reserved for interactive calls."""
+    scheduler = JobScheduler(max_concurrent=3, reserved_interactive=1)
+    await scheduler.acquire(BACKGROUND, "bulk")
+    await scheduler.acquire(BACKGROUND, "bulk")
+
+    third = asyncio.create_task(scheduler.acquire(BACKGROUND, "bulk"))
+    await _settle()
+    assert not third.done()
+
+    await asyncio.wait_for(scheduler.acquire(INTERACTIVE, "agent"), 1)
+    third.cancel()
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_and_fair_sessions_go_first():
+    """Waiting calls are granted by class, then round-robin across sessions."""
+    scheduler = JobScheduler(max_concurrent=1, reserved_interactive=0)
+    await scheduler.acquire(NORMAL, "x")
+
+    order = []
+
+    async def call(priority, session):
+        await scheduler.acquire(priority, session)
+        order.append((priority, session))
+
+    tasks = [
+        asyncio.create_task(call(BACKGROUND, "bulk")),
+        asyncio.create_task(call(NORMAL, "a")),
+        asyncio.create_task(call(NORMAL, "a")),
+        asyncio.create_task(call(NORMAL, "b")),
+        asyncio.create_task(call(INTERACTIVE, "c")),
+    ]
+    await _settle()
+
+    for session in ["x", "c", "a", "b", "a"]:
+        scheduler.release(session)
+        await _settle()
+
+    await asyncio.gather(*tasks)
+    assert order == [
+        (INTERACTIVE, "c"), (NORMAL, "a"), (NORMAL, "b"), (NORMAL, "a"), (BACKGROUND, "bulk")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_admission_control_rejects_when_queue_is_deep():
+    scheduler = JobScheduler(max_concurrent=1, reserved_interactive=0, max_queue_depth=1)
+    await scheduler.acquire(NORMAL, "a")
+    waiting = asyncio.create_task(scheduler.acquire(NORMAL, "b"))
+    await _settle()
+
+    with pytest.raises(SchedulerBusy):
+        await scheduler.acquire(BACKGROUND, "c")
+    interactive = asyncio.create_task(scheduler.acquire(INTERACTIVE, "d"))
+    await _settle()
+
+    stats = scheduler.stats()
+    assert stats.rejected[BACKGROUND] == 1
+    assert stats.queued[INTERACTIVE] == 1
+    waiting.cancel()
+    interactive.cancel()
@@ -0,0 +1,57 @@
+"""Load test: many concurrent MCP sessions sharing one server process."""
+
+import asyncio
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from sumologic_mcp_server import server
+from sumologic_mcp_server.client import SumoLogicClient
+
+from .fake_sumo import FakeSumoAPI
+
+SESSIONS = 50
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Point the shared server client at a fake Sumo API."""
+    api = FakeSumoAPI(
+        messages=[
+            {"map": {"_messageid": str(i), "_messagetime": str(1_700_000_000_000 + i), "_raw": f"line {i}"}}
+            for i in range(20)
+        ],
+        records=[{"map": {"_sourcehost": f"host-{i}", "_count": "1"}} for i in range(5)]
+    )
+    client = SumoLogicClient("id", "key", "https://fake.sumologic.com/api", transport=api.transport)
+    monkeypatch.setattr(server, "sumo_client", client)
+    monkeypatch.setattr(server, "live_tail", None)
+    return api
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_share_client_and_isolate_cursors(fake_api):
+    """50 sessions run queries at once; identical tail tokens do not collide."""
+
+    async def run_session():
+        async with create_connected_server_and_client_session(server.app) as session:
+            result = await session.call_tool("execute_query", {"query": "* | count by _sourceHost"})
+            assert "Returned: 5" in result.content[0].text
+
+            # Every session uses the same token; each must see its own cursor
+            first = await session.call_tool("tail_query", {"query": "error", "session_token": "shared"})
+            second = await session.call_tool("tail_query", {"query": "error", "session_token": "shared"})
+            return first.content[0].text, second.content[0].text
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(run_session() for _ in range(SESSIONS))), timeout=60
+    )
+
+    for first, second in results:
+        assert "New messages: 20" in first
+        assert "New messages: 0" in second
+        assert "Duplicates skipped: 20" in second
+
+    assert fake_api.calls["create"] == SESSIONS * 3
+    assert fake_api.calls["delete"] == SESSIONS * 2
+    assert len(server.live_tail._sessions) == SESSIONS
@@ -0,0 +1,87 @@
+"""Tests for time-sharded aggregate queries."""
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.sharding import execute_sharded, merge_shards, plan_sharded_query
+
+from .fake_sumo import FakeSumoAPI
+
+
+def rows(*maps):
+    return [{"map": m} for m in maps]
+
+
+def test_plan_rewrites_aggregates_into_mergeable_partials():
+    plan = plan_sharded_query(
+        '_index=prod | parse "ms=*" as ms | avg(ms) as lat, count by host | sort by lat asc | limit 5'
+    )
+    assert plan.shard_query == (
+        '_index=prod | parse "ms=*" as ms | '
+        "sum(ms) as shard0_sum, count(ms) as shard0_n, count as shard1 by host"
+    )
+    assert (plan.sort_field, plan.sort_descending, plan.limit) == ("lat", False, 5)
+
+    distinct = plan_sharded_query("_index=prod | count_distinct(user) by host")
+    assert distinct.shard_query.endswith("count as shard0 by host, user")
+
+
+def test_plan_rejects_queries_that_cannot_be_merged():
+    assert plan_sharded_query("_index=prod error") is None
+    assert plan_sharded_query("_index=prod | dedup host | count") is None
+    assert plan_sharded_query("_index=prod | limit 10 | count by host") is None
+    assert plan_sharded_query("_index=prod | count by host | where _count > 5") is None
+    assert plan_sharded_query("_index=prod | stddev(ms) by host") is None
+
+
+def test_merge_combines_partials_exactly():
+    plan = plan_sharded_query(
+        "_index=prod | count, avg(ms) as lat, max(ms), min(ms) by host | sort by _count"
+    )
+    merged = merge_shards(plan, [
+        rows({"host": "a", "shard0": "1", "shard1_sum": "10", "shard1_n": "1", "shard2": "10", "shard3": "10"}),
+        rows(
+            {"host": "a", "shard0": "3", "shard1_sum": "30", "shard1_n": "3", "shard2": "12", "shard3": "8"},
+            {"host": "b", "shard0": "2", "shard1_sum": "4", "shard1_n": "2", "shard2": "3", "shard3": "1"},
+        ),
+    ])
+    assert merged == rows(
+        {"host": "a", "_count": "4", "lat": "10", "_max": "12", "_min": "8"},
+        {"host": "b", "_count": "2", "lat": "2", "_max": "3", "_min": "1"},
+    )
+
+
+def test_merge_distinct_counts_and_percentiles():
+    plan = plan_sharded_query("_index=prod | count_distinct(user) by host")
+    # "u2" appears in both shards and must only be counted once
+    merged = merge_shards(plan, [
+        rows({"host": "a", "user": "u1", "shard0": "5"}, {"host": "a", "user": "u2", "shard0": "1"}),
+        rows({"host": "a", "user": "u2", "shard0": "7"}, {"host": "a", "user": "u3", "shard0": "2"}),
+    ])
+    assert merged == rows({"host": "a", "_count_distinct": "3"})
+
+    plan = plan_sharded_query("_index=prod | pct(ms, 50) as p50")
+    points = len(plan.shard_query.split("pct(")) - 1
+    fast = {"shard0_n": "100", **{f"shard0_q{i}": "10" for i in range(points)}}
+    slow = {"shard0_n": "300", **{f"shard0_q{i}": "50" for i in range(points)}}
+    # Three quarters of the values sit in the slow shard
+    assert merge_shards(plan, [rows(fast), rows(slow)]) == rows({"p50": "50"})
+
+
+@pytest.mark.asyncio
+async def test_execute_sharded_runs_one_job_per_shard():
+    api = FakeSumoAPI(records=rows({"host": "a", "shard0": "5"}))
+    client = SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+    plan = plan_sharded_query("_index=prod | count by host")
+
+    sharded = await execute_sharded(
+        client, plan, "2024-01-01T00:00:00", "2024-01-04T00:00:00", shards=3
+    )
+
+    assert api.calls["create"] == 3
+    assert api.calls["delete"] == 3
+    assert sharded.result.records == rows({"host": "a", "_count": "15"})
+    windows = sorted((int(job["from"]), int(job["to"])) for job in api.created)
+    assert all(windows[i][1] + 1 == windows[i + 1][0] for i in range(2))
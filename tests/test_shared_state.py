@@ -0,0 +1,103 @@
+"""Tests for state shared between worker processes."""
+
+import asyncio
+import os
+import stat
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.shared_state import SharedState
+
+from .fake_sumo import FakeSumoAPI
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state.sqlite")
+
+
+def test_token_bucket_is_shared(state_path):
+    """Two handles on one file draw from the same bucket."""
+    first = SharedState(state_path, requests_per_second=1.0, burst=2)
+    second = SharedState(state_path, requests_per_second=1.0, burst=2)
+
+    assert first._take_token() == 0
+    assert second._take_token() == 0
+    assert first._take_token() > 0
+
+
+@pytest.mark.asyncio
+async def test_job_budget_is_global(state_path):
+    """A job slot held by one worker blocks another once the budget is spent."""
+    first = SharedState(state_path, max_concurrent_jobs=1)
+    second = SharedState(state_path, max_concurrent_jobs=1)
+
+    async with first.job_slot():
+        assert first.active_jobs() == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(second.job_slot(poll_interval=0.01).__aenter__(), 0.1)
+
+    async with second.job_slot():
+        assert second.active_jobs() == 1
+
+
+@pytest.mark.asyncio
+async def test_result_cache_shared_between_clients(state_path):
+    """A result fetched by one worker is served to another from the cache."""
+    api = FakeSumoAPI(records=[{"map": {"_count": "3"}}])
+
+    def make_client():
+        return SumoLogicClient(
+            "id", "key", "https://fake.sumologic.com/api",
+            transport=api.transport,
+            shared_state=SharedState(state_path, requests_per_second=100.0),
+            result_cache_ttl=60
+        )
+
+    first = await make_client().execute_query("* | count", "-1h", "now", 10)
+    second = await make_client().execute_query("*  | count", "-1h", "now", 10)
+
+    assert second.records == first.records
+    assert api.calls["create"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_lease_is_renewed_while_the_slot_is_held(state_path):
+    """A slot held longer than its lease still counts against the budget."""
+    first = SharedState(state_path, max_concurrent_jobs=1, job_lease_seconds=0.15)
+    second = SharedState(state_path, max_concurrent_jobs=1, job_lease_seconds=0.15)
+
+    async with first.job_slot():
+        await asyncio.sleep(0.5)
+        assert second.active_jobs() == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(second.job_slot(poll_interval=0.01).__aenter__(), 0.1)
+
+    assert second.active_jobs() == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_kept_apart_per_account(state_path):
+    api = FakeSumoAPI(records=[{"map": {"_count": "3"}}])
+
+    def make_client(access_id):
+        return SumoLogicClient(
+            access_id, "key", "https://fake.sumologic.com/api",
+            transport=api.transport,
+            shared_state=SharedState(state_path, requests_per_second=100.0),
+            result_cache_ttl=60
+        )
+
+    await make_client("alice").execute_query("* | count", "-1h", "now", 10)
+    await make_client("bob").execute_query("* | count", "-1h", "now", 10)
+
+    assert api.calls["create"] == 2
+
+
+def test_state_file_is_private_to_its_user(tmp_path):
+    path = tmp_path / "state" / "shared.sqlite"
+    SharedState(str(path))
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
@@ -0,0 +1,102 @@
+"""Tests for live-tail sessions."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from sumologic_mcp_server.client import SearchJob, SearchResult
+from sumologic_mcp_server.tail import LiveTail
+
+
+def _message(msg_id, time_ms):
+    return {"map": {"_messageid": msg_id, "_messagetime": str(time_ms), "_raw": msg_id}}
+
+
+def _fake_client(*pages):
+    client = MagicMock()
+    client.create_search_job = AsyncMock(
+        return_value=SearchJob(id="job-1", state="NOT_STARTED", query="q", from_time="", to_time="")
+    )
+    client.wait_for_job_completion = AsyncMock()
+    client.delete_search_job = AsyncMock()
+    client.get_search_job_messages = AsyncMock(side_effect=[
+        SearchResult(records=page, fields=[], total_count=len(page), job_id="job-1")
+        for page in pages
+    ])
+    return client
+
+
+@pytest.mark.asyncio
+async def test_tail_returns_only_new_messages():
+    """Second poll starts at the watermark and drops already-seen messages."""
+    first = [_message("a", 1_700_000_000_000), _message("b", 1_700_000_010_000)]
+    second = [_message("b", 1_700_000_010_000), _message("c", 1_700_000_020_000)]
+    client = _fake_client(first, second)
+    tail = LiveTail(client, overlap_seconds=30)
+
+    result = await tail.poll("error", initial_window="-5m")
+    assert [r["_messageid"] for r in result.records] == ["a", "b"]
+    assert client.create_search_job.call_args.args[1] == "-5m"
+
+    result = await tail.poll("error", token=result.token)
+    assert [r["_messageid"] for r in result.records] == ["c"]
+    assert result.duplicates_skipped == 1
+    # watermark (…010s) minus 30s overlap
+    assert client.create_search_job.call_args.args[1] == "2023-11-14T22:13:00"
+    assert client.delete_search_job.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_tail_resets_when_query_changes():
+    """Reusing a token with a different query starts a fresh session."""
+    client = _fake_client([_message("a", 1_700_000_000_000)], [_message("a", 1_700_000_000_000)])
+    tail = LiveTail(client)
+
+    result = await tail.poll("error")
+    result = await tail.poll("warn", token=result.token)
+
+    assert len(result.records) == 1
+    assert client.create_search_job.call_args.args[1] == "-5m"
+
+
+@pytest.mark.asyncio
+async def test_tail_pages_through_a_busy_slice_without_losing_messages():
+    """More new messages than the limit are returned oldest first over later polls."""
+    times = {name: 1_700_000_000_000 + i * 1000 for i, name in enumerate("abcde")}
+    # Sumo returns the newest messages first, a page at a time
+    newest_first = [_message(name, times[name]) for name in "edcba"]
+    client = _fake_client(
+        newest_first[0:2], newest_first[2:4], newest_first[4:],
+        newest_first[0:2], newest_first[2:4], [],
+        newest_first[0:2], [],
+    )
+    tail = LiveTail(client, overlap_seconds=30, page_size=2)
+
+    seen = []
+    result = await tail.poll("error", limit=2)
+    seen += [r["_messageid"] for r in result.records]
+    assert seen == ["a", "b"] and result.truncated
+    assert result.watermark_ms == times["b"]
+    assert [call.kwargs["offset"] for call in client.get_search_job_messages.call_args_list] == [0, 2, 4]
+
+    result = await tail.poll("error", token=result.token, limit=2)
+    seen += [r["_messageid"] for r in result.records]
+    assert result.truncated
+
+    result = await tail.poll("error", token=result.token, limit=2)
+    seen += [r["_messageid"] for r in result.records]
+    assert not result.truncated
+    assert seen == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.asyncio
+async def test_tail_pages_independently_of_the_limit():
+    """A small limit still reads the slice in full pages."""
+    times = [1_700_000_000_000 + i * 1000 for i in range(5)]
+    client = _fake_client([_message(f"m{i}", times[i]) for i in reversed(range(5))])
+    tail = LiveTail(client)
+
+    result = await tail.poll("error", limit=1)
+
+    assert [r["_messageid"] for r in result.records] == ["m0"]
+    assert result.truncated and result.watermark_ms == times[0]
+    client.get_search_job_messages.assert_awaited_once_with("job-1", offset=0, limit=10000)
@@ -0,0 +1,121 @@
+"""Tests for the timeslice aggregate cache."""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from sumologic_mcp_server.client import SearchJob, SearchResult, SumoLogicClient
+from sumologic_mcp_server.timeslice_cache import TimesliceCache, parse_timeslice_query
+
+MINUTE = 60_000
+QUERY = "_sourceCategory=prod | timeslice 1m | count by _timeslice, _sourceHost"
+
+
+def test_parse_timeslice_query():
+    """Only aggregates grouped by the timeslice are cacheable."""
+    spec = parse_timeslice_query(QUERY)
+    assert spec.slice_ms == MINUTE
+    assert spec.alias == "_timeslice"
+
+    spec = parse_timeslice_query(
+        "error | timeslice 5m as ts | count by ts | sort by ts asc"
+    )
+    assert spec.slice_ms == 5 * MINUTE
+    assert spec.alias == "ts"
+    assert not spec.descending
+
+    assert parse_timeslice_query("error | count by _sourceHost") is None
+    assert parse_timeslice_query("error | timeslice 1m | count by _sourceHost") is None
+    assert parse_timeslice_query(QUERY + " | top 5 _sourceHost by _count") is None
+
+
+def test_parse_timeslice_query_needs_per_message_stages_before_the_aggregate():
+    """Stages that look across slices make a slice's rows depend on the whole window."""
+    assert parse_timeslice_query(
+        "error | parse \"user=*\" as user | where user != \"\" | timeslice 1m | count by _timeslice"
+    ) is not None
+    assert parse_timeslice_query(
+        "error | timeslice 1m | json field=_raw \"status\" | count by _timeslice, status"
+    ) is not None
+
+    assert parse_timeslice_query("error | limit 100 | timeslice 1m | count by _timeslice") is None
+    assert parse_timeslice_query("error | dedup by _sourceHost | timeslice 1m | count by _timeslice") is None
+    assert parse_timeslice_query("error | timeslice 1m | dedup 1 by user | count by _timeslice") is None
+    assert parse_timeslice_query("error | sort by _messagetime | timeslice 1m | count by _timeslice") is None
+    assert parse_timeslice_query("error | timeslice 1m | limit 10 | count by _timeslice") is None
+
+
+def test_plan_serves_closed_slices_from_cache():
+    """A repeat plan starts fetching at the first open slice."""
+    cache = TimesliceCache(settle_seconds=0)
+    spec = parse_timeslice_query(QUERY)
+    now = 100 * MINUTE
+
+    plan = cache.plan(QUERY, spec, 40 * MINUTE + 5_000, now, now_ms=now)
+    assert plan.fetch_from_ms == 40 * MINUTE
+    assert plan.cached_slices == 0
+
+    rows = [{"map": {"_timeslice": str(s * MINUTE), "_count": "1"}} for s in range(40, 100)]
+    cache.store(QUERY, spec, plan.fetch_from_ms, now, rows, [], now_ms=now)
+
+    later = now + 3 * MINUTE + 10_000
+    plan = cache.plan(QUERY, spec, 43 * MINUTE + 10_000, later, now_ms=later)
+    assert plan.cached_slices == 57
+    assert plan.fetch_from_ms == 100 * MINUTE
+    assert len(plan.cached_rows) == 57
+
+
+@pytest.mark.asyncio
+async def test_execute_query_fetches_only_delta():
+    """The client merges cached buckets with a query over the open slices."""
+    client = SumoLogicClient(
+        "id", "key", "https://test.sumologic.com/api",
+        timeslice_cache=TimesliceCache(settle_seconds=0)
+    )
+    client.create_search_job = AsyncMock(
+        return_value=SearchJob(id="job", state="NOT_STARTED", query=QUERY, from_time="", to_time="")
+    )
+    client.wait_for_job_completion = AsyncMock(
+        return_value=SearchJob(id="job", state="DONE GATHERING RESULTS", query=QUERY, from_time="", to_time="")
+    )
+
+    def page(first, last):
+        records = [{"map": {"_timeslice": str(s * MINUTE), "_count": "1"}} for s in range(first, last)]
+        return SearchResult(records=records, fields=[], total_count=len(records), job_id="job")
+
+    client.get_search_job_records = AsyncMock(side_effect=[page(0, 10), page(10, 12)])
+
+    with patch("time.time", return_value=10 * 60):
+        result = await client.execute_query(QUERY, "1970-01-01T00:00:00", "1970-01-01T00:10:00")
+    assert result.total_count == 10
+
+    with patch("time.time", return_value=12 * 60):
+        result = await client.execute_query(QUERY, "1970-01-01T00:02:00", "1970-01-01T00:12:00")
+
+    assert client.create_search_job.call_args.args[1] == "1970-01-01T00:10:00"
+    assert [int(r["map"]["_timeslice"]) // MINUTE for r in result.records] == list(range(2, 12))
+
+
+@pytest.mark.asyncio
+async def test_delta_reads_every_record_page_without_a_total_count():
+    """/records pages have no totalCount, so the delta pages by the job's record count."""
+    from .fake_sumo import FakeSumoAPI
+
+    slices = 25_000
+    api = FakeSumoAPI(records=[
+        {"map": {"_timeslice": str(s * MINUTE), "_count": "1"}} for s in range(slices)
+    ])
+    client = SumoLogicClient(
+        "id", "key", "https://test.sumologic.com/api",
+        timeslice_cache=TimesliceCache(settle_seconds=0), transport=api.transport
+    )
+    query = "_sourceCategory=prod | timeslice 1m | count by _timeslice"
+
+    with patch("time.time", return_value=slices * 60):
+        result = await client.execute_query(
+            query, "1970-01-01T00:00:00", client._parse_time("now"), limit=10
+        )
+
+    assert api.calls["records"] == 3
+    assert result.total_count == slices
+    cache = client.timeslice_cache
+    assert len(cache._entries[cache._key(query)].slices) == slices
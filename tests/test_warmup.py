@@ -0,0 +1,102 @@
+"""Tests for background query warm-up."""
+
+import asyncio
+import json
+
+import pytest
+
+from sumologic_mcp_server.client import SumoLogicClient
+from sumologic_mcp_server.warmup import WarmupQuery, WarmupScheduler, load_warmup_config
+
+from .fake_sumo import FakeSumoAPI
+
+
+@pytest.fixture
+def api():
+    return FakeSumoAPI(records=[{"map": {"_sourcehost": "web-1", "_count": "7"}}])
+
+
+@pytest.fixture
+def client(api):
+    return SumoLogicClient(
+        "test_id", "test_key", "https://test.sumologic.com/api", transport=api.transport
+    )
+
+
+async def wait_for_refresh(warmup):
+    for _ in range(100):
+        if all(q.refreshes or q.failures for q in warmup.stats().queries):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("warm-up never refreshed")
+
+
+def test_load_config_accepts_object_or_list(tmp_path):
+    path = tmp_path / "warmup.json"
+    path.write_text(json.dumps({"queries": [{"query": "_index=prod error | count"}]}))
+    assert load_warmup_config(str(path))[0].interval_seconds == 300
+
+    path.write_text(json.dumps([{"query": "q", "from_time": "-15m", "interval_seconds": 60}]))
+    assert load_warmup_config(str(path))[0].from_time == "-15m"
+
+
+@pytest.mark.asyncio
+async def test_warm_query_served_from_memory(api, client):
+    query = "_index=prod error | count by _sourcehost"
+    warmup = WarmupScheduler(client, [WarmupQuery(query=query, limit=100)])
+    warmup.start()
+    try:
+        await wait_for_refresh(warmup)
+    finally:
+        await warmup.stop()
+    jobs_run = api.calls["create"]
+
+    result = warmup.lookup(query, "-1h", "now", 10)
+    assert result.records == api.records
+    assert warmup.lookup(query, "-1h", "now", 1000) is None
+    assert warmup.lookup("_index=prod other", "-1h", "now", 10) is None
+    assert api.calls["create"] == jobs_run
+
+    stats = warmup.stats()
+    assert (stats.hits, stats.misses, stats.uncovered) == (1, 1, 1)
+    assert stats.queries[0].refresh_lag_seconds is not None
+
+
+@pytest.mark.asyncio
+async def test_raw_queries_warmed_with_pushed_down_limit(api, client):
+    api.records, api.messages = [], [{"map": {"_raw": f"line {i}"}} for i in range(80)]
+    warmup = WarmupScheduler(client, [WarmupQuery(query="_index=prod error", limit=50)])
+    plan = client.analyze_query("_index=prod error", "-1h", "now", 50)
+    warmup.start()
+    try:
+        await wait_for_refresh(warmup)
+    finally:
+        await warmup.stop()
+
+    assert plan.limit_pushed_down
+    assert api.created[0]["query"] == plan.query
+    # Live calls are looked up by the query as written, whatever limit they push down
+    assert len(warmup.lookup("_index=prod error", "-1h", "now", 50).records) == 50
+    assert len(warmup.lookup("_index=prod error", "-1h", "now", 10).records) == 10
+    assert warmup.lookup("_index=prod error", "-1h", "now", 100) is None
+
+
+@pytest.mark.asyncio
+async def test_execute_query_tool_serves_warm_rows_for_a_smaller_limit(api, client, monkeypatch):
+    from sumologic_mcp_server import server
+
+    api.records, api.messages = [], [{"map": {"_raw": f"line {i}"}} for i in range(80)]
+    warmup = WarmupScheduler(client, [WarmupQuery(query="_index=prod error", limit=50)])
+    warmup.start()
+    try:
+        await wait_for_refresh(warmup)
+    finally:
+        await warmup.stop()
+    monkeypatch.setattr(server, "warmup", warmup)
+
+    result = await server.execute_query_tool(client, {"query": "_index=prod error", "limit": 20})
+
+    text = result[0].text
+    assert "Served from warm-up cache" in text
+    assert "Returned: 20" in text
+    assert api.calls["create"] == 1